@@ -0,0 +1,172 @@
+"""
+Latest-wins admission control for frame ingest.
+
+Each camera may have at most one frame in flight and one frame pending.
+A newer frame replaces the pending one (the older request is answered
+"dropped" straight away), so when inference falls behind, clients get a
+cheap 429 instead of piling up requests and end-to-end latency stays
+bounded by roughly two frame service times.
+"""
+
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+from metrics import REGISTRY, Counter
+
+
+class AdmissionConfig:
+    """Configuration for per-camera frame admission"""
+    ENABLED = os.getenv("FRAME_ADMISSION_CONTROL", "true").lower() == "true"
+    PENDING_TIMEOUT = 5.0  # Max seconds a pending frame waits for the in-flight one
+    MIN_RETRY_MS = 100  # Floor for the suggested retry interval
+    SERVICE_TIME_ALPHA = 0.2  # EWMA weight for per-camera frame service time
+    IDLE_TIMEOUT = 300  # Seconds without frames before a camera's slot is forgotten
+    SWEEP_INTERVAL = 30  # Seconds between idle-slot sweeps
+
+
+FRAMES_DROPPED = REGISTRY.register(Counter(
+    "surveillance_frames_dropped_total",
+    "Frames rejected by admission control, by reason (superseded, timeout)",
+    ["reason"],
+))
+
+
+class FrameDropped(Exception):
+    """Raised when a frame is not admitted; carries a suggested retry interval"""
+    def __init__(self, reason, retry_after_ms):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_ms = retry_after_ms
+
+
+class _Ticket:
+    def __init__(self):
+        self.superseded = False
+
+
+class _CameraSlot:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.in_flight = False
+        self.pending = None
+        self.service_time = None  # EWMA seconds per frame
+        self.admitted = 0
+        self.dropped = 0
+        self.last_used = time.monotonic()
+
+    def idle(self, now):
+        return (not self.in_flight and self.pending is None
+                and now - self.last_used > AdmissionConfig.IDLE_TIMEOUT)
+
+    def retry_after_ms(self):
+        estimate = (self.service_time or 0) * 1000.0
+        return int(max(AdmissionConfig.MIN_RETRY_MS, estimate))
+
+
+class AdmissionController:
+    """
+    Per-camera one-in-flight / one-pending gate.
+
+    Camera ids come from clients, so slots of cameras that sent nothing for
+    IDLE_TIMEOUT are swept away, like idle pipelines.
+    """
+    def __init__(self):
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def _slot(self, camera_id):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sweep >= AdmissionConfig.SWEEP_INTERVAL:
+                self._last_sweep = now
+                self._evict_idle_locked(now)
+            slot = self._slots.get(camera_id)
+            if slot is None:
+                slot = _CameraSlot()
+                self._slots[camera_id] = slot
+            slot.last_used = now
+            return slot
+
+    def _evict_idle_locked(self, now):
+        for camera_id, slot in list(self._slots.items()):
+            if slot.idle(now):
+                del self._slots[camera_id]
+
+    def _drop(self, slot, reason):
+        slot.dropped += 1
+        FRAMES_DROPPED.inc(reason)
+        return FrameDropped(reason, slot.retry_after_ms())
+
+    @contextmanager
+    def admit(self, camera_id):
+        """
+        Hold the camera's processing slot for the duration of a with-block.
+
+        Raises FrameDropped if a newer frame for the same camera arrives
+        while this one is pending, or the in-flight frame takes longer than
+        PENDING_TIMEOUT.
+        """
+        if not AdmissionConfig.ENABLED:
+            yield
+            return
+
+        slot = self._slot(camera_id)
+        with slot.cond:
+            # A waiting pending frame is older than this one whether or not
+            # the slot is free (it may not have woken up yet since the
+            # in-flight frame finished), so it is always superseded.
+            if slot.pending is not None:
+                slot.pending.superseded = True
+                slot.pending = None
+                slot.cond.notify_all()
+            if slot.in_flight:
+                ticket = _Ticket()
+                slot.pending = ticket
+
+                deadline = time.monotonic() + AdmissionConfig.PENDING_TIMEOUT
+                while slot.in_flight and not ticket.superseded:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    slot.cond.wait(remaining)
+
+                if ticket.superseded:
+                    raise self._drop(slot, "superseded")
+                if slot.pending is ticket:
+                    slot.pending = None
+                if slot.in_flight:
+                    raise self._drop(slot, "timeout")
+
+            slot.in_flight = True
+            slot.admitted += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with slot.cond:
+                slot.in_flight = False
+                alpha = AdmissionConfig.SERVICE_TIME_ALPHA
+                if slot.service_time is None:
+                    slot.service_time = elapsed
+                else:
+                    slot.service_time = alpha * elapsed + (1 - alpha) * slot.service_time
+                slot.cond.notify_all()
+
+    def stats(self):
+        with self._lock:
+            slots = dict(self._slots)
+        return {
+            camera_id: {
+                "in_flight": slot.in_flight,
+                "pending": slot.pending is not None,
+                "admitted": slot.admitted,
+                "dropped": slot.dropped,
+                "service_ms": round((slot.service_time or 0) * 1000.0, 2),
+            }
+            for camera_id, slot in slots.items()
+        }
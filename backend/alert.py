@@ -1,9 +1,18 @@
 import time
+import heapq
+import itertools
 import numpy as np
-from collections import defaultdict, deque
+from collections import deque
 from datetime import datetime, timedelta
 import os
 import sys
+import threading
+
+from alert_buffer import AlertRingBuffer
+from clock import system_clock
+from metrics import ALERTS_TOTAL
+from track_store import TrackStore, TrackStoreConfig
+from zones import get_zone_map
 
 # Try multiple audio backends
 AUDIO_METHOD = None
@@ -51,13 +60,45 @@ class AlertConfig:
     # Suspicious behavior
     FAST_MOVEMENT_THRESHOLD = 100  # Pixels per frame
     ERRATIC_MOVEMENT_FRAMES = 5  # Consecutive erratic movements
+    
+    # Delivery (printing, listeners, sound) runs on a dispatcher thread
+    DISPATCH_QUEUE_SIZE = 256  # Undelivered alerts kept; lowest severity dropped beyond
+    ALERT_SOUND = os.getenv("ALERT_SOUND", "true").lower() == "true"
 
 
-# Global tracking variables
-last_alert_times = defaultdict(lambda: datetime.min)
-track_positions = defaultdict(lambda: deque(maxlen=50))  # Track last 50 positions
-track_first_seen = {}  # When track was first detected
-active_alerts = []  # List of active alert events
+class AlertState:
+    """
+    Per-camera alert state (cooldowns, track positions, recent alerts).
+    Every rule reads the time from `clock` (default: wall clock).
+    """
+    def __init__(self, camera_id=None, clock=None):
+        self.camera_id = camera_id
+        self.clock = clock or system_clock
+        # Per-track and per-alert-key state, evicted once not seen for a while.
+        # Cooldown entries must outlive the cooldown they enforce.
+        self.last_alert_times = TrackStore(
+            'alert_cooldowns', ttl=max(TrackStoreConfig.TTL_SECONDS, AlertConfig.ALERT_COOLDOWN),
+            clock=self.clock.time)
+        self.track_positions = TrackStore(
+            'track_positions', lambda: deque(maxlen=50), clock=self.clock.time)  # Track last 50 positions
+        self.track_first_seen = TrackStore('track_first_seen', clock=self.clock.time)  # When track was first detected
+        self.active_alerts = AlertRingBuffer()  # Recent alert events, time-indexed
+
+
+# Default state, used when no per-camera state is passed (single camera loop)
+default_state = AlertState()
+last_alert_times = default_state.last_alert_times
+track_positions = default_state.track_positions
+track_first_seen = default_state.track_first_seen
+active_alerts = default_state.active_alerts
+
+
+# Callbacks invoked with each AlertEvent as it is triggered (e.g. push streams)
+alert_listeners = []
+# Attached alert_sinks.AlertSink instances (also registered as listeners)
+alert_sinks = []
+# Persistent history (alert_store.AlertStore); records every alert, merged or not
+alert_store = None
 
 
 class AlertType:
@@ -74,16 +115,34 @@ class AlertType:
 
 
 class AlertEvent:
-    """Represents an alert event"""
-    def __init__(self, alert_type, severity, description, metadata=None):
+    """
+    Represents an alert event.
+
+    `timestamp` is the event time. The checks below always pass the
+    camera's clock time; only events built outside a pipeline default to
+    the wall clock.
+    """
+    def __init__(self, alert_type, severity, description, metadata=None, timestamp=None):
         self.alert_type = alert_type
         self.severity = severity  # 1-5, 5 being critical
         self.description = description
-        self.timestamp = datetime.now()
+        self.timestamp = timestamp or system_clock.now()
         self.metadata = metadata or {}
+        self.camera_id = None  # Set when the event is triggered
+        self.repeats = 1  # Duplicates the dispatcher merged into this event
     
     def __str__(self):
         return f"[{self.severity}/5] {self.alert_type}: {self.description}"
+    
+    def to_dict(self):
+        """JSON-friendly representation"""
+        return {
+            'type': self.alert_type,
+            'severity': self.severity,
+            'description': self.description,
+            'camera_id': self.camera_id,
+            'timestamp': self.timestamp.isoformat(),
+        }
 
 
 def generate_beep(frequency, duration, sample_rate=22050, volume=0.8):
@@ -104,18 +163,47 @@ def generate_beep(frequency, duration, sample_rate=22050, volume=0.8):
     return audio
 
 
-def play_audio(audio, sample_rate=22050):
-    """Play audio using available method"""
+def _beep_pattern(severity):
+    """(frequency, duration, volume, repeats) of the alert sound for a severity"""
+    if severity >= 4:  # Critical
+        return 1500, 0.2, 0.9, 3
+    if severity >= 3:  # High
+        return 1200, 0.5, 0.9, 1
+    return 1000, 0.4, 0.8, 1  # Medium/Low
+
+
+# Alert waveforms (and pygame sounds) per pattern, generated once
+_beep_cache = {}
+_sound_cache = {}
+
+
+def get_alert_sound(severity, sample_rate=22050):
+    """Waveform for a severity: its beeps joined by 100ms of silence, cached"""
+    pattern = _beep_pattern(severity)
+    audio = _beep_cache.get(pattern)
+    if audio is None:
+        frequency, duration, volume, repeats = pattern
+        beep = generate_beep(frequency, duration, sample_rate, volume)
+        gap = np.zeros(int(sample_rate * 0.1), dtype=np.int16)
+        audio = np.concatenate([beep] + [part for _ in range(repeats - 1) for part in (gap, beep)])
+        audio.flags.writeable = False
+        _beep_cache[pattern] = audio
+    return audio
+
+
+def play_audio(audio, sample_rate=22050, sound=None):
+    """Play audio using available method (sound: prebuilt pygame Sound)"""
     if AUDIO_METHOD == "pygame":
         try:
-            # Create stereo audio (2 channels)
-            stereo_audio = np.column_stack((audio, audio))
-            # Create pygame sound from array
-            sound = pygame.sndarray.make_sound(stereo_audio)
-            sound.set_volume(1.0)  # Max volume
+            if sound is None:
+                # Create stereo audio (2 channels)
+                stereo_audio = np.ascontiguousarray(np.column_stack((audio, audio)))
+                # Create pygame sound from array
+                sound = pygame.sndarray.make_sound(stereo_audio)
+                sound.set_volume(1.0)  # Max volume
             channel = sound.play()
             # Wait for sound to finish playing
-            while channel.get_busy():
+            while channel is not None and channel.get_busy():
                 pygame.time.wait(10)
         except Exception as e:
             print(f" ✗ Audio playback error: {e}")
@@ -124,8 +212,23 @@ def play_audio(audio, sample_rate=22050):
         print('\a')
 
 
+def _pygame_sound(severity):
+    """Cached pygame Sound for a severity"""
+    pattern = _beep_pattern(severity)
+    sound = _sound_cache.get(pattern)
+    if sound is None:
+        audio = get_alert_sound(severity)
+        sound = pygame.sndarray.make_sound(np.ascontiguousarray(np.column_stack((audio, audio))))
+        sound.set_volume(1.0)
+        _sound_cache[pattern] = sound
+    return sound
+
+
 def beep_alert(severity=3):
-    """Play beep sound based on severity"""
+    """
+    Play beep sound based on severity. Blocks until the sound has played,
+    so it runs on the dispatcher's sound thread, not the frame path.
+    """
     try:
         print("=" * 60)
         print(f" 🚨 ALERT TRIGGERED! Severity: {severity}/5")
@@ -141,33 +244,22 @@ def beep_alert(severity=3):
         if AUDIO_METHOD == "ctypes":
             print(f" 🔊 Playing Windows native beep...")
             try:
-                if severity >= 4:  # Critical
-                    for i in range(3):
-                        ctypes.windll.kernel32.Beep(1500, 200)
+                frequency, duration, _, repeats = _beep_pattern(severity)
+                for i in range(repeats):
+                    ctypes.windll.kernel32.Beep(frequency, int(duration * 1000))
+                    if i < repeats - 1:
                         time.sleep(0.1)
-                elif severity >= 3:  # High
-                    ctypes.windll.kernel32.Beep(1200, 500)
-                else:  # Medium/Low
-                    ctypes.windll.kernel32.Beep(1000, 400)
             except Exception as e:
                 print(f" Note: PC speaker beep not available - {e}")
         elif AUDIO_METHOD == "pygame":
-            # Different beep patterns based on severity
+            # Different beep patterns based on severity (waveforms are cached)
             if severity >= 4:  # Critical
                 print(" 🚨 Playing CRITICAL alert sound (3 beeps)...")
-                for i in range(3):
-                    beep = generate_beep(1500, 0.2, volume=0.9)
-                    play_audio(beep)
-                    if i < 2:
-                        time.sleep(0.1)
             elif severity >= 3:  # High
                 print(" ⚠️ Playing HIGH alert sound...")
-                beep = generate_beep(1200, 0.5, volume=0.9)
-                play_audio(beep)
             else:  # Medium/Low
                 print(" ℹ️ Playing MEDIUM alert sound...")
-                beep = generate_beep(1000, 0.4, volume=0.8)
-                play_audio(beep)
+            play_audio(get_alert_sound(severity), sound=_pygame_sound(severity))
         
         print(" ✓ Alert sound completed")
         print("=" * 60)
@@ -182,41 +274,40 @@ def beep_alert(severity=3):
             time.sleep(0.15)
 
 
-def can_trigger_alert(alert_type):
+def can_trigger_alert(alert_type, state=None):
     """Check if enough time has passed since last alert of this type"""
-    last_time = last_alert_times[alert_type]
+    state = state or default_state
+    last_time = state.last_alert_times.get(alert_type, datetime.min)
     cooldown = timedelta(seconds=AlertConfig.ALERT_COOLDOWN)
+    now = state.clock.now()
     
-    if datetime.now() - last_time > cooldown:
-        last_alert_times[alert_type] = datetime.now()
+    if now - last_time > cooldown:
+        state.last_alert_times[alert_type] = now
         return True
     return False
 
 
-def point_in_polygon(point, polygon):
-    """Check if point is inside polygon"""
-    import cv2
-    return cv2.pointPolygonTest(np.array(polygon, dtype=np.int32), point, False) >= 0
-
-
-def check_loitering(track_id, current_position):
+def check_loitering(track_id, current_position, state=None):
     """
     Detect if a person is loitering (staying in same area too long)
     """
-    track_positions[track_id].append((current_position, datetime.now()))
+    state = state or default_state
+    now = state.clock.now()
+    state.track_positions[track_id].append((current_position, now))
     
-    if track_id not in track_first_seen:
-        track_first_seen[track_id] = datetime.now()
+    # setdefault also marks the track seen, so it is not evicted while loitering
+    first_seen = state.track_first_seen.setdefault(track_id, now)
+    if first_seen is now:
         return None
     
     # Calculate time in area
-    time_in_area = (datetime.now() - track_first_seen[track_id]).total_seconds()
+    time_in_area = (now - first_seen).total_seconds()
     
     if time_in_area < AlertConfig.LOITERING_TIME_THRESHOLD:
         return None
     
     # Check if person has moved significantly
-    positions = [pos for pos, _ in track_positions[track_id]]
+    positions = [pos for pos, _ in state.track_positions[track_id]]
     if len(positions) < 10:
         return None
     
@@ -232,39 +323,52 @@ def check_loitering(track_id, current_position):
             AlertType.LOITERING,
             severity=3,
             description=f"Person ID:{track_id} loitering for {int(time_in_area)}s",
-            metadata={'track_id': track_id, 'duration': time_in_area, 'position': current_position}
+            metadata={'track_id': track_id, 'duration': time_in_area, 'position': current_position},
+            timestamp=now
         )
     
     return None
 
 
-def check_restricted_zones(detections):
+def check_restricted_zones(detections, frame_shape=None, timestamp=None):
     """
     Check if any person is in a restricted zone
+
+    All person centers are looked up at once in the precompiled zone label
+    map (one bit per zone, rebuilt when the zones or frame_shape change).
     """
     if not AlertConfig.RESTRICTED_ZONES:
         return []
     
+    persons = [det for det in detections if det['class_name'] == 'person']
+    if not persons:
+        return []
+    
+    zones = AlertConfig.RESTRICTED_ZONES
+    zone_map = get_zone_map('restricted', [zone['polygon'] for zone in zones])
+    zone_bits = zone_map.lookup([det['center'] for det in persons], frame_shape)
+    
     alerts = []
-    for det in detections:
-        if det['class_name'] != 'person':
+    for det, bits in zip(persons, zone_bits):
+        if not bits:
             continue
         
         center = det['center']
-        for zone in AlertConfig.RESTRICTED_ZONES:
-            if point_in_polygon(center, zone['polygon']):
-                alert = AlertEvent(
-                    AlertType.RESTRICTED_ZONE,
-                    severity=4,
-                    description=f"Person detected in restricted zone: {zone['name']}",
-                    metadata={'zone': zone['name'], 'track_id': det.get('track_id'), 'position': center}
-                )
-                alerts.append(alert)
+        for index in zone_map.zone_indices(bits):
+            zone = zones[index]
+            alert = AlertEvent(
+                AlertType.RESTRICTED_ZONE,
+                severity=4,
+                description=f"Person detected in restricted zone: {zone['name']}",
+                metadata={'zone': zone['name'], 'track_id': det.get('track_id'), 'position': center},
+                timestamp=timestamp
+            )
+            alerts.append(alert)
     
     return alerts
 
 
-def check_crowd_detection(person_count):
+def check_crowd_detection(person_count, timestamp=None):
     """
     Alert if too many people detected
     """
@@ -273,20 +377,22 @@ def check_crowd_detection(person_count):
             AlertType.CROWD_DETECTED,
             severity=4,
             description=f"Crowd detected: {person_count} persons",
-            metadata={'count': person_count}
+            metadata={'count': person_count},
+            timestamp=timestamp
         )
     elif person_count > AlertConfig.MAX_PERSONS_ALLOWED:
         return AlertEvent(
             AlertType.UNAUTHORIZED_PERSON,
             severity=3,
             description=f"More than allowed: {person_count} persons (max: {AlertConfig.MAX_PERSONS_ALLOWED})",
-            metadata={'count': person_count}
+            metadata={'count': person_count},
+            timestamp=timestamp
         )
     
     return None
 
 
-def check_fall_detection(detection):
+def check_fall_detection(detection, timestamp=None):
     """
     Detect if person has fallen (horizontal orientation)
     """
@@ -305,19 +411,22 @@ def check_fall_detection(detection):
             AlertType.FALL_DETECTED,
             severity=5,  # Critical
             description=f"Potential fall detected (aspect ratio: {aspect_ratio:.2f})",
-            metadata={'track_id': detection.get('track_id'), 'position': detection['center'], 'aspect_ratio': aspect_ratio}
+            metadata={'track_id': detection.get('track_id'), 'position': detection['center'], 'aspect_ratio': aspect_ratio},
+            timestamp=timestamp
         )
     
     return None
 
 
-def check_suspicious_movement(track_id, current_position):
+def check_suspicious_movement(track_id, current_position, state=None):
     """
     Detect erratic or suspicious movement patterns
     """
-    track_positions[track_id].append((current_position, datetime.now()))
+    state = state or default_state
+    now = state.clock.now()
+    state.track_positions[track_id].append((current_position, now))
     
-    positions = [pos for pos, _ in track_positions[track_id]]
+    positions = [pos for pos, _ in state.track_positions[track_id]]
     if len(positions) < 3:
         return None
     
@@ -339,13 +448,14 @@ def check_suspicious_movement(track_id, current_position):
             AlertType.SUSPICIOUS_BEHAVIOR,
             severity=3,
             description=f"Fast movement detected for ID:{track_id} (speed: {avg_speed:.1f})",
-            metadata={'track_id': track_id, 'speed': avg_speed}
+            metadata={'track_id': track_id, 'speed': avg_speed},
+            timestamp=now
         )
     
     return None
 
 
-def check_gesture_alerts(gesture_result):
+def check_gesture_alerts(gesture_result, timestamp=None):
     """
     Check for SOS or HELP gesture alerts
     """
@@ -359,20 +469,22 @@ def check_gesture_alerts(gesture_result):
             AlertType.SOS_GESTURE,
             severity=5,  # Critical
             description="🆘 SOS GESTURE DETECTED - IMMEDIATE ATTENTION REQUIRED!",
-            metadata={'gesture_type': 'SOS', 'hand_count': gesture_result.get('hand_count', 0)}
+            metadata={'gesture_type': 'SOS', 'hand_count': gesture_result.get('hand_count', 0)},
+            timestamp=timestamp
         )
     elif stable_gesture == "HELP":
         return AlertEvent(
             AlertType.HELP_GESTURE,
             severity=4,
             description="🙋 HELP GESTURE DETECTED - Assistance needed",
-            metadata={'gesture_type': 'HELP', 'hand_count': gesture_result.get('hand_count', 0)}
+            metadata={'gesture_type': 'HELP', 'hand_count': gesture_result.get('hand_count', 0)},
+            timestamp=timestamp
         )
     
     return None
 
 
-def process_events(detection_result, gesture_result=None):
+def process_events(detection_result, gesture_result=None, state=None):
     """
     Main event processing function - analyzes detections and gestures
     Returns list of alert events
@@ -380,14 +492,20 @@ def process_events(detection_result, gesture_result=None):
     Args:
         detection_result: Result from detect_objects()
         gesture_result: Result from detect_hand_gestures() (optional)
+        state: Per-camera AlertState (default: module-level default state)
     
     Returns:
         List of AlertEvent objects
     """
+    state = state or default_state
     events = []
+    # Events happen at the camera's time (the frame's capture time in replays)
+    now = state.clock.now()
     
-    # Skip if no detections
-    if not detection_result or detection_result.get('skipped'):
+    # Skip frames YOLO did not run on, unless boxes were propagated to them
+    if not detection_result:
+        return events
+    if detection_result.get('skipped') and not detection_result.get('propagated'):
         return events
     
     detections = detection_result.get('detections', [])
@@ -398,13 +516,13 @@ def process_events(detection_result, gesture_result=None):
     
     # 1. Check for gesture alerts (highest priority)
     if gesture_result:
-        gesture_alert = check_gesture_alerts(gesture_result)
-        if gesture_alert and can_trigger_alert(gesture_alert.alert_type):
+        gesture_alert = check_gesture_alerts(gesture_result, now)
+        if gesture_alert and can_trigger_alert(gesture_alert.alert_type, state):
             events.append(gesture_alert)
     
     # 2. Check crowd detection
-    crowd_alert = check_crowd_detection(person_count)
-    if crowd_alert and can_trigger_alert(crowd_alert.alert_type):
+    crowd_alert = check_crowd_detection(person_count, now)
+    if crowd_alert and can_trigger_alert(crowd_alert.alert_type, state):
         events.append(crowd_alert)
     
     # 3. Check individual person behaviors
@@ -414,57 +532,277 @@ def process_events(detection_result, gesture_result=None):
         
         if track_id is not None:
             # Check loitering
-            loiter_alert = check_loitering(track_id, center)
-            if loiter_alert and can_trigger_alert(f"{AlertType.LOITERING}_{track_id}"):
+            loiter_alert = check_loitering(track_id, center, state)
+            if loiter_alert and can_trigger_alert(f"{AlertType.LOITERING}_{track_id}", state):
                 events.append(loiter_alert)
             
             # Check suspicious movement
-            movement_alert = check_suspicious_movement(track_id, center)
-            if movement_alert and can_trigger_alert(f"{AlertType.SUSPICIOUS_BEHAVIOR}_{track_id}"):
+            movement_alert = check_suspicious_movement(track_id, center, state)
+            if movement_alert and can_trigger_alert(f"{AlertType.SUSPICIOUS_BEHAVIOR}_{track_id}", state):
                 events.append(movement_alert)
         
-        # Check fall detection
-        fall_alert = check_fall_detection(person)
-        if fall_alert and can_trigger_alert(f"{AlertType.FALL_DETECTED}_{track_id}"):
+        # Check fall detection (needs a real detection: a propagated box
+        # keeps the shape of the last detected one)
+        if person.get('propagated'):
+            continue
+        fall_alert = check_fall_detection(person, now)
+        if fall_alert and can_trigger_alert(f"{AlertType.FALL_DETECTED}_{track_id}", state):
             events.append(fall_alert)
     
     # 4. Check restricted zones
-    zone_alerts = check_restricted_zones(person_detections)
+    zone_alerts = check_restricted_zones(person_detections, detection_result.get('frame_shape'), now)
     for alert in zone_alerts:
         zone_key = f"{alert.alert_type}_{alert.metadata.get('zone')}"
-        if can_trigger_alert(zone_key):
+        if can_trigger_alert(zone_key, state):
             events.append(alert)
     
     return events
 
 
-def trigger_alerts(events):
+class AlertDispatcher:
+    """
+    Delivers triggered alerts off the frame path.
+
+    trigger_alerts only enqueues. A worker thread prints each alert and
+    notifies the listeners; sounds go to a separate player thread that only
+    keeps the most severe pending sound, so a long beep never holds up
+    delivery. The queue is bounded and ordered by severity (highest first,
+    then oldest). An alert duplicating one still queued (same camera, type,
+    track and zone) is merged into it instead of queued again; when full,
+    the lowest-severity alert is dropped.
+    Delivery and sounds run in wall time. The events already carry their
+    camera-clock timestamps, so replays are unaffected.
+
+    Args:
+        max_size: Queue capacity (default AlertConfig.DISPATCH_QUEUE_SIZE)
+        sound: Play alert sounds (default AlertConfig.ALERT_SOUND)
+    """
+    def __init__(self, max_size=None, sound=None):
+        self.max_size = max_size or AlertConfig.DISPATCH_QUEUE_SIZE
+        self.sound = AlertConfig.ALERT_SOUND if sound is None else sound
+        self._heap = []  # [-severity, seq, event, key, merged count, live]
+        self._pending = {}  # Duplicate key -> live queued entry
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread = None
+        self._sound_severity = 0  # Most severe sound waiting to be played
+        self._sound_cond = threading.Condition()
+        self._sound_thread = None
+        # Counters change and are read under self._cond, with the queue
+        self.submitted = 0
+        self.delivered = 0
+        self.merged = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _key(event):
+        return (event.camera_id, event.alert_type,
+                event.metadata.get('track_id'), event.metadata.get('zone'))
+
+    def _ensure_workers(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+        if self.sound and self._sound_thread is None:
+            self._sound_thread = threading.Thread(target=self._run_sound, name="alert-sound", daemon=True)
+            self._sound_thread.start()
+
+    def submit(self, event):
+        """Queue an event for delivery; returns immediately"""
+        key = self._key(event)
+        with self._cond:
+            self._ensure_workers()
+            self.submitted += 1
+            count = 1
+            queued = self._pending.get(key)
+            if queued is not None:
+                self.merged += 1
+                queued[4] += 1
+                if event.severity <= queued[2].severity:
+                    return
+                # A more severe duplicate replaces the queued one
+                queued[5] = False
+                count = queued[4]
+                del self._pending[key]
+
+            entry = [-event.severity, next(self._seq), event, key, count, True]
+            if len(self._pending) >= self.max_size:
+                victim = max(self._pending.values(), key=lambda e: (e[0], e[1]))
+                if (victim[0], victim[1]) < (entry[0], entry[1]):
+                    self.dropped += 1  # The new alert is the least important
+                    return
+                victim[5] = False
+                del self._pending[victim[3]]
+                self.dropped += 1
+
+            if len(self._heap) >= 2 * self.max_size:
+                # Drop merged/evicted entries the worker has not popped yet
+                self._heap = [e for e in self._heap if e[5]]
+                heapq.heapify(self._heap)
+            heapq.heappush(self._heap, entry)
+            self._pending[key] = entry
+            self._cond.notify()
+
+    def _run(self):
+        entry = None
+        while True:
+            with self._cond:
+                if entry is not None:
+                    self.delivered += 1
+                self._busy = False
+                while not self._pending:
+                    self._cond.notify_all()  # Wake flush()
+                    self._cond.wait()
+                entry = heapq.heappop(self._heap)
+                while not entry[5]:
+                    entry = heapq.heappop(self._heap)
+                del self._pending[entry[3]]
+                self._busy = True
+            try:
+                self._deliver(entry[2], entry[4])
+            except Exception as e:
+                print(f" ✗ Alert dispatch error: {e}")
+
+    def _deliver(self, event, count):
+        event.repeats = count
+        print("\n" + "="*70)
+        print(f"🚨 {event}" + (f" (x{count})" if count > 1 else ""))
+        print(f"⏰ Time: {event.timestamp.strftime('%H:%M:%S')}")
+        if event.metadata:
+            print(f"📋 Details: {event.metadata}")
+        print("="*70)
+        
+        # Play alert sound (on the sound thread)
+        if self.sound:
+            with self._sound_cond:
+                self._sound_severity = max(self._sound_severity, event.severity)
+                self._sound_cond.notify()
+        
+        for listener in list(alert_listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                print(f" ✗ Alert listener error: {e}")
+
+    def _run_sound(self):
+        while True:
+            with self._sound_cond:
+                while not self._sound_severity:
+                    self._sound_cond.wait()
+                severity, self._sound_severity = self._sound_severity, 0
+            beep_alert(severity)
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        """Wait until every queued alert has been delivered; False on timeout"""
+        with self._cond:
+            if self._thread is None:
+                return True
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def get_stats(self):
+        """
+        Consistent snapshot: submitted = delivered + merged + dropped +
+        queue_depth + delivering
+        """
+        with self._cond:
+            return {
+                'queue_depth': len(self._pending),
+                'delivering': int(self._busy),
+                'submitted': self.submitted,
+                'delivered': self.delivered,
+                'merged': self.merged,
+                'dropped': self.dropped,
+            }
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_alert_dispatcher():
+    """Get the process-wide alert dispatcher"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = AlertDispatcher()
+    return _dispatcher
+
+
+def trigger_alerts(events, state=None):
     """
-    Trigger alerts for detected events
+    Trigger alerts for detected events. Delivery (printing, sound and
+    listeners) is queued to the alert dispatcher, so this never blocks.
     """
+    state = state or default_state
     if not events:
         return
     
     # Sort by severity (highest first)
     events.sort(key=lambda x: x.severity, reverse=True)
     
+    dispatcher = get_alert_dispatcher()
     for event in events:
-        print("\n" + "="*70)
-        print(f"🚨 {event}")
-        print(f"⏰ Time: {event.timestamp.strftime('%H:%M:%S')}")
-        if event.metadata:
-            print(f"📋 Details: {event.metadata}")
-        print("="*70)
-        
-        # Play alert sound
-        beep_alert(event.severity)
+        event.camera_id = state.camera_id
+        ALERTS_TOTAL.inc(event.alert_type)
         
-        # Add to active alerts
-        active_alerts.append(event)
+        # Add to active alerts (the ring buffer drops the oldest when full)
+        state.active_alerts.append(event)
+        if alert_store is not None:
+            alert_store.submit(event)
         
-        # Keep only recent alerts
-        if len(active_alerts) > 50:
-            active_alerts.pop(0)
+        dispatcher.submit(event)
+
+
+def add_alert_sink(sink):
+    """
+    Attach an alert_sinks.AlertSink (webhook, JSONL file, syslog, ...).
+    The sink is started and fed by the dispatcher like any listener.
+    """
+    if sink not in alert_sinks:
+        alert_sinks.append(sink)
+        add_alert_listener(sink.start())
+    return sink
+
+
+def remove_alert_sink(sink, timeout=5.0):
+    """Detach a sink, delivering what it has queued first"""
+    if sink in alert_sinks:
+        alert_sinks.remove(sink)
+        remove_alert_listener(sink)
+        sink.stop(timeout)
+
+
+def get_alert_sink_stats():
+    """Per-sink delivery statistics"""
+    return [sink.get_stats() for sink in alert_sinks]
+
+
+def set_alert_store(store):
+    """Record every triggered alert in an alert_store.AlertStore (None to stop)"""
+    global alert_store
+    alert_store = store
+    return store
+
+
+def get_alert_store():
+    return alert_store
+
+
+def add_alert_listener(callback):
+    """Register a callback invoked with every triggered AlertEvent"""
+    if callback not in alert_listeners:
+        alert_listeners.append(callback)
+
+
+def remove_alert_listener(callback):
+    if callback in alert_listeners:
+        alert_listeners.remove(callback)
 
 
 def configure_alerts(loitering_time=None, max_persons=None, crowd_threshold=None, 
@@ -480,12 +818,15 @@ def configure_alerts(loitering_time=None, max_persons=None, crowd_threshold=None
         AlertConfig.CROWD_THRESHOLD = crowd_threshold
     if restricted_zones is not None:
         AlertConfig.RESTRICTED_ZONES = restricted_zones
+        get_zone_map('restricted', [zone['polygon'] for zone in restricted_zones])
 
 
-def get_active_alerts(max_age_seconds=60):
+def get_active_alerts(max_age_seconds=60, state=None, alert_type=None, min_severity=None):
     """
-    Get list of recent active alerts
+    Get list of recent active alerts (oldest first), optionally only one
+    alert type and/or at least min_severity
     """
-    cutoff_time = datetime.now() - timedelta(seconds=max_age_seconds)
-    return [alert for alert in active_alerts if alert.timestamp > cutoff_time]
+    state = state or default_state
+    cutoff_time = state.clock.now() - timedelta(seconds=max_age_seconds)
+    return state.active_alerts.window(start=cutoff_time, alert_type=alert_type, min_severity=min_severity)
     
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Time-indexed ring buffer of recent alerts.
+
+Alerts arrive in time order, so a fixed-capacity circular buffer with a
+parallel array of timestamps answers "alerts in the last N seconds" with a
+binary search for the window start and a walk over just that window,
+instead of scanning and copying every stored alert. Appending is O(1) and
+the oldest alert is overwritten once the buffer is full.
+"""
+
+import os
+import threading
+
+
+class AlertBufferConfig:
+    """Configuration for the per-camera recent-alert buffer"""
+    CAPACITY = int(os.getenv("ALERT_BUFFER_CAPACITY", "10000"))  # Alerts kept per camera
+
+
+class AlertRingBuffer:
+    """
+    Fixed-capacity, time-ordered store of AlertEvents.
+
+    Args:
+        capacity: Alerts kept before the oldest is overwritten
+            (default AlertBufferConfig.CAPACITY)
+
+    Timestamps are indexed as epoch seconds, clamped to be non-decreasing
+    (alerts of one frame are triggered highest severity first, not in
+    creation order), which keeps the buffer sorted for bisection.
+    """
+    def __init__(self, capacity=None):
+        self.capacity = capacity or AlertBufferConfig.CAPACITY
+        self._events = [None] * self.capacity
+        self._times = [0.0] * self.capacity
+        self._start = 0  # Physical index of the oldest alert
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, event):
+        """Add an alert, overwriting the oldest when full"""
+        ts = event.timestamp.timestamp()
+        with self._lock:
+            if self._count:
+                ts = max(ts, self._times[(self._start + self._count - 1) % self.capacity])
+            if self._count < self.capacity:
+                index = (self._start + self._count) % self.capacity
+                self._count += 1
+            else:
+                index = self._start
+                self._start = (self._start + 1) % self.capacity
+            self._events[index] = event
+            self._times[index] = ts
+
+    def clear(self):
+        with self._lock:
+            self._events = [None] * self.capacity
+            self._start = 0
+            self._count = 0
+
+    def _bisect(self, ts):
+        """Logical index of the first alert newer than ts (bisect_right)"""
+        lo, hi = 0, self._count
+        times, start, capacity = self._times, self._start, self.capacity
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[(start + mid) % capacity] <= ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(self, start=None, end=None, alert_type=None, min_severity=None,
+               camera_id=None, limit=None, newest_first=False):
+        """
+        Alerts with start < timestamp <= end that match every given filter.
+
+        Args:
+            start / end: datetimes bounding the window (None = unbounded)
+            alert_type: Exact AlertType to keep
+            min_severity: Keep alerts at least this severe
+            camera_id: Keep alerts from this camera
+            limit: Return at most this many (the newest when newest_first)
+            newest_first: Order newest to oldest instead of oldest first
+
+        Only the alerts inside the time window are visited.
+        """
+        with self._lock:
+            first = self._bisect(start.timestamp()) if start is not None else 0
+            last = self._bisect(end.timestamp()) if end is not None else self._count
+            indices = range(last - 1, first - 1, -1) if newest_first else range(first, last)
+            matches = []
+            for i in indices:
+                event = self._events[(self._start + i) % self.capacity]
+                if alert_type is not None and event.alert_type != alert_type:
+                    continue
+                if min_severity is not None and event.severity < min_severity:
+                    continue
+                if camera_id is not None and event.camera_id != camera_id:
+                    continue
+                matches.append(event)
+                if limit is not None and len(matches) >= limit:
+                    break
+            return matches
+
+    def __iter__(self):
+        """Oldest to newest (a snapshot)"""
+        return iter(self.window())
+
+    def latest(self, n=1):
+        """The n newest alerts, oldest first"""
+        return self.window(limit=n, newest_first=True)[::-1]
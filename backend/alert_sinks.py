@@ -0,0 +1,393 @@
+"""
+Pluggable alert sinks.
+
+A sink forwards triggered alerts somewhere outside the process: an HTTP
+webhook, an append-only JSONL file or the local syslog. Sinks are attached
+with alert.add_alert_sink() and are fed by the alert dispatcher, never by
+the frame path.
+
+Each sink owns a bounded queue and a worker thread that collects alerts
+into batches (up to MAX_BATCH_SIZE, or whatever arrived within
+BATCH_WINDOW_MS of the first one), retries a failed batch with exponential
+backoff and, once retries are exhausted, appends it to a dead-letter JSONL
+file so nothing is silently lost. A slow or dead receiver only ever fills
+its own queue (further alerts are dropped and counted).
+
+Built-in sinks are configured from the environment (see SinkConfig):
+
+    ALERT_WEBHOOK_URL=https://example.com/hook
+    ALERT_JSONL_PATH=alerts.jsonl
+    ALERT_SYSLOG=true
+
+    python alert_sinks.py --selftest   # exercise the webhook sink against a local stub server
+"""
+
+from collections import deque
+from datetime import datetime
+import json
+import logging
+import logging.handlers
+import os
+from pathlib import Path
+import threading
+import time
+import urllib.request
+
+from metrics import REGISTRY, Counter, Histogram
+
+
+class SinkConfig:
+    """Configuration for alert sinks"""
+    WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+    WEBHOOK_TIMEOUT = float(os.getenv("ALERT_WEBHOOK_TIMEOUT", "5"))  # Seconds per request
+    JSONL_PATH = os.getenv("ALERT_JSONL_PATH", "")
+    SYSLOG = os.getenv("ALERT_SYSLOG", "false").lower() == "true"
+    SYSLOG_ADDRESS = os.getenv("ALERT_SYSLOG_ADDRESS", "")  # Default: /dev/log, else localhost:514
+    DEAD_LETTER_DIR = os.getenv("ALERT_DEAD_LETTER_DIR", "dead_letter")
+
+    BATCH_WINDOW_MS = 500  # Wait this long after the first alert for more to batch
+    MAX_BATCH_SIZE = 50  # Alerts per delivery
+    QUEUE_SIZE = 1000  # Undelivered alerts kept per sink
+    MAX_RETRIES = 5  # Retries per batch before it is dead-lettered
+    BACKOFF_BASE = 0.5  # First retry delay (seconds), doubled per retry
+    BACKOFF_MAX = 30.0  # Longest retry delay (seconds)
+
+
+SINK_EVENTS = REGISTRY.register(Counter(
+    "surveillance_alert_sink_events_total",
+    "Alerts handled by each sink, by outcome (sent, dropped, dead_letter)",
+    ["sink", "outcome"],
+))
+SINK_FAILURES = REGISTRY.register(Counter(
+    "surveillance_alert_sink_failures_total",
+    "Failed delivery attempts per sink",
+    ["sink"],
+))
+SINK_SECONDS = REGISTRY.register(Histogram(
+    "surveillance_alert_sink_seconds",
+    "Latency of successful batch deliveries per sink",
+    ["sink"],
+))
+
+
+def alert_payload(event):
+    """JSON-ready dict for an AlertEvent, metadata (and merged duplicates) included"""
+    payload = event.to_dict()
+    payload['metadata'] = event.metadata
+    if getattr(event, 'repeats', 1) > 1:
+        payload['repeats'] = event.repeats
+    return payload
+
+
+def _dumps(payload):
+    # Metadata can hold tuples, numpy scalars and datetimes
+    return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class AlertSink:
+    """
+    Base class for batched, retried alert delivery.
+
+    Subclasses implement send_batch(payloads), raising on failure. The
+    keyword arguments override the SinkConfig defaults for this sink.
+    """
+    kind = "sink"
+
+    def __init__(self, name=None, batch_window_ms=None, max_batch_size=None,
+                 queue_size=None, max_retries=None, dead_letter_path=None):
+        self.name = name or self.kind
+        self.batch_window_ms = SinkConfig.BATCH_WINDOW_MS if batch_window_ms is None else batch_window_ms
+        self.max_batch_size = max_batch_size or SinkConfig.MAX_BATCH_SIZE
+        self.queue_size = queue_size or SinkConfig.QUEUE_SIZE
+        self.max_retries = SinkConfig.MAX_RETRIES if max_retries is None else max_retries
+        self.dead_letter_path = Path(dead_letter_path or Path(SinkConfig.DEAD_LETTER_DIR) / f"{self.name}.jsonl")
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.failures = 0
+        self.batches = 0
+        self.last_error = None
+        self._latencies = deque(maxlen=200)  # Seconds per successful batch
+
+    def send_batch(self, payloads):
+        """Deliver a list of alert payload dicts; raise on failure"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release sink resources (called by stop)"""
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"alert-sink-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Deliver what is queued (within timeout), then stop the worker"""
+        self.flush(timeout)
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.close()
+
+    def submit(self, event):
+        """Queue an alert; never blocks (drops when the queue is full)"""
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                self.dropped += 1
+                SINK_EVENTS.inc(self.name, "dropped")
+                return False
+            self._queue.append(alert_payload(event))
+            self._cond.notify()
+        return True
+
+    # Sinks are alert listeners
+    __call__ = submit
+
+    def flush(self, timeout=None):
+        """Wait until every queued alert is delivered or dead-lettered"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()  # Wake flush()
+            while not self._queue:
+                if self._stop.is_set():
+                    return None
+                self._cond.wait()
+            self._busy = True
+            # Give more alerts a short window to join the batch
+            deadline = time.monotonic() + self.batch_window_ms / 1000.0
+            while len(self._queue) < self.max_batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._deliver(batch)
+
+    def _deliver(self, batch):
+        delay = SinkConfig.BACKOFF_BASE
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.send_batch(batch)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                SINK_FAILURES.inc(self.name)
+                if attempt == self.max_retries or self._stop.is_set():
+                    break
+                self._stop.wait(delay)
+                delay = min(delay * 2, SinkConfig.BACKOFF_MAX)
+                continue
+            elapsed = time.perf_counter() - started
+            self._latencies.append(elapsed)
+            SINK_SECONDS.observe(elapsed, self.name)
+            self.sent += len(batch)
+            self.batches += 1
+            SINK_EVENTS.inc(self.name, "sent", amount=len(batch))
+            return
+        self._dead_letter(batch)
+
+    def _dead_letter(self, batch):
+        try:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            failed_at = datetime.now().isoformat()
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for payload in batch:
+                    f.write(_dumps({'sink': self.name, 'failed_at': failed_at,
+                                    'error': self.last_error, 'alert': payload}) + "\n")
+        except OSError as e:
+            print(f" ✗ Alert sink {self.name}: dead-letter write failed: {e}")
+        self.dead_lettered += len(batch)
+        SINK_EVENTS.inc(self.name, "dead_letter", amount=len(batch))
+
+    def get_stats(self):
+        latencies = sorted(self._latencies)
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'queue_depth': len(self._queue),
+            'sent': self.sent,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'dead_lettered': self.dead_lettered,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                'p95': round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2) if latencies else None,
+            },
+        }
+
+
+class WebhookSink(AlertSink):
+    """POSTs each batch as JSON {"alerts": [...]} to a URL; non-2xx is a failure"""
+    kind = "webhook"
+
+    def __init__(self, url, timeout=None, headers=None, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.timeout = timeout or SinkConfig.WEBHOOK_TIMEOUT
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+
+    def send_batch(self, payloads):
+        body = _dumps({'alerts': payloads}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        # urlopen raises HTTPError for 4xx/5xx
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class JsonlFileSink(AlertSink):
+    """Appends one JSON line per alert to a file"""
+    kind = "jsonl"
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+
+    def send_batch(self, payloads):
+        if self.path.parent != Path(""):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(_dumps(payload) + "\n" for payload in payloads))
+            f.flush()
+
+
+class _RaisingSysLogHandler(logging.handlers.SysLogHandler):
+    """SysLogHandler that raises send errors instead of printing them, so they are retried"""
+    def handleError(self, record):
+        raise
+
+
+class SyslogSink(AlertSink):
+    """Sends each alert to the local syslog (severity 4-5 as CRITICAL/ERROR)"""
+    kind = "syslog"
+
+    def __init__(self, address=None, **kwargs):
+        super().__init__(**kwargs)
+        address = address or SinkConfig.SYSLOG_ADDRESS
+        if not address:
+            address = "/dev/log" if os.path.exists("/dev/log") else ("localhost", 514)
+        elif ":" in address:
+            host, port = address.rsplit(":", 1)
+            address = (host, int(port))
+        self.handler = _RaisingSysLogHandler(address=address)
+        self.logger = logging.getLogger(f"surveillance.alerts.{self.name}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.handler)
+
+    def send_batch(self, payloads):
+        levels = {5: logging.CRITICAL, 4: logging.ERROR, 3: logging.WARNING}
+        for payload in payloads:
+            level = levels.get(payload.get('severity'), logging.INFO)
+            self.logger.log(level, "surveillance: %s", _dumps(payload))
+
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+
+def sinks_from_env():
+    """Sinks enabled by SinkConfig (webhook, JSONL file, syslog)"""
+    sinks = []
+    if SinkConfig.WEBHOOK_URL:
+        sinks.append(WebhookSink(SinkConfig.WEBHOOK_URL))
+    if SinkConfig.JSONL_PATH:
+        sinks.append(JsonlFileSink(SinkConfig.JSONL_PATH))
+    if SinkConfig.SYSLOG:
+        try:
+            sinks.append(SyslogSink())
+        except OSError as e:
+            print(f" ✗ Syslog alert sink unavailable: {e}")
+    return sinks
+
+
+def _selftest():
+    """Webhook sink against a local stub server that fails its first requests"""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    import tempfile
+
+    received = []
+    failures = {'left': 2}
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if failures['left'] > 0:
+                failures['left'] -= 1
+                self.send_response(503)
+            else:
+                received.extend(json.loads(body)['alerts'])
+                self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    class StubEvent:
+        def __init__(self, i):
+            self.metadata = {'track_id': i}
+
+        def to_dict(self):
+            return {'type': 'SELFTEST', 'severity': 3, 'description': 'stub alert'}
+
+    server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    SinkConfig.BACKOFF_BASE = 0.05
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"http://127.0.0.1:{server.server_port}/hook"
+        sink = WebhookSink(url, name="selftest", batch_window_ms=50,
+                           dead_letter_path=Path(tmp) / "dead.jsonl").start()
+        for i in range(10):
+            sink.submit(StubEvent(i))
+        sink.stop(timeout=10)
+        print(json.dumps(sink.get_stats(), indent=2))
+        assert len(received) == 10, f"stub received {len(received)} alerts"
+
+        # Unreachable receiver: the batch ends up in the dead-letter file
+        server.shutdown()
+        server.server_close()
+        dead = WebhookSink(url, name="selftest-dead", batch_window_ms=0, max_retries=1,
+                           timeout=0.5, dead_letter_path=Path(tmp) / "dead.jsonl").start()
+        dead.submit(StubEvent(99))
+        dead.stop(timeout=10)
+        lines = (Path(tmp) / "dead.jsonl").read_text().splitlines()
+        assert dead.dead_lettered == 1 and len(lines) == 1, dead.get_stats()
+    print("Alert sink self-test passed")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Alert sinks")
+    parser.add_argument("--selftest", action="store_true", help="Run the webhook sink against a local stub server")
+    args = parser.parse_args()
+    if args.selftest:
+        _selftest()
+    else:
+        print(json.dumps([sink.name for sink in sinks_from_env()]))
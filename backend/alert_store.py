@@ -0,0 +1,347 @@
+"""
+Persistent alert history in SQLite.
+
+Triggered alerts are queued in memory and written by a background thread
+in batched transactions (write-behind), so recording an alert costs the
+frame path one deque append. The table is indexed by time and by type,
+severity and camera (each with time), so history queries stay fast over
+millions of rows:
+
+    - time-range queries with keyset (cursor) pagination, newest first
+    - per-type aggregate counts over a time range
+
+The database uses WAL mode, so API reads never wait for the writer.
+
+    python alert_store.py --benchmark 1000000   # fill a scratch DB and time queries
+"""
+
+import base64
+from collections import deque
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import REGISTRY, Counter
+
+
+class AlertStoreConfig:
+    """Configuration for the persistent alert store"""
+    ENABLED = os.getenv("ALERT_STORE", "true").lower() == "true"
+    PATH = os.getenv("ALERT_DB_PATH", "alerts.db")
+    QUEUE_SIZE = 10000  # Alerts waiting to be written before new ones are dropped
+    BATCH_SIZE = 500  # Rows per write transaction
+    FLUSH_INTERVAL_MS = 500  # Longest an alert waits in memory
+    PAGE_SIZE = 100  # Default rows per history page
+    MAX_PAGE_SIZE = 1000
+
+
+ALERT_STORE_ROWS = REGISTRY.register(Counter(
+    "surveillance_alert_store_rows_total",
+    "Alerts handled by the alert store, by outcome (written, dropped, failed)",
+    ["outcome"],
+))
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    severity INTEGER NOT NULL,
+    camera_id TEXT,
+    description TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts, id);
+-- severity last makes per-type aggregates index-only
+CREATE INDEX IF NOT EXISTS idx_alerts_type_ts ON alerts (type, ts, id, severity);
+CREATE INDEX IF NOT EXISTS idx_alerts_severity_ts ON alerts (severity, ts, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_camera_ts ON alerts (camera_id, ts, id);
+"""
+
+
+def _epoch(value):
+    """datetime, epoch seconds or ISO string -> epoch seconds (None passes through)"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def encode_cursor(ts, row_id):
+    return base64.urlsafe_b64encode(f"{ts!r}:{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Opaque page cursor -> (ts, id); raises ValueError when malformed"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    ts, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+    return float(ts), int(row_id)
+
+
+class AlertStore:
+    """
+    SQLite alert history with a write-behind batch writer.
+
+    Args:
+        path: Database file (default AlertStoreConfig.PATH)
+    """
+    def __init__(self, path=None):
+        self.path = str(path or AlertStoreConfig.PATH)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._flushing = False
+        self._stop = False
+        self._local = threading.local()  # Read connection per thread
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self._thread = threading.Thread(target=self._run, name="alert-store", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # -------------------------
+    # WRITES
+    # -------------------------
+    def submit(self, event):
+        """Queue an AlertEvent for writing; never blocks (drops when full)"""
+        with self._cond:
+            if len(self._queue) >= AlertStoreConfig.QUEUE_SIZE:
+                self.dropped += 1
+                ALERT_STORE_ROWS.inc("dropped")
+                return False
+            self._queue.append(event)
+            if len(self._queue) >= AlertStoreConfig.BATCH_SIZE:
+                self._cond.notify()
+        return True
+
+    @staticmethod
+    def _row(event):
+        return (
+            event.timestamp.timestamp(),
+            event.alert_type,
+            int(event.severity),
+            event.camera_id,
+            event.description,
+            json.dumps(event.metadata, default=str) if event.metadata else None,
+        )
+
+    def _run(self):
+        conn = self._connect()
+        interval = AlertStoreConfig.FLUSH_INTERVAL_MS / 1000.0
+        while True:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()  # Wake flush()
+                self._cond.wait_for(
+                    lambda: (self._stop or len(self._queue) >= AlertStoreConfig.BATCH_SIZE
+                             or (self._flushing and self._queue)), interval)
+                if not self._queue:
+                    if self._stop:
+                        break
+                    continue
+                count = min(len(self._queue), AlertStoreConfig.BATCH_SIZE)
+                batch = [self._queue.popleft() for _ in range(count)]
+                self._busy = True
+            try:
+                rows = [self._row(event) for event in batch]
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO alerts (ts, type, severity, camera_id, description, metadata) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.written += len(rows)
+                ALERT_STORE_ROWS.inc("written", amount=len(rows))
+            except Exception as e:
+                self.failed += len(batch)
+                ALERT_STORE_ROWS.inc("failed", amount=len(batch))
+                print(f" ✗ Alert store write failed: {e}")
+        conn.close()
+
+    def flush(self, timeout=None):
+        """Wait until queued alerts are written"""
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+            finally:
+                self._flushing = False
+
+    def close(self, timeout=5.0):
+        """Write what is queued, then stop the writer"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+    @staticmethod
+    def _where(start, end, alert_type, min_severity, camera_id):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(_epoch(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(_epoch(end))
+        if alert_type is not None:
+            clauses.append("type = ?")
+            params.append(alert_type)
+        if min_severity is not None:
+            clauses.append("severity >= ?")
+            params.append(int(min_severity))
+        if camera_id is not None:
+            clauses.append("camera_id = ?")
+            params.append(camera_id)
+        return clauses, params
+
+    def query(self, start=None, end=None, alert_type=None, min_severity=None,
+              camera_id=None, limit=None, cursor=None):
+        """
+        One page of alert history, newest first.
+
+        Args:
+            start / end: Time range [start, end) as datetime, epoch seconds or ISO string
+            alert_type / min_severity / camera_id: Optional filters
+            limit: Rows per page (default PAGE_SIZE, clamped to 1..MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page
+
+        Returns:
+            (list of alert dicts, next_cursor or None on the last page)
+        """
+        limit = max(1, min(int(limit or AlertStoreConfig.PAGE_SIZE), AlertStoreConfig.MAX_PAGE_SIZE))
+        clauses, params = self._where(start, end, alert_type, min_severity, camera_id)
+        if cursor:
+            # Keyset pagination: resume strictly after the last row served
+            clauses.append("(ts, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        sql = "SELECT id, ts, type, severity, camera_id, description, metadata FROM alerts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+        rows = self._reader().execute(sql, params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['ts'], rows[-1]['id'])
+        return [self._to_dict(row) for row in rows], next_cursor
+
+    @staticmethod
+    def _to_dict(row):
+        return {
+            'id': row['id'],
+            'type': row['type'],
+            'severity': row['severity'],
+            'description': row['description'],
+            'camera_id': row['camera_id'],
+            'timestamp': datetime.fromtimestamp(row['ts']).isoformat(),
+            'metadata': json.loads(row['metadata']) if row['metadata'] else {},
+        }
+
+    def aggregate(self, start=None, end=None, min_severity=None, camera_id=None):
+        """Per-type counts (plus max severity, first and last time) over a time range"""
+        clauses, params = self._where(start, end, None, min_severity, camera_id)
+        sql = "SELECT type, COUNT(*) AS count, MAX(severity) AS max_severity, MIN(ts) AS first, MAX(ts) AS last FROM alerts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " GROUP BY type ORDER BY count DESC"
+        return [
+            {
+                'type': row['type'],
+                'count': row['count'],
+                'max_severity': row['max_severity'],
+                'first': datetime.fromtimestamp(row['first']).isoformat(),
+                'last': datetime.fromtimestamp(row['last']).isoformat(),
+            }
+            for row in self._reader().execute(sql, params)
+        ]
+
+    def get_stats(self):
+        return {
+            'path': self.path,
+            'queue_depth': len(self._queue),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+def _benchmark(rows):
+    """Fill a scratch database with synthetic alerts and time typical queries"""
+    import random
+    import tempfile
+
+    class SyntheticEvent:
+        def __init__(self, ts):
+            self.timestamp = datetime.fromtimestamp(ts)
+            self.alert_type = random.choice(["LOITERING", "CROWD_DETECTED", "RESTRICTED_ZONE", "FALL_DETECTED"])
+            self.severity = random.randint(1, 5)
+            self.camera_id = f"cam_{random.randint(1, 20):03d}"
+            self.description = "synthetic"
+            self.metadata = {'track_id': random.randint(1, 1000)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        AlertStoreConfig.QUEUE_SIZE = rows
+        AlertStoreConfig.BATCH_SIZE = 5000
+        store = AlertStore(os.path.join(tmp, "bench.db"))
+        now = time.time()
+        started = time.perf_counter()
+        for i in range(rows):
+            store.submit(SyntheticEvent(now - (rows - i) * 0.5))
+        submitted = time.perf_counter() - started
+        store.flush()
+        written = time.perf_counter() - started
+        print(f"{rows} rows: submit {submitted * 1e6 / rows:.2f} us/alert, written in {written:.1f}s")
+
+        def timed(label, fn):
+            started = time.perf_counter()
+            result = fn()
+            print(f"{label}: {(time.perf_counter() - started) * 1000:.2f} ms")
+            return result
+
+        page, cursor = timed("latest page", lambda: store.query(limit=100))
+        timed("next page", lambda: store.query(limit=100, cursor=cursor))
+        timed("last hour, one camera", lambda: store.query(start=now - 3600, camera_id="cam_007"))
+        timed("severity >= 5, one type", lambda: store.query(alert_type="FALL_DETECTED", min_severity=5))
+        timed("per-type counts, last day", lambda: store.aggregate(start=now - 86400))
+        timed("per-type counts, all", lambda: store.aggregate())
+        store.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Alert history store")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Time queries on a scratch DB of ROWS alerts")
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark(args.benchmark)
+    else:
+        print(json.dumps(AlertStore().aggregate(), indent=2))
@@ -3,26 +3,53 @@ Flask API Server for AI Surveillance System
 Production-safe version (browser camera ingestion)
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 import base64
 import cv2
+import json
 import os
 from datetime import datetime
 import numpy as np
-import threading
 
 # -------------------------
 # IMPORTS (safe for local + prod)
 # -------------------------
 try:
-    from detection import detect_objects, draw_enhanced_annotations
-    from gesture_detection import detect_hand_gestures, draw_hand_annotations
+    from pipeline import add_eviction_listener, get_pipeline, list_pipelines, get_all_active_alerts
     from alert import (
-        process_events,
-        trigger_alerts,
-        get_active_alerts,
         AlertConfig,
+        add_alert_listener,
+        add_alert_sink,
+        get_alert_dispatcher,
+        get_alert_sink_stats,
+        get_alert_store,
+        set_alert_store,
+    )
+    from alert_sinks import sinks_from_env
+    from alert_store import AlertStore, AlertStoreConfig
+    from clock import to_datetime
+    from detection import (
+        DETECTION_FIELDS,
+        DETECTION_RECORD_DTYPE,
+        DetectionConfig,
+        detection_class_names,
+        detections_to_rows,
+        get_inference_stats,
+        pack_detections,
+    )
+    from admission import AdmissionController, FrameDropped
+    from jobs import FrameJobQueue, JobQueueFull, JobStatus
+    from metrics import CONTENT_TYPE, QUEUE_DEPTH, render_metrics, time_stage
+    from qos import QosConfig
+    from streaming import (
+        EventBroadcaster,
+        FrameHub,
+        MJPEG_BOUNDARY,
+        StreamConfig,
+        TooManySubscribers,
+        format_sse,
+        stats_delta,
     )
 except Exception as e:
     print("❌ Import error:", e)
@@ -32,14 +59,18 @@ except Exception as e:
 # APP SETUP
 # -------------------------
 app = Flask(__name__)
-CORS(app)
+# Binary frame responses carry their stats in headers, which browsers only
+# expose to scripts when listed here.
+CORS(app, expose_headers=[
+    "X-Camera-Id", "X-Stats", "X-Alerts", "X-Job-Id", "X-Record-Format", "X-Record-Count",
+])
 
 # -------------------------
 # GLOBAL STATE
 # -------------------------
-frame_lock = threading.Lock()
-latest_frame = None
-last_ingest_time = None
+# Latest annotated JPEG per camera, shared by /video_feed viewers
+frame_hub = FrameHub()
+add_eviction_listener(frame_hub.discard)
 
 latest_stats = {
     "person_count": 0,
@@ -49,9 +80,27 @@ latest_stats = {
     "timestamp": None,
 }
 
+# Push channel for dashboards: stats deltas and alerts
+events_stream = EventBroadcaster()
+add_alert_listener(lambda event: events_stream.publish("alert", event.to_dict()))
+
+# Outbound alert sinks (webhook / JSONL / syslog) enabled in the environment
+for sink in sinks_from_env():
+    add_alert_sink(sink)
+
+# Persistent, queryable alert history
+if AlertStoreConfig.ENABLED:
+    set_alert_store(AlertStore())
+
 # Explicitly disable server-side camera in cloud
 DISABLE_CAMERA = os.environ.get("DISABLE_CAMERA", "true").lower() == "true"
 
+DEFAULT_CAMERA_ID = "cam_001"
+JPEG_QUALITY = 85
+
+# Content types accepted as a raw JPEG request body
+BINARY_IMAGE_TYPES = ("image/jpeg", "application/octet-stream")
+
 # -------------------------
 # UTILS
 # -------------------------
@@ -60,33 +109,134 @@ def decode_base64_image(data: str):
     if not data:
         return None
 
+    return decode_image_bytes(decode_base64_bytes(data))
+
+
+def decode_base64_bytes(data: str):
+    """Strip an optional data URL prefix and base64-decode to raw image bytes"""
+    if not data:
+        return None
+
     if "," in data:
         data = data.split(",", 1)[1]
 
     try:
-        raw = base64.b64decode(data)
-        arr = np.frombuffer(raw, np.uint8)
-        return cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        with time_stage("base64_decode"):
+            return base64.b64decode(data)
+    except Exception:
+        return None
+
+
+def decode_image_bytes(raw: bytes):
+    """Decode raw encoded image bytes (JPEG/PNG) into an OpenCV frame"""
+    if not raw:
+        return None
+
+    try:
+        with time_stage("image_decode"):
+            arr = np.frombuffer(raw, np.uint8)
+            return cv2.imdecode(arr, cv2.IMREAD_COLOR)
     except Exception:
         return None
 
 
-def encode_image(frame):
-    """Encode OpenCV frame to base64 JPEG"""
+def encode_jpeg(frame):
+    """Encode OpenCV frame to raw JPEG bytes"""
     try:
-        ret, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        with time_stage("jpeg_encode"):
+            ret, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
         if not ret:
             return None
-        return f"data:image/jpeg;base64,{base64.b64encode(buffer).decode()}"
+        return buffer.tobytes()
     except Exception:
         return None
 
 
-def ingest_online(max_age=5):
-    """Check if browser is actively sending frames"""
-    if last_ingest_time is None:
-        return False
-    return (datetime.now() - last_ingest_time).total_seconds() <= max_age
+def parse_capture_timestamp(value):
+    """Capture timestamp (epoch seconds or ISO 8601) -> datetime; None if absent"""
+    if value is None or value == "":
+        return None
+    return to_datetime(value)
+
+
+def read_frame_request():
+    """
+    Read an encoded frame from the current request.
+
+    Supports three ingest formats:
+      - JSON: {"image": "<base64 data URL>", "camera_id": "...", "timestamp": ...}
+      - Raw JPEG body (Content-Type: image/jpeg or application/octet-stream)
+      - multipart/form-data with an "image" file part
+
+    For binary formats the camera id comes from the X-Camera-Id header
+    (or a "camera_id" form field for multipart), and the capture timestamp
+    from the X-Capture-Timestamp header (or a "timestamp" form field).
+
+    The capture timestamp (epoch seconds or ISO 8601) is optional. When
+    given it drives the camera's clock, so alerts, cooldowns and loitering
+    follow the time the frame was taken rather than when it arrived.
+
+    The image is returned still encoded so callers can defer the decode
+    until the frame is actually admitted for processing.
+
+    Returns:
+        (image_bytes, camera_id, timestamp, binary, error) - error is None on success
+    """
+    mimetype = request.mimetype
+    header_camera = request.headers.get("X-Camera-Id")
+    header_timestamp = request.headers.get("X-Capture-Timestamp")
+
+    if mimetype in BINARY_IMAGE_TYPES:
+        raw = request.get_data(cache=False)
+        if not raw:
+            return None, None, None, True, "Missing image"
+        camera_id = header_camera or DEFAULT_CAMERA_ID
+        timestamp = header_timestamp
+        binary = True
+    elif mimetype == "multipart/form-data":
+        upload = request.files.get("image")
+        if upload is None:
+            return None, None, None, True, "Missing image"
+        raw = upload.read()
+        camera_id = request.form.get("camera_id") or header_camera or DEFAULT_CAMERA_ID
+        timestamp = request.form.get("timestamp") or header_timestamp
+        binary = True
+    else:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return None, None, None, False, "Invalid JSON payload"
+
+        image_data = payload.get("image")
+        if not image_data:
+            return None, None, None, False, "Missing image"
+
+        raw = decode_base64_bytes(image_data)
+        if not raw:
+            return None, None, None, False, "Invalid image"
+        camera_id = payload.get("camera_id") or header_camera or DEFAULT_CAMERA_ID
+        timestamp = payload.get("timestamp", header_timestamp)
+        binary = False
+
+    try:
+        timestamp = parse_capture_timestamp(timestamp)
+    except ValueError:
+        return None, None, None, binary, "Invalid timestamp"
+    return raw, camera_id, timestamp, binary, None
+
+
+def wants_binary_response(binary_ingest):
+    """
+    Decide whether to answer with raw JPEG bytes instead of JSON.
+
+    Clients opt in with "Accept: image/jpeg". Binary ingest defaults to a
+    binary response unless the client explicitly asks for JSON.
+    """
+    accept = request.accept_mimetypes
+    if accept.quality("image/jpeg") > accept.quality("application/json"):
+        return True
+    if binary_ingest:
+        return "application/json" not in accept.values()
+    return False
 
 
 # -------------------------
@@ -105,83 +255,360 @@ def home():
 
 @app.route("/video_feed")
 def video_feed():
-    return jsonify({
-        "success": False,
-        "error": "Server-side camera disabled. Use /api/process_frame",
-    }), 400
-
-
-@app.route("/api/process_frame", methods=["POST"])
-def process_frame():
-    """
-    Receive a base64 image from frontend camera,
-    run AI detection, return annotated image + stats
     """
-    global latest_frame, latest_stats, last_ingest_time
+    MJPEG stream of the latest annotated frame for a camera (?camera=<id>).
 
-    payload = request.get_json(silent=True)
-    if not isinstance(payload, dict):
-        return jsonify({"success": False, "error": "Invalid JSON payload"}), 400
+    Frames are JPEG-encoded once when processed and the same bytes are sent
+    to every viewer. Viewers that fall behind skip straight to the newest
+    frame; when no new frame arrives the last one is resent as a keepalive.
+    """
+    camera_id = request.args.get("camera", DEFAULT_CAMERA_ID)
+
+    def generate():
+        frame_hub.add_viewer(camera_id)
+        try:
+            last = None
+            while True:
+                after_seq = last.seq if last is not None else 0
+                frame = frame_hub.wait_for_frame(
+                    camera_id, after_seq, timeout=StreamConfig.KEEPALIVE_SECONDS
+                )
+                if frame is not None:
+                    last = frame
+                if last is not None:
+                    yield last.mjpeg_part
+        finally:
+            frame_hub.remove_viewer(camera_id)
+
+    return Response(
+        generate(),
+        mimetype=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    image_data = payload.get("image")
-    if not image_data:
-        return jsonify({"success": False, "error": "Missing image"}), 400
 
-    frame = decode_base64_image(image_data)
+@app.route("/api/snapshot")
+def snapshot():
+    """Latest annotated frame for a camera as a single JPEG"""
+    frame = frame_hub.latest(request.args.get("camera", DEFAULT_CAMERA_ID))
     if frame is None:
-        return jsonify({"success": False, "error": "Invalid image"}), 400
+        return jsonify({"success": False, "error": "No frame available"}), 404
+    return Response(frame.jpeg, mimetype="image/jpeg")
 
-    # -------------------------
-    # AI PIPELINE (safe guarded)
-    # -------------------------
-    try:
-        detection_result = detect_objects(frame, enable_tracking=False)
-    except Exception:
-        detection_result = {"person_count": 0, "detections": []}
 
-    try:
-        gesture_result = detect_hand_gestures(frame)
-    except Exception:
-        gesture_result = {"stable_gesture": None}
+def run_frame(frame, camera_id, annotate=True, timestamp=None):
+    """
+    Run the per-camera AI pipeline on a frame and publish the latest state.
+
+    With annotate=False no overlay is drawn (detections-only clients), unless
+    someone is watching the camera on /video_feed. `timestamp` is the
+    frame's capture time, if the client sent one.
+
+    Returns:
+        (stats, annotated_frame or None, pipeline result)
+    """
+    global latest_stats
 
-    annotated = draw_enhanced_annotations(frame, detection_result)
-    annotated = draw_hand_annotations(annotated, gesture_result)
+    # -------------------------
+    # AI PIPELINE (per camera, safe guarded)
+    # -------------------------
+    pipeline = get_pipeline(camera_id)
+    with pipeline.lock:
+        # The built-in tracker is per camera; yolo.track would share one
+        # tracker across every camera, so it stays off in that mode.
+        result = pipeline.process(
+            frame, enable_tracking=DetectionConfig.TRACKER == "builtin", timestamp=timestamp
+        )
+        annotated = None
+        if annotate or frame_hub.viewer_count(camera_id):
+            annotated = pipeline.annotate(frame, result)
 
     # -------------------------
     # ALERTS
     # -------------------------
-    try:
-        events = process_events(detection_result, gesture_result)
-        if events:
-            trigger_alerts(events)
-        active_alerts = get_active_alerts(max_age_seconds=10)
-    except Exception:
-        active_alerts = []
+    active_alerts = pipeline.get_active_alerts(max_age_seconds=10)
 
     now = datetime.now()
-    last_ingest_time = now
 
-    latest_stats = {
-        "person_count": detection_result.get("person_count", 0),
-        "total_detections": len(detection_result.get("detections", [])),
+    stats = {
+        "camera_id": camera_id,
+        "person_count": result["person_count"],
+        "total_detections": len(result["detection"].get("detections", [])),
         "active_alerts": len(active_alerts),
-        "gesture_detected": gesture_result.get("stable_gesture"),
+        "gesture_detected": result["gesture"].get("stable_gesture"),
+        "stage_ms": {k: round(v, 2) for k, v in result["timings"].items()},
         "timestamp": now.isoformat(),
     }
+    delta = stats_delta(pipeline.latest_stats, stats)
+    pipeline.latest_stats = stats
+    latest_stats = stats
+    if delta:
+        events_stream.publish("stats", delta)
 
-    with frame_lock:
-        latest_frame = annotated.copy()
+    return stats, annotated, result
+
+
+def encode_and_publish(camera_id, annotated):
+    """Encode the annotated frame once; the same bytes serve the response and /video_feed"""
+    if annotated is None:
+        return None
+    jpeg = encode_jpeg(annotated)
+    if jpeg is not None:
+        frame_hub.publish(camera_id, jpeg)
+    return jpeg
+
+
+def frame_response(stats, jpeg, binary):
+    """Build the process_frame response (JSON or raw JPEG + stat headers)"""
+    if jpeg is None:
+        return jsonify({"success": False, "error": "Encoding failed"}), 500
+
+    if binary:
+        response = Response(jpeg, mimetype="image/jpeg")
+        response.headers["X-Camera-Id"] = stats["camera_id"]
+        response.headers["X-Stats"] = json.dumps(stats, separators=(",", ":"))
+        response.headers["X-Alerts"] = str(stats["active_alerts"])
+        return response
+
+    return jsonify({
+        "success": True,
+        "stats": stats,
+        "alerts": stats["active_alerts"],
+        "annotated_image": f"data:image/jpeg;base64,{base64.b64encode(jpeg).decode()}",
+    })
+
+
+def detections_response(stats, detections, packed):
+    """
+    Structured detections without any image: compact JSON rows, or a packed
+    DETECTION_RECORD_DTYPE array (application/octet-stream) with stats in
+    the X-Stats header.
+    """
+    if packed:
+        response = Response(pack_detections(detections), mimetype="application/octet-stream")
+        response.headers["X-Camera-Id"] = stats["camera_id"]
+        response.headers["X-Stats"] = json.dumps(stats, separators=(",", ":"))
+        response.headers["X-Record-Format"] = ",".join(
+            f"{name}:{DETECTION_RECORD_DTYPE.fields[name][0].str}" for name in DETECTION_FIELDS
+        )
+        response.headers["X-Record-Count"] = str(len(detections))
+        return response
 
     return jsonify({
         "success": True,
-        "stats": latest_stats,
-        "alerts": len(active_alerts),
-        "annotated_image": encode_image(annotated),
+        "stats": stats,
+        "fields": DETECTION_FIELDS,
+        "detections": detections_to_rows(detections),
+        "classes": detection_class_names(detections),
+        "stable_gesture": stats["gesture_detected"],
     })
 
 
+def wants_detections_only():
+    """Clients opt out of server-side drawing with ?response=detections or X-Response-Mode"""
+    mode = request.args.get("response") or request.headers.get("X-Response-Mode", "")
+    return mode.lower() == "detections"
+
+
+def wants_packed_detections():
+    accept = request.accept_mimetypes
+    return accept.quality("application/octet-stream") > accept.quality("application/json")
+
+
+def process_frame_job(job):
+    """Job handler: run the pipeline and encode the annotated frame once"""
+    detections_only = job.options.get("detections_only", False)
+    stats, annotated, result = run_frame(
+        job.frame, job.camera_id, annotate=not detections_only, timestamp=job.options.get("timestamp")
+    )
+    jpeg = encode_and_publish(job.camera_id, annotated)
+    if detections_only:
+        return {"stats": stats, "detections": result["detection"].get("detections", [])}
+    return {"stats": stats, "jpeg": jpeg}
+
+
+frame_jobs = FrameJobQueue(process_frame_job)
+admission = AdmissionController()
+QUEUE_DEPTH.set_function(frame_jobs.queue_depth, "frame_jobs")
+QUEUE_DEPTH.set_function(lambda: (get_inference_stats() or {}).get("queue_depth", 0), "inference_batch")
+QUEUE_DEPTH.set_function(lambda: get_alert_dispatcher().queue_depth(), "alert_dispatch")
+
+
+def wants_async():
+    """Clients opt into job mode with ?async=1 or "Prefer: respond-async" """
+    if request.args.get("async", "").lower() in ("1", "true", "yes"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+@app.route("/api/process_frame", methods=["POST"])
+def process_frame():
+    """
+    Receive a frame from the frontend camera (base64 JSON, raw JPEG or
+    multipart), run AI detection, return annotated image + stats.
+
+    JSON clients get the annotated frame as a base64 data URL. Binary
+    clients get image/jpeg bytes with stats in the X-Stats header.
+
+    With ?async=1 (or "Prefer: respond-async") the frame is queued instead
+    and the response is 202 with a job id; fetch the result from
+    /api/jobs/<job_id>.
+
+    With ?response=detections (or "X-Response-Mode: detections") only
+    structured detections are returned and annotation/JPEG encoding is
+    skipped; send "Accept: application/octet-stream" for a packed array.
+    """
+    raw, camera_id, timestamp, binary_ingest, error = read_frame_request()
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    if wants_async():
+        frame = decode_image_bytes(raw)
+        if frame is None:
+            return jsonify({"success": False, "error": "Invalid image"}), 400
+        try:
+            job = frame_jobs.submit(
+                camera_id, frame, detections_only=wants_detections_only(), timestamp=timestamp
+            )
+        except JobQueueFull:
+            response = jsonify({"success": False, "error": "Job queue full"})
+            response.headers["Retry-After"] = "1"
+            return response, 503
+        return jsonify({
+            "success": True,
+            **job.to_dict(),
+            "result_url": f"/api/jobs/{job.id}",
+        }), 202
+
+    # At most one frame in flight and one pending per camera; frames that
+    # are superseded are never decoded.
+    try:
+        with admission.admit(camera_id):
+            frame = decode_image_bytes(raw)
+            if frame is None:
+                return jsonify({"success": False, "error": "Invalid image"}), 400
+
+            if wants_detections_only():
+                stats, annotated, result = run_frame(frame, camera_id, annotate=False, timestamp=timestamp)
+                encode_and_publish(camera_id, annotated)
+                detections = result["detection"].get("detections", [])
+                return detections_response(stats, detections, wants_packed_detections())
+
+            stats, annotated, _ = run_frame(frame, camera_id, timestamp=timestamp)
+            jpeg = encode_and_publish(camera_id, annotated)
+            return frame_response(stats, jpeg, wants_binary_response(binary_ingest))
+    except FrameDropped as dropped:
+        return dropped_response(camera_id, dropped)
+
+
+def dropped_response(camera_id, dropped):
+    """Cheap 429 for a frame rejected by admission control"""
+    response = jsonify({
+        "success": False,
+        "dropped": True,
+        "reason": dropped.reason,
+        "camera_id": camera_id,
+        "retry_after_ms": dropped.retry_after_ms,
+    })
+    # Retry-After only has whole-second resolution; the body carries the
+    # finer-grained suggestion.
+    response.headers["Retry-After"] = str(max(1, round(dropped.retry_after_ms / 1000.0)))
+    return response, 429
+
+
+@app.route("/api/jobs/<job_id>")
+def job_result(job_id):
+    """
+    Fetch (long-poll) an async frame job.
+
+    ?wait=<seconds> blocks until the job finishes or the wait expires.
+    Finished jobs return the same payload as a synchronous process_frame
+    (JSON, or image/jpeg when requested via Accept); unfinished jobs return
+    202 with their status.
+    """
+    wait = request.args.get("wait", 0, type=float)
+    job = frame_jobs.wait(job_id, timeout=wait)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown or expired job"}), 404
+
+    if not job.finished:
+        return jsonify({"success": True, **job.to_dict()}), 202
+    if job.status == JobStatus.FAILED:
+        return jsonify({"success": False, **job.to_dict()}), 500
+
+    if "detections" in job.result:
+        return detections_response(job.result["stats"], job.result["detections"], wants_packed_detections())
+
+    response = frame_response(job.result["stats"], job.result["jpeg"], wants_binary_response(False))
+    if isinstance(response, Response):
+        response.headers["X-Job-Id"] = job.id
+    return response
+
+
+@app.route("/api/jobs")
+def jobs_stats():
+    return jsonify({"success": True, "data": frame_jobs.stats()})
+
+
+@app.route("/api/admission")
+def admission_stats():
+    """Per-camera in-flight/pending state, admitted and dropped counts"""
+    return jsonify({"success": True, "data": admission.stats()})
+
+
+@app.route("/api/qos", methods=["GET", "POST"])
+def qos():
+    """
+    QoS governor state and decision log per camera (?camera= to pick one).
+
+    POST {"camera_id": ..., "latency_budget_ms": ..., "cpu_budget": ...}
+    changes a camera's budget; without camera_id it applies to every live
+    camera and becomes the default for new ones.
+    """
+    camera_id = request.args.get("camera")
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        camera_id = data.get("camera_id")
+        latency_budget_ms = data.get("latency_budget_ms")
+        cpu_budget = data.get("cpu_budget")
+        if camera_id is None:
+            if latency_budget_ms is not None:
+                QosConfig.LATENCY_BUDGET_MS = float(latency_budget_ms)
+            if cpu_budget is not None:
+                QosConfig.CPU_BUDGET = float(cpu_budget)
+
+    pipelines = [p for p in list_pipelines() if p.qos is not None]
+    if camera_id:
+        pipelines = [p for p in pipelines if p.camera_id == camera_id]
+        if not pipelines:
+            return jsonify({"success": False, "error": "Unknown camera or QoS disabled"}), 404
+
+    if request.method == "POST":
+        for p in pipelines:
+            p.qos.set_budget(latency_budget_ms, cpu_budget)
+
+    return jsonify({
+        "success": True,
+        "enabled": QosConfig.ENABLED,
+        "cameras": {p.camera_id: p.qos.snapshot() for p in pipelines},
+    })
+
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus text exposition of stage latencies, frame/alert counters and queue depths"""
+    return Response(render_metrics(), mimetype=CONTENT_TYPE)
+
+
 @app.route("/api/stats")
 def stats():
+    camera_id = request.args.get("camera")
+    if camera_id:
+        pipeline = next((p for p in list_pipelines() if p.camera_id == camera_id), None)
+        if pipeline is None:
+            return jsonify({"success": False, "error": "Unknown camera"}), 404
+        return jsonify({"success": True, "data": pipeline.latest_stats})
+
     return jsonify({
         "success": True,
         "data": {
@@ -191,33 +618,168 @@ def stats():
     })
 
 
+HISTORY_PARAMS = ("start", "end", "cursor", "limit")
+
+
 @app.route("/api/alerts")
 def alerts():
-    active = get_active_alerts(max_age_seconds=60)
+    """
+    Recent alerts (last max_age seconds, from memory), or alert history from
+    the alert store when any of start/end/cursor/limit is given.
+    """
+    store = get_alert_store()
+    if store is not None and any(p in request.args for p in HISTORY_PARAMS):
+        limit = request.args.get("limit")
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return jsonify({"success": False, "error": "limit must be a positive integer"}), 400
+        try:
+            rows, next_cursor = store.query(
+                start=request.args.get("start"),
+                end=request.args.get("end"),
+                alert_type=request.args.get("type"),
+                min_severity=request.args.get("min_severity", type=int),
+                camera_id=request.args.get("camera_id"),
+                limit=limit,
+                cursor=request.args.get("cursor"),
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"Invalid time or cursor: {e}"}), 400
+        return jsonify({
+            "success": True,
+            "count": len(rows),
+            "alerts": rows,
+            "next_cursor": next_cursor,
+        })
+
+    max_age = request.args.get("max_age", 60, type=int)
+    active = get_all_active_alerts(
+        max_age_seconds=max_age,
+        alert_type=request.args.get("type"),
+        min_severity=request.args.get("min_severity", type=int),
+        camera_id=request.args.get("camera_id"),
+    )
     return jsonify({
         "success": True,
         "count": len(active),
-        "alerts": [
-            {
-                "type": a.alert_type,
-                "severity": a.severity,
-                "timestamp": a.timestamp.isoformat(),
-            }
-            for a in active
-        ],
+        "alerts": [a.to_dict() for a in active],
+    })
+
+
+@app.route("/api/alerts/summary")
+def alert_summary():
+    """Per-type alert counts over a time range of the alert history"""
+    store = get_alert_store()
+    if store is None:
+        return jsonify({"success": False, "error": "Alert store disabled"}), 404
+    try:
+        counts = store.aggregate(
+            start=request.args.get("start"),
+            end=request.args.get("end"),
+            min_severity=request.args.get("min_severity", type=int),
+            camera_id=request.args.get("camera_id"),
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Invalid time: {e}"}), 400
+    return jsonify({
+        "success": True,
+        "total": sum(c["count"] for c in counts),
+        "types": counts,
+        "store": store.get_stats(),
+    })
+
+
+@app.route("/api/alerts/sinks")
+def alert_sink_stats():
+    """Delivery statistics of the attached alert sinks"""
+    return jsonify({
+        "success": True,
+        "dispatcher": get_alert_dispatcher().get_stats(),
+        "sinks": get_alert_sink_stats(),
+    })
+
+
+@app.route("/api/stream")
+def stream():
+    """
+    Server-sent event stream for dashboards.
+
+    Events:
+      - snapshot: full per-camera stats and recent alerts, sent on connect
+        and after the client fell behind and its backlog was dropped
+      - stats: changed stat keys for one camera (delta)
+      - alert: each AlertEvent as it is triggered
+    """
+    try:
+        subscription = events_stream.subscribe()
+    except TooManySubscribers:
+        return jsonify({"success": False, "error": "Too many stream clients"}), 503
+
+    def snapshot():
+        cameras = {p.camera_id: p.latest_stats for p in list_pipelines() if p.latest_stats}
+        recent = [a.to_dict() for a in get_all_active_alerts(max_age_seconds=60)]
+        return format_sse("snapshot", {"cameras": cameras, "alerts": recent})
+
+    def generate():
+        try:
+            yield snapshot()
+            while True:
+                message = subscription.next(timeout=StreamConfig.KEEPALIVE_SECONDS)
+                if subscription.take_resync():
+                    yield snapshot()
+                if message is None:
+                    yield b": keepalive\n\n"
+                    continue
+                yield message
+        finally:
+            events_stream.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/inference_stats")
+def inference_stats():
+    """Micro-batching throughput and queueing delay, for tuning"""
+    return jsonify({
+        "success": True,
+        "batching_enabled": DetectionConfig.BATCH_INFERENCE,
+        "data": get_inference_stats(),
     })
 
 
 @app.route("/api/cameras")
 def cameras():
+    pipelines = list_pipelines()
+    if not pipelines:
+        return jsonify({
+            "success": True,
+            "cameras": [
+                {
+                    "id": DEFAULT_CAMERA_ID,
+                    "status": "offline",
+                    "mode": "browser_ingest",
+                }
+            ],
+        })
+
     return jsonify({
         "success": True,
         "cameras": [
             {
-                "id": "cam_001",
-                "status": "online" if ingest_online() else "offline",
+                "id": p.camera_id,
+                "status": "online" if p.idle_seconds() <= 5 else "offline",
                 "mode": "browser_ingest",
+                "frames_processed": p.frames_processed,
             }
+            for p in pipelines
         ],
     })
 
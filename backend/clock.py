@@ -0,0 +1,76 @@
+"""
+Time sources for the detection -> event pipeline.
+
+Everything time-based downstream of a frame (detection timestamps, alert
+timestamps, cooldowns, loitering durations, track-state TTLs, "recent
+alerts" windows) reads the time from the camera's clock instead of the
+wall clock. Live cameras use the wall clock. A pipeline fed recorded
+frames sets its FrameClock to each frame's capture time, so a replay gives
+the same alerts whether it runs in realtime or as fast as the CPU allows.
+
+Work that measures or paces real time stays on the wall clock: stage
+latencies, the QoS governor's load measurements, and alert delivery (the
+dispatcher, sinks and alert sounds). Delivery only hands on events that
+are already stamped, so it never changes what a replay produces; replay.py
+turns sounds off anyway.
+"""
+
+from datetime import datetime
+import time
+
+
+def to_datetime(value):
+    """
+    datetime, epoch seconds or ISO 8601 string -> naive local datetime
+    (the form the clocks report). Raises ValueError for anything else.
+    """
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            value = datetime.fromisoformat(value.strip())
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+    try:
+        return datetime.fromtimestamp(float(value))
+    except (TypeError, OverflowError, OSError) as e:
+        raise ValueError(f"Invalid timestamp: {value!r}") from e
+
+
+class SystemClock:
+    """Wall clock"""
+    def now(self):
+        return datetime.now()
+
+    def time(self):
+        """Current time in epoch seconds"""
+        return time.time()
+
+
+class FrameClock(SystemClock):
+    """
+    Clock driven by frame capture timestamps.
+
+    Follows the wall clock until the first set(); from then on it reports
+    the capture time of the most recent frame.
+    """
+    def __init__(self):
+        self._now = None
+        self._time = None
+
+    def set(self, timestamp):
+        """Advance to a frame's capture time (datetime or epoch seconds)"""
+        self._now = to_datetime(timestamp)
+        self._time = self._now.timestamp()
+
+    def now(self):
+        return self._now if self._now is not None else datetime.now()
+
+    def time(self):
+        return self._time if self._time is not None else time.time()
+
+
+# Shared by the module-level default states
+system_clock = SystemClock()
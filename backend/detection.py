@@ -1,13 +1,20 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from collections import defaultdict, deque
-from datetime import datetime
+from concurrent.futures import Future
 import os
 from pathlib import Path
 import threading
+import time
 
-# Lazy-load YOLO model so the API can boot fast (important for PaaS health checks)
+from detector_backends import DetectorBackend, load_detector
+from metrics import FRAMES_TOTAL, time_stage
+from clock import system_clock
+from track_store import TrackStore
+from tracker import MultiObjectTracker
+from zones import get_zone_map
+
+# Lazy-load the detector so the API can boot fast (important for PaaS health checks)
 _model = None
 _model_lock = threading.Lock()
 
@@ -37,13 +44,19 @@ def _resolve_model_path() -> str:
     return "yolov8n.pt"
 
 
-def _get_model() -> YOLO:
+def _get_model() -> DetectorBackend:
+    """Load the detector backend selected by DetectionConfig.BACKEND / PRECISION"""
     global _model
     if _model is not None:
         return _model
     with _model_lock:
         if _model is None:
-            _model = YOLO(_resolve_model_path())
+            _model = load_detector(
+                DetectionConfig.BACKEND,
+                _resolve_model_path(),
+                DetectionConfig.IMGSZ,
+                DetectionConfig.PRECISION,
+            )
     return _model
 
 # Configuration parameters
@@ -51,6 +64,15 @@ class DetectionConfig:
     """Configuration for detection system"""
     CONF_THRESHOLD = 0.5  # Confidence threshold (0.0 to 1.0)
     IOU_THRESHOLD = 0.45  # NMS IoU threshold
+    
+    # Detector runtime: 'torch' (ultralytics) or 'onnx' (ONNX Runtime, CPU)
+    BACKEND = os.getenv("YOLO_BACKEND", "torch")
+    IMGSZ = int(os.getenv("YOLO_IMGSZ", "640"))  # Inference input size
+    # Tracker behind enable_tracking: 'builtin' (per-camera numpy Kalman/IoU
+    # tracker, see tracker.py) or 'yolo' (ultralytics track(persist=True),
+    # one hidden tracker shared by every caller)
+    TRACKER = os.getenv("YOLO_TRACKER", "builtin")
+    PRECISION = os.getenv("YOLO_PRECISION", "fp32")  # 'fp32' or 'int8' (quantized ONNX, see quantize.py)
     TRACK_HISTORY_LENGTH = 30  # Number of frames to keep in tracking history
     FRAME_SKIP = 1  # Process every Nth frame (1 = no skip)
     MIN_DETECTION_SIZE = 20  # Minimum bounding box size (pixels)
@@ -60,19 +82,185 @@ class DetectionConfig:
     TARGET_CLASSES = [0, 1, 2, 3, 5, 7]  # Focus on people and vehicles
     
     # Motion detection settings
+    MOTION_FILTER = os.getenv("YOLO_MOTION_FILTER", "true").lower() == "true"  # Default pre-filter
+    MOTION_WIDTH = 320  # Motion runs on frames downscaled to this width
+    MOTION_BLUR = 5  # Box blur size on the downscaled frame
+    MOTION_LEARNING_RATE = 0.05  # Running-average background update weight
     MOTION_THRESHOLD = 25  # Pixel difference threshold
-    MIN_MOTION_AREA = 500  # Minimum contour area to consider
+    MIN_MOTION_AREA = 500  # Minimum contour area to consider (full-frame pixels)
+    MOTION_REFRESH_INTERVAL = 30  # Run detection at least every N frames, even without motion
     
     # Zone-based detection (define regions of interest)
     ZONES_ENABLED = False
     ZONES = []  # List of polygons: [[(x1,y1), (x2,y2), ...], ...]
+    
+    # Motion-ROI inference (untracked inference only): run YOLO on padded
+    # crops around motion instead of the full frame
+    ROI_INFERENCE = os.getenv("YOLO_ROI_INFERENCE", "false").lower() == "true"
+    ROI_PADDING = 32  # Pixels added around each motion box
+    ROI_MIN_SIZE = 160  # Minimum crop side, so a partly moving object still fits
+    ROI_MAX_REGIONS = 4  # More crops than this -> full frame
+    ROI_MAX_COVERAGE = 0.5  # Crops covering more of the frame -> full frame
+    ROI_FULL_FRAME_INTERVAL = 30  # Full-frame pass every N processed frames (static objects)
+    
+    # Optical-flow box propagation: between keyframes (FRAME_SKIP > 1, or
+    # motion-filtered frames) move the last detected boxes with sparse
+    # Lucas-Kanade flow instead of returning no detections
+    PROPAGATE_BOXES = os.getenv("YOLO_PROPAGATE_BOXES", "false").lower() == "true"
+    FLOW_SCALE = 0.5  # Flow runs on the frame downscaled by this factor
+    FLOW_POINTS_PER_BOX = 20  # Corners tracked inside each box
+    FLOW_MIN_POINTS = 3  # Fewer surviving points -> box is left where it was
+    FLOW_MAX_ERROR = 1.0  # Max forward-backward error (downscaled pixels)
+    
+    # Cross-request micro-batching (untracked inference only)
+    BATCH_INFERENCE = os.getenv("YOLO_BATCH_INFERENCE", "false").lower() == "true"
+    BATCH_MAX_SIZE = int(os.getenv("YOLO_BATCH_MAX_SIZE", "8"))  # Frames per YOLO call
+    BATCH_MAX_WAIT_MS = float(os.getenv("YOLO_BATCH_MAX_WAIT_MS", "5"))  # Max time to wait for a batch to fill
+
+class MotionDetector:
+    """
+    Cheap motion detection against a running-average background.
+
+    Frames are downscaled to MOTION_WIDTH before any work, the background is
+    an exponential running average (MOTION_LEARNING_RATE) rather than the
+    single previous frame, and every intermediate image lives in buffers
+    allocated once per frame size, so steady-state updates allocate nothing
+    but the contour list.
+    """
+    def __init__(self, width=None):
+        self.width = width
+        self._shape = None
+        self._kernel = np.ones((3, 3), np.uint8)
+
+    def _allocate(self, frame_shape):
+        height, width = frame_shape[:2]
+        small_w = min(width, self.width or DetectionConfig.MOTION_WIDTH)
+        small_h = max(1, int(round(height * small_w / float(width))))
+        self._shape = frame_shape[:2]
+        self._size = (small_w, small_h)
+        self._scale = width / float(small_w)
+        self._small = np.empty((small_h, small_w, 3), np.uint8)
+        self._gray = np.empty((small_h, small_w), np.uint8)
+        self._blurred = np.empty((small_h, small_w), np.uint8)
+        self._background = np.empty((small_h, small_w), np.float32)
+        self._background_u8 = np.empty((small_h, small_w), np.uint8)
+        self._delta = np.empty((small_h, small_w), np.uint8)
+        self.mask = np.zeros((small_h, small_w), np.uint8)
+        self._has_background = False
+
+    def reset(self):
+        self._shape = None
+
+    def update(self, frame):
+        """
+        Feed a frame and compare it to the background.
+
+        Returns:
+            (mask, regions): the downscaled binary motion mask (a buffer
+            reused by the next call) and xyxy bounding boxes of significant
+            motion in frame coordinates; (None, None) while the background
+            is being initialized (first frame, or a new frame size).
+        """
+        if self._shape != frame.shape[:2]:
+            self._allocate(frame.shape)
+
+        cv2.resize(frame, self._size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        blur = DetectionConfig.MOTION_BLUR
+        cv2.blur(self._gray, (blur, blur), dst=self._blurred)
+
+        if not self._has_background:
+            self._background[:] = self._blurred
+            self._has_background = True
+            return None, None
+
+        cv2.convertScaleAbs(self._background, dst=self._background_u8)
+        cv2.absdiff(self._blurred, self._background_u8, dst=self._delta)
+        cv2.threshold(self._delta, DetectionConfig.MOTION_THRESHOLD, 255, cv2.THRESH_BINARY, dst=self.mask)
+        cv2.dilate(self.mask, self._kernel, dst=self.mask, iterations=1)
+        cv2.accumulateWeighted(self._blurred, self._background, DetectionConfig.MOTION_LEARNING_RATE)
+
+        # MIN_MOTION_AREA is in full-frame pixels
+        min_area = DetectionConfig.MIN_MOTION_AREA / (self._scale * self._scale)
+        contours, _ = cv2.findContours(self.mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        regions = []
+        full_h, full_w = self._shape
+        for c in contours:
+            if cv2.contourArea(c) <= min_area:
+                continue
+            x, y, w, h = cv2.boundingRect(c)
+            regions.append((
+                int(x * self._scale), int(y * self._scale),
+                min(full_w, int(np.ceil((x + w) * self._scale))),
+                min(full_h, int(np.ceil((y + h) * self._scale))),
+            ))
+        return self.mask, regions
+
+
+class DetectionHistory:
+    """
+    Class ids and confidences of the most recent detections.
+
+    Kept as per-frame column arrays rather than detection dicts, so
+    recording a frame allocates nothing per detection.
+    """
+    def __init__(self, size=100):
+        self.size = size
+        self._frames = deque()  # (class_ids, scores) per frame, oldest first
+        self._count = 0
 
-# Global variables for tracking
-track_history = defaultdict(lambda: deque(maxlen=DetectionConfig.TRACK_HISTORY_LENGTH))
-detection_history = deque(maxlen=100)  # Store last 100 detections
-frame_counter = 0
-previous_frame = None
-motion_detected_frame = 0
+    def add(self, detections):
+        detections = _as_detections(detections)
+        if not len(detections):
+            return
+        self._frames.append((detections.class_ids, detections.scores))
+        self._count += len(detections)
+        # Drop whole frames that fall entirely outside the last `size`
+        while self._count - len(self._frames[0][0]) >= self.size:
+            self._count -= len(self._frames.popleft()[0])
+
+    def columns(self):
+        """(class_ids, scores) arrays of the last `size` detections, oldest first"""
+        if not self._frames:
+            return np.zeros(0, np.int32), np.zeros(0, np.float32)
+        class_ids = np.concatenate([c for c, _ in self._frames])[-self.size:]
+        scores = np.concatenate([s for _, s in self._frames])[-self.size:]
+        return class_ids, scores
+
+    def __len__(self):
+        return min(self._count, self.size)
+
+
+class DetectionState:
+    """
+    Per-camera detection state (tracking trails, history, motion baseline).
+    `clock` (default: wall clock) timestamps detections and ages tracks.
+    """
+    def __init__(self, clock=None):
+        self.clock = clock or system_clock
+        # Trails per track id, forgotten once a track has not been seen for a while
+        self.track_history = TrackStore(
+            'track_history', lambda: deque(maxlen=DetectionConfig.TRACK_HISTORY_LENGTH),
+            clock=self.clock.time)
+        self.detection_history = DetectionHistory(100)  # Classes / confidences of the last 100 detections
+        self.frame_counter = 0
+        self.motion = MotionDetector()
+        self.frames_since_detection = 0  # Motion-filtered frames since YOLO last ran
+        self.roi_frames_since_full = 0  # ROI-only frames since the last full-frame pass
+        self.tracker = MultiObjectTracker()
+        # Last detections, and for optical-flow propagation the
+        # (downscaled) gray frame they belong to
+        self.last_detections = None
+        self.flow_gray = None
+        # Per-camera overrides of DetectionConfig (set by the QoS governor)
+        self.frame_skip = None
+        self.imgsz = None
+
+
+# Default state, used when no per-camera state is passed (single camera loop)
+default_state = DetectionState()
+track_history = default_state.track_history
+detection_history = default_state.detection_history
 
 # COCO class names
 COCO_CLASSES = {
@@ -83,235 +271,815 @@ COCO_CLASSES = {
 }
 
 
-def detect_motion(frame):
+def detect_motion(frame, state=None):
     """
     Pre-filter using motion detection to save processing power.
     Returns True if motion is detected.
     """
-    global previous_frame, motion_detected_frame
-    
-    if previous_frame is None:
-        previous_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        previous_frame = cv2.GaussianBlur(previous_frame, (21, 21), 0)
-        return True
-    
-    # Convert current frame to grayscale and blur
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (21, 21), 0)
-    
-    # Compute absolute difference
-    frame_delta = cv2.absdiff(previous_frame, gray)
-    thresh = cv2.threshold(frame_delta, DetectionConfig.MOTION_THRESHOLD, 255, cv2.THRESH_BINARY)[1]
-    thresh = cv2.dilate(thresh, None, iterations=2)
-    
-    # Find contours
-    contours, _ = cv2.findContours(thresh.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Check if any contour is large enough
-    motion = any(cv2.contourArea(c) > DetectionConfig.MIN_MOTION_AREA for c in contours)
-    
-    previous_frame = gray
-    return motion
+    state = state or default_state
+    _, regions = state.motion.update(frame)
+    return regions is None or len(regions) > 0
 
 
-def point_in_zone(point, zone):
-    """Check if a point is inside a polygon zone"""
-    return cv2.pointPolygonTest(np.array(zone, dtype=np.int32), point, False) >= 0
+def detect_motion_regions(frame, state=None):
+    """
+    Bounding boxes (x1, y1, x2, y2) of significant motion.
+    Returns None while there is no background yet.
+    """
+    state = state or default_state
+    _, regions = state.motion.update(frame)
+    return regions
 
 
-def filter_detections_by_zone(detections):
-    """Filter detections to only include those in defined zones"""
-    if not DetectionConfig.ZONES_ENABLED or not DetectionConfig.ZONES:
-        return detections
-    
-    filtered = []
-    for det in detections:
-        x1, y1, x2, y2 = det['bbox']
-        center = ((x1 + x2) / 2, (y1 + y2) / 2)
-        
-        # Check if center point is in any zone
-        if any(point_in_zone(center, zone) for zone in DetectionConfig.ZONES):
-            filtered.append(det)
-    
-    return filtered
+def merge_motion_regions(regions, frame_shape, padding=None, min_size=None):
+    """
+    Merge motion boxes into a few padded, non-overlapping regions of interest.
+
+    Each box is padded and grown to at least min_size (so a partially
+    moving person still fits in its crop), then overlapping boxes are
+    merged until none overlap. Boxes are clipped to the frame.
+    """
+    padding = DetectionConfig.ROI_PADDING if padding is None else padding
+    min_size = DetectionConfig.ROI_MIN_SIZE if min_size is None else min_size
+    height, width = frame_shape[:2]
+
+    def expand(box):
+        x1, y1, x2, y2 = box
+        x1, y1, x2, y2 = x1 - padding, y1 - padding, x2 + padding, y2 + padding
+        grow_x = max(0, min_size - (x2 - x1))
+        grow_y = max(0, min_size - (y2 - y1))
+        x1, x2 = x1 - grow_x // 2, x2 + grow_x - grow_x // 2
+        y1, y2 = y1 - grow_y // 2, y2 + grow_y - grow_y // 2
+        return (max(0, x1), max(0, y1), min(width, x2), min(height, y2))
+
+    merged = [expand(box) for box in regions]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for i, other in enumerate(result):
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    result[i] = (
+                        min(box[0], other[0]), min(box[1], other[1]),
+                        max(box[2], other[2]), max(box[3], other[3]),
+                    )
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
+
 
+def _roi_coverage(rois, frame_shape):
+    """Fraction of the frame covered by (non-overlapping) ROIs"""
+    area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in rois)
+    return area / float(frame_shape[0] * frame_shape[1])
 
-def extract_detections(results):
+
+def detect_in_regions(frame, rois, imgsz, timestamp):
     """
-    Extract and filter detections from YOLO results.
-    Returns list of detection dictionaries with enhanced information.
+    Run detection on ROI crops in one batched call.
+
+    The crops run at the smallest stride-aligned input size that fits the
+    largest crop (capped at IMGSZ), so small crops also cost fewer FLOPs.
+
+    Returns:
+        (raw results per crop, detections in frame coordinates)
     """
-    detections = []
-    
-    for result in results:
-        boxes = result.boxes
-        
-        if boxes is None or len(boxes) == 0:
-            continue
-        
-        for i in range(len(boxes)):
-            # Get box coordinates
-            box = boxes.xyxy[i].cpu().numpy()
-            x1, y1, x2, y2 = map(int, box)
-            
-            # Get confidence and class
-            conf = float(boxes.conf[i].cpu().numpy())
-            cls = int(boxes.cls[i].cpu().numpy())
-            
-            # Filter by confidence threshold
-            if conf < DetectionConfig.CONF_THRESHOLD:
-                continue
-            
-            # Filter by target classes
-            if DetectionConfig.TARGET_CLASSES and cls not in DetectionConfig.TARGET_CLASSES:
-                continue
-            
-            # Filter by minimum size
-            width = x2 - x1
-            height = y2 - y1
-            if width < DetectionConfig.MIN_DETECTION_SIZE or height < DetectionConfig.MIN_DETECTION_SIZE:
+    crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in rois]
+    longest = max(max(crop.shape[:2]) for crop in crops)
+    imgsz = min(imgsz or DetectionConfig.IMGSZ, int(np.ceil(longest / 32.0)) * 32)
+
+    results = _get_model()(
+        crops,
+        conf=DetectionConfig.CONF_THRESHOLD,
+        iou=DetectionConfig.IOU_THRESHOLD,
+        imgsz=imgsz,
+        classes=DetectionConfig.TARGET_CLASSES or None,
+        verbose=False
+    )
+
+    detections = Detections.concatenate(
+        [
+            extract_detections([result], timestamp).offset(x1, y1)
+            for (x1, y1, _, _), result in zip(rois, results)
+        ],
+        timestamp,
+    )
+    return results, detections
+
+
+class InferenceScheduler:
+    """
+    Micro-batching YOLO scheduler.
+
+    Frames submitted by concurrent requests/cameras are queued and run through
+    the model in a single batched call, once either BATCH_MAX_SIZE frames are
+    waiting or the oldest frame has waited BATCH_MAX_WAIT_MS. Each caller gets
+    back its own single-frame results list, ready for extract_detections().
+    """
+    def __init__(self, max_batch_size=None, max_wait_ms=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._started_at = time.monotonic()
+        self._batches = 0
+        self._frames = 0
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+        self._inference_time_total = 0.0
+
+    def _batch_limits(self):
+        max_batch = self.max_batch_size or DetectionConfig.BATCH_MAX_SIZE
+        max_wait_ms = self.max_wait_ms if self.max_wait_ms is not None else DetectionConfig.BATCH_MAX_WAIT_MS
+        return max(1, int(max_batch)), max(0.0, max_wait_ms) / 1000.0
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="yolo-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, frame):
+        """Queue a frame for batched inference. Returns a Future of its results list."""
+        future = Future()
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append((frame, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def infer(self, frame, timeout=None):
+        """Blocking helper: submit a frame and wait for its results"""
+        return self.submit(frame).result(timeout=timeout)
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            max_batch, max_wait = self._batch_limits()
+            deadline = self._queue[0][2] + max_wait
+            while len(self._queue) < max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(max_batch, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            frames = [item[0] for item in batch]
+            started = time.monotonic()
+
+            try:
+                results = _get_model()(
+                    frames,
+                    conf=DetectionConfig.CONF_THRESHOLD,
+                    iou=DetectionConfig.IOU_THRESHOLD,
+                    imgsz=DetectionConfig.IMGSZ,
+                    classes=DetectionConfig.TARGET_CLASSES or None,
+                    verbose=False
+                )
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
                 continue
-            
-            # Get track ID if available
-            track_id = None
-            if hasattr(boxes, 'id') and boxes.id is not None:
-                track_id = int(boxes.id[i].cpu().numpy())
-            
-            detection = {
-                'bbox': (x1, y1, x2, y2),
-                'confidence': conf,
-                'class_id': cls,
-                'class_name': COCO_CLASSES.get(cls, f'class_{cls}'),
-                'track_id': track_id,
-                'center': ((x1 + x2) / 2, (y1 + y2) / 2),
-                'area': width * height,
-                'timestamp': datetime.now()
+
+            finished = time.monotonic()
+            with self._cond:
+                self._batches += 1
+                self._frames += len(batch)
+                self._inference_time_total += finished - started
+                for _, _, queued_at in batch:
+                    delay = started - queued_at
+                    self._queue_delay_total += delay
+                    self._queue_delay_max = max(self._queue_delay_max, delay)
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result([result])
+
+    def get_stats(self):
+        """Throughput and queueing statistics for tuning batch size / wait"""
+        with self._cond:
+            elapsed = max(time.monotonic() - self._started_at, 1e-9)
+            batches = self._batches
+            frames = self._frames
+            max_batch, max_wait = self._batch_limits()
+            return {
+                'max_batch_size': max_batch,
+                'max_wait_ms': max_wait * 1000.0,
+                'batches': batches,
+                'frames': frames,
+                'queue_depth': len(self._queue),
+                'avg_batch_size': frames / batches if batches else 0,
+                'throughput_fps': frames / elapsed,
+                'avg_queue_delay_ms': (self._queue_delay_total / frames * 1000.0) if frames else 0,
+                'max_queue_delay_ms': self._queue_delay_max * 1000.0,
+                'avg_batch_inference_ms': (self._inference_time_total / batches * 1000.0) if batches else 0,
             }
-            
-            detections.append(detection)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_inference_scheduler():
+    """Get the process-wide micro-batching scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = InferenceScheduler()
+    return _scheduler
+
+
+def get_inference_stats():
+    """Batching statistics, or None when batching has not been used"""
+    if _scheduler is None:
+        return None
+    return _scheduler.get_stats()
+
+
+class Detections:
+    """
+    Columnar detections for one frame.
+
+    Boxes, scores, classes, track ids, centers and areas are contiguous
+    numpy arrays, so filtering and packing are vectorized. Iterating or
+    indexing yields the familiar detection dicts (built once, on first
+    access), so code written against the list-of-dicts form keeps working.
+    All detections of a frame share one timestamp, the camera's clock time
+    when built by the pipeline (the wall clock otherwise). `propagated`
+    marks boxes carried over from an earlier frame (optical flow or tracker
+    prediction) rather than detected on this one.
+    """
+    def __init__(self, boxes=None, scores=None, class_ids=None, track_ids=None, timestamp=None,
+                 propagated=None):
+        self.boxes = np.zeros((0, 4), np.int32) if boxes is None else np.asarray(boxes, np.int32).reshape(-1, 4)
+        count = len(self.boxes)
+        self.scores = np.zeros(count, np.float32) if scores is None else np.asarray(scores, np.float32)
+        self.class_ids = np.zeros(count, np.int32) if class_ids is None else np.asarray(class_ids, np.int32)
+        # -1 marks an untracked detection
+        self.track_ids = np.full(count, -1, np.int64) if track_ids is None else np.asarray(track_ids, np.int64)
+        self.propagated = np.zeros(count, bool) if propagated is None else np.asarray(propagated, bool)
+        self.timestamp = timestamp or system_clock.now()
+        self.centers = (self.boxes[:, :2] + self.boxes[:, 2:]) / 2.0
+        sizes = self.boxes[:, 2:] - self.boxes[:, :2]
+        self.areas = sizes[:, 0].astype(np.int64) * sizes[:, 1]
+        self._dicts = None
+
+    @classmethod
+    def from_results(cls, results, timestamp=None):
+        """Build from YOLO results with one device-to-host copy per result"""
+        parts = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            # Columns: x1, y1, x2, y2, [track_id,] conf, cls
+            data = np.asarray(boxes.data.cpu().numpy(), dtype=np.float32)
+            tracked = data.shape[1] == 7
+            parts.append(cls(
+                data[:, :4],
+                data[:, -2],
+                data[:, -1],
+                data[:, 4] if tracked else None,
+                timestamp,
+            ))
+        return cls.concatenate(parts, timestamp)
+
+    @classmethod
+    def from_dicts(cls, detections, timestamp=None):
+        """Build from detection dicts (e.g. the output of older callers)"""
+        detections = list(detections)
+        if timestamp is None and detections:
+            timestamp = detections[0].get('timestamp')
+        return cls(
+            [d['bbox'] for d in detections],
+            [d['confidence'] for d in detections],
+            [d['class_id'] for d in detections],
+            [-1 if d['track_id'] is None else d['track_id'] for d in detections],
+            timestamp,
+            [d.get('propagated', False) for d in detections],
+        )
+
+    @classmethod
+    def concatenate(cls, parts, timestamp=None):
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls(timestamp=timestamp)
+        if len(parts) == 1 and timestamp in (None, parts[0].timestamp):
+            return parts[0]
+        return cls(
+            np.concatenate([p.boxes for p in parts]),
+            np.concatenate([p.scores for p in parts]),
+            np.concatenate([p.class_ids for p in parts]),
+            np.concatenate([p.track_ids for p in parts]),
+            timestamp or parts[0].timestamp,
+            np.concatenate([p.propagated for p in parts]),
+        )
+
+    def select(self, mask):
+        """Subset by boolean mask or index array"""
+        return Detections(
+            self.boxes[mask], self.scores[mask], self.class_ids[mask],
+            self.track_ids[mask], self.timestamp, self.propagated[mask],
+        )
+
+    def offset(self, dx, dy):
+        """Shift boxes, e.g. from crop to frame coordinates"""
+        if dx == 0 and dy == 0:
+            return self
+        return Detections(
+            self.boxes + np.array([dx, dy, dx, dy], np.int32), self.scores,
+            self.class_ids, self.track_ids, self.timestamp, self.propagated,
+        )
+
+    def as_propagated(self, boxes=None, timestamp=None):
+        """Copy flagged as propagated, optionally with moved boxes and a new timestamp"""
+        return Detections(
+            self.boxes if boxes is None else boxes, self.scores, self.class_ids,
+            self.track_ids, timestamp or self.timestamp, np.ones(len(self), bool),
+        )
+
+    def filter(self, conf_threshold=None, target_classes=None, min_size=None):
+        """Vectorized confidence, class and minimum-size filtering"""
+        mask = np.ones(len(self), dtype=bool)
+        if conf_threshold is not None:
+            mask &= self.scores >= conf_threshold
+        if target_classes:
+            mask &= np.isin(self.class_ids, target_classes)
+        if min_size:
+            sizes = self.boxes[:, 2:] - self.boxes[:, :2]
+            mask &= (sizes >= min_size).all(axis=1)
+        return self if mask.all() else self.select(mask)
+
+    @property
+    def class_names(self):
+        return [COCO_CLASSES.get(int(c), f'class_{c}') for c in self.class_ids]
+
+    def to_dicts(self):
+        """Detection dicts (bbox, confidence, class_id, class_name, track_id, center, area, timestamp, propagated)"""
+        if self._dicts is None:
+            self._dicts = [
+                {
+                    'bbox': tuple(box),
+                    'confidence': score,
+                    'class_id': class_id,
+                    'class_name': COCO_CLASSES.get(class_id, f'class_{class_id}'),
+                    'track_id': None if track_id < 0 else track_id,
+                    'center': tuple(center),
+                    'area': area,
+                    'timestamp': self.timestamp,
+                    'propagated': propagated,
+                }
+                for box, score, class_id, track_id, center, area, propagated in zip(
+                    self.boxes.tolist(), self.scores.tolist(), self.class_ids.tolist(),
+                    self.track_ids.tolist(), self.centers.tolist(), self.areas.tolist(),
+                    self.propagated.tolist(),
+                )
+            ]
+        return self._dicts
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __iter__(self):
+        return iter(self.to_dicts())
+
+    def __getitem__(self, index):
+        return self.to_dicts()[index]
+
+    def __repr__(self):
+        return f"Detections({len(self)})"
+
+
+def filter_detections_by_zone(detections, frame_shape=None):
+    """
+    Filter detections to only include those in defined zones.
+
+    Centers are looked up in the precompiled zone label map (rebuilt when
+    the zones or frame_shape change) in one vectorized step.
+    """
+    if not DetectionConfig.ZONES_ENABLED or not DetectionConfig.ZONES or not len(detections):
+        return detections
     
-    return detections
+    # Keep detections whose center point is in any zone
+    zone_map = get_zone_map('detection', DetectionConfig.ZONES)
+    return detections.select(zone_map.contains_any(detections.centers, frame_shape))
+
+
+def extract_detections(results, timestamp=None):
+    """
+    Extract and filter detections from YOLO results.
+    Returns a columnar Detections container (iterates as detection dicts).
+    """
+    detections = Detections.from_results(results, timestamp)
+    return detections.filter(
+        DetectionConfig.CONF_THRESHOLD,
+        DetectionConfig.TARGET_CLASSES,
+        DetectionConfig.MIN_DETECTION_SIZE,
+    )
+
+
+# Packed binary record for detections-only responses (little-endian, no padding)
+DETECTION_RECORD_DTYPE = np.dtype([
+    ('x1', '<i4'), ('y1', '<i4'), ('x2', '<i4'), ('y2', '<i4'),
+    ('class_id', '<u2'), ('confidence', '<f4'), ('track_id', '<i4')
+])
+DETECTION_FIELDS = list(DETECTION_RECORD_DTYPE.names)
+
+
+def _as_detections(detections):
+    return detections if isinstance(detections, Detections) else Detections.from_dicts(detections)
+
+
+def detections_to_rows(detections):
+    """Compact row form of detections: [x1, y1, x2, y2, class_id, confidence, track_id]"""
+    detections = _as_detections(detections)
+    return [
+        [*box, class_id, round(score, 4), None if track_id < 0 else track_id]
+        for box, class_id, score, track_id in zip(
+            detections.boxes.tolist(), detections.class_ids.tolist(),
+            detections.scores.tolist(), detections.track_ids.tolist(),
+        )
+    ]
+
+
+def detection_class_names(detections):
+    """{class_id: class_name} for the classes present, from the class_ids column"""
+    detections = _as_detections(detections)
+    return {
+        class_id: COCO_CLASSES.get(class_id, f'class_{class_id}')
+        for class_id in np.unique(detections.class_ids).tolist()
+    }
+
 
+def pack_detections(detections):
+    """Pack detections into DETECTION_RECORD_DTYPE bytes (track_id -1 when untracked)"""
+    detections = _as_detections(detections)
+    records = np.zeros(len(detections), dtype=DETECTION_RECORD_DTYPE)
+    for i, name in enumerate(('x1', 'y1', 'x2', 'y2')):
+        records[name] = detections.boxes[:, i]
+    records['class_id'] = detections.class_ids
+    records['confidence'] = detections.scores
+    records['track_id'] = detections.track_ids
+    return records.tobytes()
 
-def update_tracking_history(detections):
+
+def update_tracking_history(detections, state=None):
     """Update tracking history for tracked objects"""
+    state = state or default_state
     for det in detections:
         if det['track_id'] is not None:
-            track_history[det['track_id']].append(det['center'])
+            state.track_history[det['track_id']].append(det['center'])
 
 
-def get_detection_stats():
+def get_detection_stats(state=None):
     """Get statistics about recent detections"""
-    if not detection_history:
+    state = state or default_state
+    if not state.detection_history:
         return {}
     
+    class_ids, scores = state.detection_history.columns()
     class_counts = defaultdict(int)
-    avg_confidence = []
-    
-    for det in detection_history:
-        class_counts[det['class_name']] += 1
-        avg_confidence.append(det['confidence'])
+    for class_id, count in zip(*(a.tolist() for a in np.unique(class_ids, return_counts=True))):
+        class_counts[COCO_CLASSES.get(class_id, f'class_{class_id}')] += count
     
     return {
-        'total_detections': len(detection_history),
+        'total_detections': len(state.detection_history),
         'class_distribution': dict(class_counts),
-        'avg_confidence': np.mean(avg_confidence) if avg_confidence else 0,
-        'unique_tracks': len(track_history)
+        'avg_confidence': float(scores.mean()) if len(scores) else 0,
+        'unique_tracks': len(state.track_history),  # Live tracks only
+        'evicted_tracks': state.track_history.evicted_ttl + state.track_history.evicted_capacity
     }
 
 
-def detect_objects(frame, enable_tracking=True, enable_motion_filter=False):
+def _track_boxes(tracker, index, frame_shape, timestamp=None):
+    """Detections for tracker-predicted boxes, clipped to the frame"""
+    height, width = frame_shape[:2]
+    boxes = tracker.boxes(index)
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+    return Detections(
+        np.rint(boxes), tracker.scores[index], tracker.class_ids[index],
+        tracker.ids[index], timestamp, np.ones(len(boxes), bool),
+    )
+
+
+def track_detections(detections, frame_shape, state=None, regions=None):
+    """
+    Assign per-camera track ids with the built-in tracker.
+
+    Confirmed tracks outside the ROI crops (ROI mode) were not looked at
+    this frame and are carried along at their predicted position.
+    """
+    state = state or default_state
+    tracker = state.tracker
+    track_ids, coasting = tracker.update(
+        detections.boxes, detections.scores, detections.class_ids, regions)
+    tracked = Detections(
+        detections.boxes, detections.scores, detections.class_ids,
+        track_ids, detections.timestamp,
+    )
+    if len(coasting):
+        tracked = Detections.concatenate(
+            [tracked, _track_boxes(tracker, coasting, frame_shape, detections.timestamp)],
+            detections.timestamp,
+        )
+    return tracked
+
+
+def predict_tracks(frame_shape, state=None, timestamp=None):
+    """Advance the built-in tracker on a frame without detection; returns predicted Detections"""
+    state = state or default_state
+    index = state.tracker.predict_tracks()
+    return _track_boxes(state.tracker, index, frame_shape, timestamp or state.clock.now())
+
+
+def _flow_gray(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    scale = DetectionConfig.FLOW_SCALE
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def propagate_detections(frame, state=None, timestamp=None):
+    """
+    Move the last known boxes to this frame with sparse optical flow.
+
+    Corners are picked inside each box on the previous frame, tracked with
+    pyramidal Lucas-Kanade (forward and backward, dropping inconsistent
+    points), and each box is shifted by its points' median motion and
+    scaled by their median spread change. Boxes without enough good points
+    stay put. Returned detections are flagged as propagated.
+    """
+    state = state or default_state
+    timestamp = timestamp or state.clock.now()
+    previous = state.last_detections
+    gray = _flow_gray(frame)
+    prev_gray = state.flow_gray
+    state.flow_gray = gray
+    if previous is None or not len(previous):
+        return Detections(timestamp=timestamp)
+    if prev_gray is None or prev_gray.shape != gray.shape:
+        state.last_detections = previous.as_propagated(timestamp=timestamp)
+        return state.last_detections
+
+    scale = DetectionConfig.FLOW_SCALE
+    boxes = previous.boxes.astype(np.float32) * scale
+    height, width = gray.shape[:2]
+
+    points, owners = [], []
+    for i, (x1, y1, x2, y2) in enumerate(boxes.astype(np.int32).tolist()):
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+        if x2 - x1 < 4 or y2 - y1 < 4:
+            continue
+        corners = cv2.goodFeaturesToTrack(
+            prev_gray[y1:y2, x1:x2], DetectionConfig.FLOW_POINTS_PER_BOX, 0.01, 3)
+        if corners is None:
+            continue
+        points.append(corners.reshape(-1, 2) + (x1, y1))
+        owners.append(np.full(len(corners), i))
+
+    moved = boxes.copy()
+    if points:
+        p0 = np.concatenate(points).astype(np.float32).reshape(-1, 1, 2)
+        owners = np.concatenate(owners)
+        lk = dict(winSize=(15, 15), maxLevel=2)
+        p1, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, **lk)
+        back, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, p1, None, **lk)
+        error = np.linalg.norm((p0 - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (error < DetectionConfig.FLOW_MAX_ERROR)
+        p0, p1 = p0.reshape(-1, 2), p1.reshape(-1, 2)
+
+        for i in np.unique(owners[good]):
+            mask = good & (owners == i)
+            if mask.sum() < DetectionConfig.FLOW_MIN_POINTS:
+                continue
+            a, b = p0[mask], p1[mask]
+            shift = np.median(b - a, axis=0)
+            spread_a = np.linalg.norm(a - a.mean(axis=0), axis=1)
+            spread_b = np.linalg.norm(b - b.mean(axis=0), axis=1)
+            valid = spread_a > 1e-3
+            factor = float(np.median(spread_b[valid] / spread_a[valid])) if valid.any() else 1.0
+            factor = min(max(factor, 0.8), 1.25)
+
+            x1, y1, x2, y2 = boxes[i]
+            cx, cy = (x1 + x2) / 2 + shift[0], (y1 + y2) / 2 + shift[1]
+            half_w, half_h = (x2 - x1) / 2 * factor, (y2 - y1) / 2 * factor
+            moved[i] = (cx - half_w, cy - half_h, cx + half_w, cy + half_h)
+
+    moved /= scale
+    moved[:, [0, 2]] = moved[:, [0, 2]].clip(0, frame.shape[1])
+    moved[:, [1, 3]] = moved[:, [1, 3]].clip(0, frame.shape[0])
+    state.last_detections = previous.as_propagated(np.rint(moved), timestamp)
+    return state.last_detections
+
+
+def carry_detections(frame, state, builtin_tracking, motion=True, timestamp=None):
+    """
+    Detections for a frame YOLO did not run on (skipped or motion-filtered):
+    the last boxes if nothing moved, optical-flow propagation when enabled,
+    else the built-in tracker's predictions, else nothing.
+    """
+    timestamp = timestamp or state.clock.now()
+    if not motion and state.last_detections is not None:
+        # Nothing moved: the last boxes are still where they were
+        if builtin_tracking:
+            state.tracker.predict_tracks()  # Keep the Kalman filter in step
+        state.last_detections = state.last_detections.as_propagated(timestamp=timestamp)
+        return state.last_detections
+    if DetectionConfig.PROPAGATE_BOXES:
+        if builtin_tracking:
+            state.tracker.predict_tracks()
+        with time_stage('propagation'):
+            return propagate_detections(frame, state, timestamp)
+    if builtin_tracking:
+        return predict_tracks(frame.shape, state, timestamp)
+    return Detections(timestamp=timestamp)
+
+
+def detect_objects(frame, enable_tracking=True, enable_motion_filter=None, state=None):
     """
     Enhanced object detection with multiple improvements:
     - Confidence thresholding
     - Class filtering
     - Object tracking
     - Motion detection pre-filtering
-    - Frame skipping
+    - Motion-ROI cropped inference (DetectionConfig.ROI_INFERENCE)
+    - Frame skipping, with optical-flow box propagation in between
     - Zone-based detection
     - Detection history and statistics
     
     Args:
         frame: Input frame (numpy array)
-        enable_tracking: Whether to enable object tracking (default: True)
-        enable_motion_filter: Whether to use motion detection as pre-filter (default: False)
+        enable_tracking: Whether to enable object tracking (default: True; see DetectionConfig.TRACKER)
+        enable_motion_filter: Whether to use motion detection as pre-filter
+            (default: DetectionConfig.MOTION_FILTER)
+        state: Per-camera DetectionState (default: module-level default state)
     
     Returns:
         Dictionary containing:
         - 'results': Raw YOLO results
-        - 'detections': List of filtered detection dictionaries
+        - 'detections': Filtered Detections (iterates as detection dicts)
         - 'stats': Detection statistics
         - 'motion_detected': Whether motion was detected (if enabled)
+        - 'rois': Crops inference ran on, or None for a full-frame pass
+        - 'propagated': Whether the detections were carried over from an
+          earlier frame instead of detected on this one
+        - 'frame_shape': (height, width) of the frame, for zone lookups
+        - 'timestamp': Frame time from the state's clock (capture time in replays)
     """
-    global frame_counter, detection_history
+    state = state or default_state
+    timestamp = state.clock.now()
+    if enable_motion_filter is None:
+        enable_motion_filter = DetectionConfig.MOTION_FILTER
     
-    frame_counter += 1
+    state.frame_counter += 1
+    frame_skip = state.frame_skip or DetectionConfig.FRAME_SKIP
+    imgsz = state.imgsz or DetectionConfig.IMGSZ
+    builtin_tracking = enable_tracking and DetectionConfig.TRACKER == 'builtin'
     
-    # Frame skipping optimization
-    if frame_counter % DetectionConfig.FRAME_SKIP != 0:
+    # Frame skipping optimization (boxes are propagated or predicted, so
+    # objects keep their boxes and ids on skipped frames)
+    if state.frame_counter % frame_skip != 0:
+        FRAMES_TOTAL.inc('skipped')
+        detections = carry_detections(frame, state, builtin_tracking, timestamp=timestamp)
         return {
             'results': None,
-            'detections': [],
-            'stats': get_detection_stats(),
+            'detections': detections,
+            'stats': get_detection_stats(state),
             'motion_detected': None,
-            'skipped': True
+            'rois': None,
+            'propagated': len(detections) > 0,
+            'skipped': True,
+            'frame_shape': frame.shape[:2],
+            'timestamp': timestamp
         }
     
-    # Motion detection pre-filter
+    # Motion-ROI mode needs the motion regions, not just a yes/no. yolo.track
+    # needs the whole frame every time, so ROI mode only applies untracked or
+    # with the built-in tracker.
+    use_rois = DetectionConfig.ROI_INFERENCE and (builtin_tracking or not enable_tracking)
+    rois = None
     motion_detected = True
-    if enable_motion_filter:
-        motion_detected = detect_motion(frame)
-        if not motion_detected:
-            return {
-                'results': None,
-                'detections': [],
-                'stats': get_detection_stats(),
-                'motion_detected': False,
-                'skipped': False
-            }
+    if use_rois:
+        regions = detect_motion_regions(frame, state)
+        motion_detected = regions is None or len(regions) > 0
+        state.roi_frames_since_full += 1
+        if regions is not None and state.roi_frames_since_full < DetectionConfig.ROI_FULL_FRAME_INTERVAL:
+            rois = merge_motion_regions(regions, frame.shape)
+            if (len(rois) > DetectionConfig.ROI_MAX_REGIONS
+                    or _roi_coverage(rois, frame.shape) > DetectionConfig.ROI_MAX_COVERAGE):
+                rois = None  # Cropping would not save much; run the full frame
+        if rois is None:
+            state.roi_frames_since_full = 0
+    elif enable_motion_filter:
+        motion_detected = detect_motion(frame, state)
+    
+    # Motion detection pre-filter (an empty ROI list also means nothing moved).
+    # A full detection still runs every MOTION_REFRESH_INTERVAL frames, and
+    # on every frame while built-in tracks wait for confirmation: tracks are
+    # only confirmed on detection frames, so someone who stops moving would
+    # otherwise get no track id (and no loitering timer) until the refresh.
+    refresh_due = (state.frames_since_detection >= DetectionConfig.MOTION_REFRESH_INTERVAL
+                   or (builtin_tracking and state.tracker.has_tentative))
+    if ((enable_motion_filter and not motion_detected) or rois == []) and not refresh_due:
+        state.frames_since_detection += 1
+        FRAMES_TOTAL.inc('motion_filtered')
+        detections = carry_detections(frame, state, builtin_tracking, motion=False, timestamp=timestamp)
+        return {
+            'results': None,
+            'detections': detections,
+            'stats': get_detection_stats(state),
+            'motion_detected': False,
+            'rois': [],
+            'propagated': len(detections) > 0,
+            'skipped': False,
+            'frame_shape': frame.shape[:2],
+            'timestamp': timestamp
+        }
     
-    yolo = _get_model()
-
     # Run YOLO detection with tracking if enabled
-    if enable_tracking:
-        results = yolo.track(
-            frame,
-            conf=DetectionConfig.CONF_THRESHOLD,
-            iou=DetectionConfig.IOU_THRESHOLD,
-            persist=True,
-            verbose=False
-        )
-    else:
-        results = yolo(
-            frame,
-            conf=DetectionConfig.CONF_THRESHOLD,
-            iou=DetectionConfig.IOU_THRESHOLD,
-            verbose=False
-        )
+    with time_stage('inference'):
+        if rois:
+            results, detections = detect_in_regions(frame, rois, imgsz, timestamp)
+        elif enable_tracking and not builtin_tracking:
+            results = _get_model().track(
+                frame,
+                conf=DetectionConfig.CONF_THRESHOLD,
+                iou=DetectionConfig.IOU_THRESHOLD,
+                imgsz=imgsz,
+                classes=DetectionConfig.TARGET_CLASSES or None,
+                persist=True,
+                verbose=False
+            )
+        elif DetectionConfig.BATCH_INFERENCE and imgsz == DetectionConfig.IMGSZ:
+            # Share one batched YOLO call with other concurrent requests
+            results = get_inference_scheduler().infer(frame)
+        else:
+            results = _get_model()(
+                frame,
+                conf=DetectionConfig.CONF_THRESHOLD,
+                iou=DetectionConfig.IOU_THRESHOLD,
+                imgsz=imgsz,
+                classes=DetectionConfig.TARGET_CLASSES or None,
+                verbose=False
+            )
     
-    # Extract and filter detections
-    detections = extract_detections(results)
+    # Extract and filter detections (ROI crops were extracted per crop)
+    if not rois:
+        with time_stage('extract_detections'):
+            detections = extract_detections(results, timestamp)
+    FRAMES_TOTAL.inc('roi' if rois else 'processed')
     
     # Apply zone filtering if enabled
-    detections = filter_detections_by_zone(detections)
+    detections = filter_detections_by_zone(detections, frame.shape)
+    
+    if builtin_tracking:
+        with time_stage('tracking'):
+            detections = track_detections(detections, frame.shape, state, rois)
     
     # Update tracking history
     if enable_tracking:
-        update_tracking_history(detections)
+        update_tracking_history(detections, state)
     
     # Update detection history
-    detection_history.extend(detections)
+    state.detection_history.add(detections)
+    
+    # Keyframe for frames without detection (motion-filtered / propagated)
+    state.frames_since_detection = 0
+    state.last_detections = detections
+    if DetectionConfig.PROPAGATE_BOXES:
+        state.flow_gray = _flow_gray(frame)
     
     return {
         'results': results,
         'detections': detections,
-        'stats': get_detection_stats(),
+        'stats': get_detection_stats(state),
         'motion_detected': motion_detected,
-        'skipped': False
+        'rois': rois,
+        'propagated': False,
+        'skipped': False,
+        'frame_shape': frame.shape[:2],
+        'timestamp': timestamp
     }
 
 
-def draw_enhanced_annotations(frame, detection_result):
+def draw_enhanced_annotations(frame, detection_result, state=None):
     """
     Draw enhanced annotations on frame including:
     - Bounding boxes with labels
@@ -319,9 +1087,11 @@ def draw_enhanced_annotations(frame, detection_result):
     - Zone boundaries
     - Statistics overlay
     """
+    state = state or default_state
     annotated_frame = frame.copy()
     
-    if detection_result['skipped'] or not detection_result['detections']:
+    # Skipped frames still carry propagated/predicted boxes when enabled
+    if not detection_result['detections']:
         return annotated_frame
     
     # Draw zones if enabled
@@ -340,8 +1110,8 @@ def draw_enhanced_annotations(frame, detection_result):
         # Color based on class
         color = (0, 255, 0) if class_name == 'person' else (255, 0, 0)
         
-        # Draw bounding box
-        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
+        # Draw bounding box (thin for propagated boxes)
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 1 if det.get('propagated') else 2)
         
         # Create label
         label = f"{class_name} {conf:.2f}"
@@ -354,8 +1124,8 @@ def draw_enhanced_annotations(frame, detection_result):
         cv2.putText(annotated_frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
         
         # Draw tracking trail
-        if track_id is not None and track_id in track_history:
-            points = track_history[track_id]
+        points = state.track_history.get(track_id) if track_id is not None else None
+        if points:
             if len(points) > 1:
                 pts = np.array(points, dtype=np.int32).reshape((-1, 1, 2))
                 cv2.polylines(annotated_frame, [pts], False, color, 2)
@@ -373,7 +1143,8 @@ def draw_enhanced_annotations(frame, detection_result):
 
 
 def configure_detection(conf_threshold=None, target_classes=None, frame_skip=None, 
-                       zones=None, enable_zones=None):
+                       zones=None, enable_zones=None, batch_inference=None,
+                       batch_max_size=None, batch_max_wait_ms=None, roi_inference=None):
     """
     Configure detection parameters at runtime.
     
@@ -383,6 +1154,10 @@ def configure_detection(conf_threshold=None, target_classes=None, frame_skip=Non
         frame_skip: Process every Nth frame
         zones: List of polygon zones
         enable_zones: Enable/disable zone filtering
+        batch_inference: Enable/disable cross-request micro-batching
+        batch_max_size: Maximum frames per batched YOLO call
+        batch_max_wait_ms: Maximum time a frame waits for its batch to fill
+        roi_inference: Enable/disable motion-ROI cropped inference
     """
     if conf_threshold is not None:
         DetectionConfig.CONF_THRESHOLD = conf_threshold
@@ -392,5 +1167,14 @@ def configure_detection(conf_threshold=None, target_classes=None, frame_skip=Non
         DetectionConfig.FRAME_SKIP = frame_skip
     if zones is not None:
         DetectionConfig.ZONES = zones
+        get_zone_map('detection', zones)  # Compile now, not on the next frame
     if enable_zones is not None:
-        DetectionConfig.ZONES_ENABLED = enable_zones
\ No newline at end of file
+        DetectionConfig.ZONES_ENABLED = enable_zones
+    if batch_inference is not None:
+        DetectionConfig.BATCH_INFERENCE = batch_inference
+    if batch_max_size is not None:
+        DetectionConfig.BATCH_MAX_SIZE = batch_max_size
+    if batch_max_wait_ms is not None:
+        DetectionConfig.BATCH_MAX_WAIT_MS = batch_max_wait_ms
+    if roi_inference is not None:
+        DetectionConfig.ROI_INFERENCE = roi_inference
@@ -0,0 +1,413 @@
+"""
+Pluggable object detector backends.
+
+Every backend is called like an ultralytics YOLO model:
+
+    results = backend(frame_or_list_of_frames, conf=..., iou=..., verbose=False)
+
+and returns a list of result objects whose `.boxes` expose `xyxy`, `conf`,
+`cls`, `id` and `data` supporting `.cpu().numpy()`, so extract_detections()
+works unchanged regardless of the runtime behind it.
+
+Backends:
+  - torch: ultralytics YOLO (default)
+  - onnx:  exported YOLOv8 ONNX model on ONNX Runtime (CPU, or OpenVINO via
+           ONNX_PROVIDERS=OpenVINOExecutionProvider,CPUExecutionProvider)
+
+Precision (onnx only): 'fp32' or 'int8'. The INT8 model is produced from
+the fp32 export by quantize.py using a folder of calibration frames.
+
+Run `python detector_backends.py --parity <frames_dir>` to compare the ONNX
+backend against the torch backend on a folder of images.
+"""
+
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from tracker import iou_matrix
+
+
+class HostArray(np.ndarray):
+    """numpy array that answers .cpu()/.numpy() like a torch tensor"""
+    def __getitem__(self, key):
+        item = super().__getitem__(key)
+        if not isinstance(item, np.ndarray):
+            item = np.asarray(item).view(HostArray)
+        return item
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return np.asarray(self)
+
+
+def _host(array):
+    return np.ascontiguousarray(array).view(HostArray)
+
+
+class HostBoxes:
+    """Detections for one image in the same layout as ultralytics Boxes"""
+    def __init__(self, xyxy, conf, cls, track_ids=None):
+        columns = [xyxy]
+        if track_ids is not None:
+            columns.append(track_ids[:, None])
+        columns.extend([conf[:, None], cls[:, None]])
+        self.data = _host(np.concatenate(columns, axis=1).astype(np.float32))
+        self.xyxy = _host(xyxy.astype(np.float32))
+        self.conf = _host(conf.astype(np.float32))
+        self.cls = _host(cls.astype(np.float32))
+        self.id = _host(track_ids.astype(np.float32)) if track_ids is not None else None
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class HostResult:
+    """Minimal stand-in for an ultralytics Results object"""
+    def __init__(self, boxes, orig_shape):
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+
+
+class DetectorBackend:
+    """Interface for detector runtimes"""
+    name = "base"
+
+    def __call__(self, source, conf=0.25, iou=0.45, imgsz=None, verbose=False, **kwargs):
+        raise NotImplementedError
+
+    def track(self, source, **kwargs):
+        """Runtimes without a built-in tracker return plain detections"""
+        return self(source, **kwargs)
+
+
+class TorchBackend(DetectorBackend):
+    """ultralytics YOLO on PyTorch"""
+    name = "torch"
+
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+
+    def __call__(self, source, **kwargs):
+        return self.model(source, **kwargs)
+
+    def track(self, source, **kwargs):
+        return self.model.track(source, **kwargs)
+
+
+def letterbox(frame, size, stride=None, color=(114, 114, 114)):
+    """
+    Resize keeping aspect ratio and pad, as ultralytics' LetterBox does.
+
+    With stride=None the result is size x size (static exports). With a
+    stride the padding is only up to the next multiple of it (the minimal
+    rectangle the torch path uses), e.g. 640x480 stays 640x480.
+
+    Returns:
+        (padded_image, gain, (pad_left, pad_top))
+    """
+    h, w = frame.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    pad_x, pad_y = size - new_w, size - new_h
+    if stride:
+        pad_x, pad_y = pad_x % stride, pad_y % stride
+    pad_x, pad_y = pad_x / 2, pad_y / 2
+
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    padded = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return padded, gain, (left, top)
+
+
+def non_max_suppression(boxes, scores, classes, iou_threshold, max_det=300):
+    """Class-aware NMS (boxes of different classes never suppress each other)"""
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Offset boxes per class, as ultralytics does, so one NMS pass is class-aware
+    offset = classes[:, None].astype(np.float32) * 7680.0
+    shifted = boxes + offset
+    xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+    keep = cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), 0.0, iou_threshold, top_k=max_det)
+    return np.asarray(keep, dtype=np.int64).reshape(-1)[:max_det]
+
+
+class OnnxBackend(DetectorBackend):
+    """Exported YOLOv8 detector on ONNX Runtime"""
+    name = "onnx"
+
+    def __init__(self, model_path, providers=None, imgsz=640):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = providers or ["CPUExecutionProvider"]
+        available = set(ort.get_available_providers())
+        providers = [p for p in providers if p in available] or ["CPUExecutionProvider"]
+
+        self.session = ort.InferenceSession(str(model_path), options, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch_dim, _, height, _ = model_input.shape
+        # Static exports fix the input size; dynamic ones accept any multiple of 32
+        self.fixed_size = height if isinstance(height, int) else None
+        self.dynamic_batch = not isinstance(batch_dim, int)
+        self.imgsz = self.fixed_size or imgsz
+
+    def preprocess(self, frame, size):
+        stride = None if self.fixed_size else 32
+        padded, gain, pad = letterbox(frame, size, stride)
+        blob = cv2.dnn.blobFromImage(padded, 1 / 255.0, swapRB=True)  # BGR->RGB, HWC->NCHW
+        return blob, gain, pad
+
+    def postprocess(self, output, gain, pad, orig_shape, conf, iou, classes=None, max_det=300):
+        """output: (4 + num_classes, anchors) raw YOLOv8 head for one image"""
+        predictions = output.T
+        class_scores = predictions[:, 4:]
+        if classes:
+            keep_classes = np.asarray([c for c in classes if c < class_scores.shape[1]], dtype=np.int64)
+            class_scores = class_scores[:, keep_classes]
+        else:
+            keep_classes = None
+
+        best = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(best)), best]
+        mask = scores > conf
+        predictions, scores, best = predictions[mask], scores[mask], best[mask]
+        cls = keep_classes[best] if keep_classes is not None else best
+
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+        keep = non_max_suppression(boxes, scores, cls, iou, max_det)
+        boxes, scores, cls = boxes[keep], scores[keep], cls[keep]
+
+        # Undo letterbox and clip to the original frame
+        boxes[:, [0, 2]] -= pad[0]
+        boxes[:, [1, 3]] -= pad[1]
+        boxes /= gain
+        height, width = orig_shape[:2]
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+
+        return HostResult(HostBoxes(boxes, scores, cls.astype(np.float32)), orig_shape)
+
+    def __call__(self, source, conf=0.25, iou=0.45, imgsz=None, verbose=False,
+                 classes=None, max_det=300, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        size = self.fixed_size or imgsz or self.imgsz
+        prepared = [self.preprocess(frame, size) for frame in frames]
+
+        # With a dynamic export, frames (or ROI crops) of different sizes
+        # letterbox to different shapes and yield different anchor counts,
+        # so outputs are kept per frame and only same-shape blobs are batched.
+        outputs = [None] * len(prepared)
+        groups = {}
+        for i, (blob, _, _) in enumerate(prepared):
+            groups.setdefault(blob.shape, []).append(i)
+        for indices in groups.values():
+            if self.dynamic_batch and len(indices) > 1:
+                batch = np.concatenate([prepared[i][0] for i in indices], axis=0)
+                for i, output in zip(indices, self.session.run(None, {self.input_name: batch})[0]):
+                    outputs[i] = output
+            else:
+                for i in indices:
+                    outputs[i] = self.session.run(None, {self.input_name: prepared[i][0]})[0][0]
+
+        return [
+            self.postprocess(output, gain, pad, frame.shape, conf, iou, classes, max_det)
+            for output, (_, gain, pad), frame in zip(outputs, prepared, frames)
+        ]
+
+
+def resolve_onnx_path(model_path, imgsz=640):
+    """
+    Find the ONNX model for a torch checkpoint.
+
+    Priority:
+      1) YOLO_ONNX_PATH env var
+      2) model_path itself if it is already .onnx
+      3) <model_path>.onnx next to the checkpoint, exported on first use
+    """
+    env_path = os.getenv("YOLO_ONNX_PATH")
+    if env_path:
+        return env_path
+
+    path = Path(model_path)
+    if path.suffix == ".onnx":
+        return str(path)
+
+    onnx_path = path.with_suffix(".onnx")
+    if not onnx_path.exists():
+        from ultralytics import YOLO
+        print(f"Exporting {path} to ONNX (one-time)...")
+        exported = YOLO(str(path)).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        return str(exported)
+    return str(onnx_path)
+
+
+def resolve_int8_path(onnx_path):
+    """INT8 model for an fp32 ONNX model: YOLO_INT8_PATH or <model>.int8.onnx"""
+    env_path = os.getenv("YOLO_INT8_PATH")
+    if env_path:
+        return env_path
+    path = Path(onnx_path)
+    return str(path.with_name(f"{path.stem}.int8.onnx"))
+
+
+def load_detector(backend, model_path, imgsz=640, precision="fp32"):
+    """
+    Create the detector backend selected by name ('torch' or 'onnx').
+
+    precision='int8' always runs on ONNX Runtime, since the quantized model
+    only exists as ONNX.
+    """
+    backend = (backend or "torch").lower()
+    precision = (precision or "fp32").lower()
+    if precision not in ("fp32", "int8"):
+        raise ValueError(f"Unknown detector precision: {precision}")
+    if precision == "int8" and backend != "onnx":
+        print(f"YOLO_PRECISION=int8 requires the onnx backend, using it instead of {backend}")
+        backend = "onnx"
+
+    if backend == "torch":
+        return TorchBackend(model_path)
+    if backend == "onnx":
+        providers = [p.strip() for p in os.getenv("ONNX_PROVIDERS", "").split(",") if p.strip()]
+        onnx_path = resolve_onnx_path(model_path, imgsz)
+        if precision == "int8":
+            onnx_path = resolve_int8_path(onnx_path)
+            if not Path(onnx_path).exists():
+                raise FileNotFoundError(
+                    f"INT8 model {onnx_path} not found; create it with "
+                    f"`python quantize.py --calibration <frames_dir>`"
+                )
+        return OnnxBackend(onnx_path, providers=providers, imgsz=imgsz)
+    raise ValueError(f"Unknown detector backend: {backend}")
+
+
+# -------------------------
+# PARITY CHECK
+# -------------------------
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """
+    Greedily match two detection lists (same class, IoU >= threshold).
+
+    Returns:
+        (matches, reference_count, candidate_count, mean_iou)
+    """
+    if not reference or not candidate:
+        return 0, len(reference), len(candidate), 0.0
+
+    ref_boxes = np.array([d['bbox'] for d in reference], dtype=np.float32)
+    cand_boxes = np.array([d['bbox'] for d in candidate], dtype=np.float32)
+    ious = iou_matrix(ref_boxes, cand_boxes)
+    same_class = (
+        np.array([d['class_id'] for d in reference])[:, None]
+        == np.array([d['class_id'] for d in candidate])[None, :]
+    )
+    ious = np.where(same_class, ious, 0.0)
+
+    matched_ious = []
+    while True:
+        i, j = np.unravel_index(np.argmax(ious), ious.shape)
+        if ious[i, j] < iou_threshold:
+            break
+        matched_ious.append(float(ious[i, j]))
+        ious[i, :] = 0
+        ious[:, j] = 0
+
+    mean_iou = float(np.mean(matched_ious)) if matched_ious else 0.0
+    return len(matched_ious), len(reference), len(candidate), mean_iou
+
+
+def agreement_report(reference_runs, candidate_runs, iou_threshold=0.5):
+    """Aggregate precision/recall of candidate detections against a reference"""
+    matches = ref_total = cand_total = 0
+    ious = []
+    for reference, candidate in zip(reference_runs, candidate_runs):
+        m, r, c, mean_iou = match_detections(reference, candidate, iou_threshold)
+        matches += m
+        ref_total += r
+        cand_total += c
+        if m:
+            ious.append(mean_iou)
+    return {
+        'frames': len(reference_runs),
+        'reference_detections': ref_total,
+        'candidate_detections': cand_total,
+        'matched': matches,
+        'recall': matches / ref_total if ref_total else 1.0,
+        'precision': matches / cand_total if cand_total else 1.0,
+        'mean_iou': float(np.mean(ious)) if ious else 0.0,
+    }
+
+
+def load_frames(folder, limit=None):
+    """Read images from a folder (sorted by name)"""
+    paths = sorted(
+        p for p in Path(folder).iterdir()
+        if p.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp")
+    )
+    frames = []
+    for path in paths[:limit]:
+        frame = cv2.imread(str(path))
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+
+def run_detections(backend, frames):
+    """Run a backend over frames through the normal extraction/filter path"""
+    from detection import DetectionConfig, extract_detections
+    return [
+        extract_detections(backend(
+            frame,
+            conf=DetectionConfig.CONF_THRESHOLD,
+            iou=DetectionConfig.IOU_THRESHOLD,
+            imgsz=DetectionConfig.IMGSZ,
+            classes=DetectionConfig.TARGET_CLASSES or None,
+            verbose=False,
+        ))
+        for frame in frames
+    ]
+
+
+def compare_backends(frames, reference, candidate, iou_threshold=0.5):
+    """Agreement of `candidate` with `reference` on the same frames"""
+    return agreement_report(
+        run_detections(reference, frames),
+        run_detections(candidate, frames),
+        iou_threshold,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from detection import DetectionConfig, _resolve_model_path
+
+    parser = argparse.ArgumentParser(description="Compare the ONNX backend against torch")
+    parser.add_argument("--parity", required=True, metavar="FRAMES_DIR")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    args = parser.parse_args()
+
+    frames = load_frames(args.parity, args.limit)
+    model_path = _resolve_model_path()
+    report = compare_backends(
+        frames,
+        load_detector("torch", model_path),
+        load_detector("onnx", model_path, DetectionConfig.IMGSZ),
+    )
+    print(json.dumps(report, indent=2))
+    ok = report['recall'] >= args.min_recall and report['precision'] >= args.min_recall
+    raise SystemExit(0 if ok else 1)
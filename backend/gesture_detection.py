@@ -1,13 +1,22 @@
 import cv2
 import numpy as np
 from collections import deque
-from datetime import datetime
+
+from clock import system_clock
 
 # Simplified gesture detection without mediapipe.solutions
 # This version works with OpenCV only
 
-# Gesture history for stability
-gesture_history = deque(maxlen=10)  # Last 10 frames
+class GestureState:
+    """Per-camera gesture state (voting history for stability; `clock` timestamps gestures)"""
+    def __init__(self, clock=None):
+        self.gesture_history = deque(maxlen=10)  # Last 10 frames
+        self.clock = clock or system_clock
+
+
+# Default state, used when no per-camera state is passed (single camera loop)
+default_state = GestureState()
+gesture_history = default_state.gesture_history
 
 
 class GestureType:
@@ -22,17 +31,19 @@ class GestureType:
 
 
 # Color-based hand detection
-def detect_hand_gestures(frame):
+def detect_hand_gestures(frame, state=None):
     """
     Detect hand gestures using color-based detection
     No longer requires mediapipe.solutions
     
     Args:
         frame: Input frame (BGR format)
+        state: Per-camera GestureState (default: module-level default state)
         
     Returns:
         Dictionary containing gesture detection results
     """
+    state = state or default_state
     detected_gestures = []
     gesture_type = GestureType.NONE
     
@@ -114,12 +125,12 @@ def detect_hand_gestures(frame):
                             pass
     
     # Add to history for stability
-    gesture_history.append(gesture_type)
+    state.gesture_history.append(gesture_type)
     
     # Check if gesture is stable
     stable_gesture = None
-    if len(gesture_history) >= 5:
-        recent_gestures = list(gesture_history)[-5:]
+    if len(state.gesture_history) >= 5:
+        recent_gestures = list(state.gesture_history)[-5:]
         if recent_gestures.count(GestureType.SOS) >= 3:
             stable_gesture = GestureType.SOS
         elif recent_gestures.count(GestureType.HELP) >= 3:
@@ -132,7 +143,7 @@ def detect_hand_gestures(frame):
             'type': stable_gesture,
             'hand': 'Detected',
             'landmarks': None,
-            'timestamp': datetime.now()
+            'timestamp': state.clock.now()
         })
     
     return {
@@ -0,0 +1,185 @@
+"""
+Asynchronous frame processing jobs.
+
+Frames are submitted to a bounded queue and processed by a fixed pool of
+worker threads, so HTTP concurrency is decoupled from inference capacity:
+the submitting request returns a job id immediately and the client fetches
+the result later by long-polling.
+
+Each camera's jobs always go to the same worker, so frames of one camera
+are processed in submission order. Tracking, motion baselines, loitering
+timers and cooldowns depend on that order.
+"""
+
+from collections import deque
+import os
+import queue
+import threading
+import time
+import uuid
+
+
+class JobConfig:
+    """Configuration for asynchronous frame jobs"""
+    WORKERS = int(os.getenv("FRAME_JOB_WORKERS", "2"))  # Inference worker threads
+    QUEUE_SIZE = int(os.getenv("FRAME_JOB_QUEUE_SIZE", "32"))  # Max queued (not yet running) jobs
+    RESULT_TTL = 60  # Seconds a finished job is kept for fetching
+    MAX_WAIT = 30  # Longest long-poll a client may request (seconds)
+
+
+class JobStatus:
+    """Lifecycle states of a frame job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class FrameJob:
+    """A single frame submitted for asynchronous processing"""
+    def __init__(self, camera_id, frame, options=None):
+        self.id = uuid.uuid4().hex
+        self.camera_id = camera_id
+        self.frame = frame
+        self.options = options or {}
+        self.status = JobStatus.QUEUED
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        data = {
+            "job_id": self.id,
+            "camera_id": self.camera_id,
+            "status": self.status,
+        }
+        if self.started_at is not None:
+            data["queue_ms"] = round((self.started_at - self.submitted_at) * 1000.0, 2)
+        if self.finished_at is not None:
+            data["processing_ms"] = round((self.finished_at - self.started_at) * 1000.0, 2)
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class FrameJobQueue:
+    """
+    Bounded job queue served by a fixed pool of worker threads.
+
+    Every worker has its own FIFO and a camera's jobs are routed by
+    hash(camera_id), so one camera never has two frames running at once
+    and its frames never overtake each other. queue_size bounds the total
+    across workers.
+
+    Args:
+        handler: Callable taking a FrameJob and returning its result
+        workers: Number of worker threads
+        queue_size: Maximum number of jobs waiting to run
+    """
+    def __init__(self, handler, workers=None, queue_size=None):
+        self.handler = handler
+        self.workers = workers or JobConfig.WORKERS
+        self.queue_size = queue_size or JobConfig.QUEUE_SIZE
+        self._queues = [queue.Queue() for _ in range(self.workers)]
+        self._queued = 0  # Jobs waiting in any worker queue
+        self._jobs = {}
+        self._finished = deque()  # (finished_at, job_id), oldest first
+        self._lock = threading.Lock()
+        self._threads = []
+        self._started = False
+        self._counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def _ensure_workers(self):
+        if self._started:
+            return
+        self._started = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(self._queues[i],),
+                                      name=f"frame-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, camera_id, frame, **options):
+        """Queue a frame. Raises JobQueueFull if the queue is at capacity."""
+        job = FrameJob(camera_id, frame, options)
+        with self._lock:
+            self._ensure_workers()
+            self._prune_locked()
+            if self._queued >= self.queue_size:
+                self._counters["rejected"] += 1
+                raise JobQueueFull()
+            self._queued += 1
+            self._jobs[job.id] = job
+            self._queues[hash(camera_id) % self.workers].put(job)
+            self._counters["submitted"] += 1
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Long-poll for a job. Returns the job (finished or not), or None if unknown."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if timeout is not None:
+            timeout = min(max(timeout, 0), JobConfig.MAX_WAIT)
+        job.wait(timeout)
+        return job
+
+    def queue_depth(self):
+        return self._queued
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for j in self._jobs.values() if j.status == JobStatus.RUNNING)
+            return {
+                **self._counters,
+                "workers": self.workers,
+                "queue_depth": self._queued,
+                "queue_capacity": self.queue_size,
+                "running": running,
+                "stored_results": len(self._finished),
+            }
+
+    def _prune_locked(self):
+        cutoff = time.monotonic() - JobConfig.RESULT_TTL
+        while self._finished and self._finished[0][0] < cutoff:
+            _, job_id = self._finished.popleft()
+            self._jobs.pop(job_id, None)
+
+    def _worker(self, jobs):
+        while True:
+            job = jobs.get()
+            with self._lock:
+                self._queued -= 1
+            job.status = JobStatus.RUNNING
+            job.started_at = time.monotonic()
+            try:
+                job.result = self.handler(job)
+                job.status = JobStatus.DONE
+            except Exception as e:
+                job.error = str(e) or e.__class__.__name__
+                job.status = JobStatus.FAILED
+            job.finished_at = time.monotonic()
+            job.frame = None  # Release the input frame early
+
+            with self._lock:
+                self._counters["completed" if job.status == JobStatus.DONE else "failed"] += 1
+                self._finished.append((job.finished_at, job.id))
+            job._done.set()
@@ -1,7 +1,12 @@
 import cv2
-from detection import detect_objects, draw_enhanced_annotations, configure_detection
-from gesture_detection import detect_hand_gestures, draw_hand_annotations, cleanup_gesture_detection
-from alert import process_events, trigger_alerts, configure_alerts, get_active_alerts
+from detection import configure_detection
+from gesture_detection import cleanup_gesture_detection
+from alert import (
+    add_alert_sink, configure_alerts, get_alert_dispatcher, remove_alert_sink, set_alert_store,
+)
+from alert_sinks import sinks_from_env
+from alert_store import AlertStore, AlertStoreConfig
+from pipeline import CameraPipeline, PipelineConfig
 
 print("Starting AI Surveillance System with Event-Based Alerts")
 print("-" * 60)
@@ -23,7 +28,17 @@ print("-" * 60)
 #     ]
 # )
 
+# Outbound alert sinks: set ALERT_WEBHOOK_URL, ALERT_JSONL_PATH or ALERT_SYSLOG=true
+sinks = [add_alert_sink(sink) for sink in sinks_from_env()]
+
+# Persistent alert history in SQLite (ALERT_DB_PATH)
+alert_store = set_alert_store(AlertStore()) if AlertStoreConfig.ENABLED else None
+
+# Optional: Run YOLO and gesture detection concurrently on each frame
+# PipelineConfig.PARALLEL_STAGES = True
+
 cap = cv2.VideoCapture(0)
+pipeline = CameraPipeline("local_0")
 
 if not cap.isOpened():
     print("Camera not accessible")
@@ -51,31 +66,18 @@ while True:
         print("Frame read failed")
         break
 
-    # Enhanced YOLO detection with tracking
-    detection_result = detect_objects(
-        frame, 
+    # Detection, gesture recognition and event-based alerts for this camera
+    result = pipeline.process(
+        frame,
         enable_tracking=True,  # Enable object tracking
-        enable_motion_filter=False  # Set to True to use motion detection pre-filter
+        enable_motion_filter=None  # None = DetectionConfig.MOTION_FILTER (on by default)
     )
 
-    # Detect hand gestures for SOS/HELP signals
-    gesture_result = detect_hand_gestures(frame)
-
-    # Draw enhanced annotations
-    annotated_frame = draw_enhanced_annotations(frame, detection_result)
-    
-    # Draw hand gesture annotations
-    annotated_frame = draw_hand_annotations(annotated_frame, gesture_result)
-
-    # Event-based alert processing
-    alert_events = process_events(detection_result, gesture_result)
-    
-    # Trigger alerts if any events detected
-    if alert_events:
-        trigger_alerts(alert_events)
+    # Draw enhanced detection and hand gesture annotations
+    annotated_frame = pipeline.annotate(frame, result)
 
     # Display active alerts on screen
-    active_alerts = get_active_alerts(max_age_seconds=10)
+    active_alerts = pipeline.get_active_alerts(max_age_seconds=10)
     if active_alerts:
         y_pos = 150
         for alert in active_alerts[-3:]:  # Show last 3 alerts
@@ -105,5 +107,10 @@ while True:
 cap.release()
 cv2.destroyAllWindows()
 cleanup_gesture_detection()
+get_alert_dispatcher().flush(timeout=2.0)  # Deliver alerts still queued
+for sink in sinks:
+    remove_alert_sink(sink)
+if alert_store is not None:
+    alert_store.close()
 print("Resources released")
 print("System shutdown complete")
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""
+Per-camera pipeline contexts.
+
+Each camera gets its own CameraPipeline owning all detection, gesture and
+alert state, so multiple feeds posting to the same API process never share
+motion baselines, gesture votes, loitering timers or cooldowns.
+Pipelines are created lazily on first use and evicted when idle.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import logging
+import os
+import threading
+import time
+
+from detection import Detections, DetectionState, detect_objects, draw_enhanced_annotations
+from gesture_detection import GestureState, detect_hand_gestures, draw_hand_annotations
+from alert import AlertState, process_events, trigger_alerts, get_active_alerts
+from clock import FrameClock
+from metrics import STAGE_ERRORS, STAGE_SECONDS, time_stage
+from qos import QosConfig, QosGovernor
+
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineConfig:
+    """Configuration for per-camera pipelines"""
+    IDLE_TIMEOUT = 300  # Seconds without frames before a pipeline is evicted
+    SWEEP_INTERVAL = 30  # Seconds between idle sweeps
+    
+    # Run YOLO detection and gesture detection concurrently. Both spend most
+    # of their time in native OpenCV/torch code that releases the GIL.
+    PARALLEL_STAGES = os.getenv("PIPELINE_PARALLEL_STAGES", "false").lower() == "true"
+    STAGE_WORKERS = int(os.getenv("PIPELINE_STAGE_WORKERS", "4"))  # Bounded stage pool size
+    ERROR_LOG_INTERVAL = 60  # Seconds between logged tracebacks per camera and stage
+
+
+_stage_executor = None
+_stage_executor_lock = threading.Lock()
+
+
+def get_stage_executor():
+    """Shared bounded thread pool for concurrent pipeline stages"""
+    global _stage_executor
+    if _stage_executor is None:
+        with _stage_executor_lock:
+            if _stage_executor is None:
+                _stage_executor = ThreadPoolExecutor(
+                    max_workers=PipelineConfig.STAGE_WORKERS,
+                    thread_name_prefix="pipeline-stage",
+                )
+    return _stage_executor
+
+
+class CameraPipeline:
+    """
+    Owns all per-camera state and runs the detect -> gesture -> alert chain.
+
+    All stages read the time from the pipeline's clock: the wall clock for
+    live frames, or each frame's capture time once process() is given
+    timestamps (replays).
+    """
+    def __init__(self, camera_id, clock=None):
+        self.camera_id = camera_id
+        self.clock = clock or FrameClock()
+        self.detection_state = DetectionState(clock=self.clock)
+        self.gesture_state = GestureState(clock=self.clock)
+        self.alert_state = AlertState(camera_id, clock=self.clock)
+        # Frames of one camera are processed in order, one at a time
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.frames_processed = 0
+        self.latest_stats = {}
+        self.last_timings = {}
+        # Adapts frame skip / input size / optional stages to a latency budget
+        self.qos = QosGovernor(camera_id, clock=self.clock) if QosConfig.ENABLED else None
+        # Stage failures: last traceback logged / failures not logged since, per stage
+        self._error_lock = threading.Lock()
+        self._error_logged_at = {}
+        self._errors_suppressed = {}
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def process(self, frame, enable_tracking=False, enable_motion_filter=None, timestamp=None):
+        """
+        Run detection, gesture detection and event processing on a frame.
+
+        timestamp: The frame's capture time (datetime or epoch seconds).
+        When given, it drives the pipeline clock, so detection timestamps,
+        cooldowns and loitering durations follow recorded time rather than
+        processing speed.
+
+        Stage failures fall back to empty results so a bad frame never
+        takes down the caller; they are logged (rate-limited) and counted
+        in surveillance_stage_errors_total.
+
+        Returns:
+            Dictionary with 'detection', 'gesture', 'events', 'person_count'
+            and per-stage 'timings' (milliseconds)
+        """
+        self.touch()
+        started = time.perf_counter()
+        if timestamp is not None:
+            self.clock.set(timestamp)
+
+        run_gestures = True
+        if self.qos is not None:
+            settings = self.qos.settings
+            self.detection_state.frame_skip = settings.frame_skip
+            self.detection_state.imgsz = settings.imgsz
+            if settings.motion_filter:
+                enable_motion_filter = True
+            run_gestures = settings.gesture
+
+        if not run_gestures:
+            detection_result, detection_ms, detection_cpu = self._run_detection(
+                frame, enable_tracking, enable_motion_filter)
+            gesture_result, gesture_ms, gesture_cpu = {'stable_gesture': None}, 0.0, 0.0
+        elif PipelineConfig.PARALLEL_STAGES:
+            # Gesture detection runs on the stage pool while this thread runs
+            # YOLO; both are joined before event processing.
+            gesture_future = get_stage_executor().submit(self._run_gestures, frame)
+            detection_result, detection_ms, detection_cpu = self._run_detection(
+                frame, enable_tracking, enable_motion_filter)
+            gesture_result, gesture_ms, gesture_cpu = gesture_future.result()
+        else:
+            detection_result, detection_ms, detection_cpu = self._run_detection(
+                frame, enable_tracking, enable_motion_filter)
+            gesture_result, gesture_ms, gesture_cpu = self._run_gestures(frame)
+
+        analysis_ms = (time.perf_counter() - started) * 1000.0
+        events_started = time.perf_counter()
+
+        try:
+            with time_stage('process_events'):
+                events = process_events(detection_result, gesture_result, state=self.alert_state)
+            if events:
+                trigger_alerts(events, state=self.alert_state)
+        except Exception:
+            self._stage_failed('events')
+            events = []
+
+        self.frames_processed += 1
+        person_count = sum(1 for d in detection_result['detections'] if d['class_name'] == 'person')
+        timings = {
+            'detection_ms': detection_ms,
+            'gesture_ms': gesture_ms,
+            'analysis_ms': analysis_ms,  # Wall clock for detection + gesture
+            'events_ms': (time.perf_counter() - events_started) * 1000.0,
+            'total_ms': (time.perf_counter() - started) * 1000.0,
+            'cpu_ms': detection_cpu + gesture_cpu,  # CPU time of the calling/stage threads
+        }
+        self.last_timings = timings
+        if self.qos is not None:
+            self.qos.observe(timings, person_count, detection_result['skipped'],
+                             detected=detection_result['results'] is not None)
+
+        return {
+            'detection': detection_result,
+            'gesture': gesture_result,
+            'events': events,
+            'person_count': person_count,
+            'timings': timings
+        }
+
+    def _run_detection(self, frame, enable_tracking, enable_motion_filter):
+        """Run YOLO detection, returning (result, elapsed_ms, cpu_ms)"""
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            detection_result = detect_objects(
+                frame,
+                enable_tracking=enable_tracking,
+                enable_motion_filter=enable_motion_filter,
+                state=self.detection_state,
+            )
+        except Exception:
+            self._stage_failed('detection')
+            detection_result = {
+                'results': None,
+                'detections': Detections(timestamp=self.clock.now()),
+                'stats': {},
+                'motion_detected': None,
+                'rois': None,
+                'propagated': False,
+                'skipped': False,
+                'frame_shape': frame.shape[:2],
+                'timestamp': self.clock.now()
+            }
+        return (
+            detection_result,
+            (time.perf_counter() - started) * 1000.0,
+            (time.thread_time() - cpu_started) * 1000.0,
+        )
+
+    def _run_gestures(self, frame):
+        """Run skin-based gesture detection, returning (result, elapsed_ms, cpu_ms)"""
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            gesture_result = detect_hand_gestures(frame, state=self.gesture_state)
+        except Exception:
+            self._stage_failed('gesture')
+            gesture_result = {'stable_gesture': None}
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, 'detect_hand_gestures')
+        return gesture_result, elapsed * 1000.0, (time.thread_time() - cpu_started) * 1000.0
+
+    def _stage_failed(self, stage):
+        """Count a stage failure and log its traceback (call from an except block)"""
+        STAGE_ERRORS.inc(stage)
+        now = time.monotonic()
+        with self._error_lock:
+            last = self._error_logged_at.get(stage)
+            if last is not None and now - last < PipelineConfig.ERROR_LOG_INTERVAL:
+                self._errors_suppressed[stage] = self._errors_suppressed.get(stage, 0) + 1
+                return
+            self._error_logged_at[stage] = now
+            suppressed = self._errors_suppressed.pop(stage, 0)
+        logger.exception(
+            "Camera %s: %s stage failed, using empty results (%d more since last report)",
+            self.camera_id, stage, suppressed,
+        )
+
+    def annotate(self, frame, result):
+        """Draw detection and gesture overlays for a process() result"""
+        with time_stage('annotation'):
+            annotated = draw_enhanced_annotations(frame, result['detection'], state=self.detection_state)
+            return draw_hand_annotations(annotated, result['gesture'])
+
+    def get_active_alerts(self, max_age_seconds=60, alert_type=None, min_severity=None):
+        return get_active_alerts(max_age_seconds, state=self.alert_state,
+                                 alert_type=alert_type, min_severity=min_severity)
+
+    def idle_seconds(self):
+        return time.monotonic() - self.last_used
+
+
+# Registry of live pipelines keyed by camera id
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+_last_sweep = time.monotonic()
+_eviction_listeners = []
+
+
+def add_eviction_listener(callback):
+    """
+    Call callback(camera_id) when an idle pipeline is evicted, so per-camera
+    state kept outside the pipeline can be released too. Callbacks run
+    under the registry lock and must be quick.
+    """
+    _eviction_listeners.append(callback)
+
+
+def get_pipeline(camera_id):
+    """Get (or lazily create) the pipeline for a camera"""
+    global _last_sweep
+
+    with _pipelines_lock:
+        pipeline = _pipelines.get(camera_id)
+        if pipeline is None:
+            pipeline = CameraPipeline(camera_id)
+            _pipelines[camera_id] = pipeline
+        pipeline.touch()
+
+        if time.monotonic() - _last_sweep >= PipelineConfig.SWEEP_INTERVAL:
+            _last_sweep = time.monotonic()
+            _evict_idle_locked()
+
+    return pipeline
+
+
+def _evict_idle_locked():
+    evicted = []
+    for camera_id, pipeline in list(_pipelines.items()):
+        if pipeline.lock.locked():
+            continue
+        if pipeline.idle_seconds() > PipelineConfig.IDLE_TIMEOUT:
+            del _pipelines[camera_id]
+            evicted.append(camera_id)
+            for callback in _eviction_listeners:
+                try:
+                    callback(camera_id)
+                except Exception:
+                    logger.exception("Eviction listener failed for camera %s", camera_id)
+    return evicted
+
+
+def list_pipelines():
+    """Snapshot of currently live pipelines"""
+    with _pipelines_lock:
+        return list(_pipelines.values())
+
+
+def get_all_active_alerts(max_age_seconds=60, alert_type=None, min_severity=None, camera_id=None):
+    """Recent alerts across every live camera (or just camera_id), oldest first"""
+    per_camera = [
+        pipeline.get_active_alerts(max_age_seconds, alert_type=alert_type, min_severity=min_severity)
+        for pipeline in list_pipelines()
+        if camera_id is None or pipeline.camera_id == camera_id
+    ]
+    # Each camera's alerts are already time-ordered
+    return list(heapq.merge(*per_camera, key=lambda a: a.timestamp))
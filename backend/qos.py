@@ -0,0 +1,239 @@
+"""
+Per-camera quality-of-service governor.
+
+Watches each camera's measured per-frame processing time (and optionally
+CPU use) against a budget and trades quality for speed within configured
+bounds. When over budget it steps down, cheapest quality loss first:
+
+    1. enable the motion pre-filter
+    2. lower the YOLO input size (IMGSZ_STEPS)
+    3. raise the frame skip (up to MAX_FRAME_SKIP)
+
+and steps back up in reverse order when comfortably under budget.
+Independently, gesture detection is paused while no people are in view.
+Every change is recorded with the measurements that caused it, for
+auditing through /api/qos. Decisions are stamped with the camera's clock
+(frame time in replays). The measurements themselves are processing time
+and CPU use, so they are always taken on the wall clock.
+"""
+
+from collections import deque
+import os
+import threading
+import time
+
+from clock import system_clock
+from detection import DetectionConfig
+from metrics import REGISTRY, Counter
+
+
+class QosConfig:
+    """Configuration for the per-camera QoS governor"""
+    ENABLED = os.getenv("PIPELINE_QOS", "false").lower() == "true"
+    LATENCY_BUDGET_MS = float(os.getenv("QOS_LATENCY_BUDGET_MS", "150"))  # Mean processing time per detected frame
+    CPU_BUDGET = float(os.getenv("QOS_CPU_BUDGET", "0"))  # CPU cores per camera (0 = latency only)
+    MAX_FRAME_SKIP = 4  # Upper bound for frame skip
+    IMGSZ_STEPS = (320, 416, 512, 640)  # Allowed YOLO input sizes (capped at DetectionConfig.IMGSZ)
+    HEADROOM = 0.6  # Step quality back up below this fraction of the budget
+    SMOOTHING = 0.1  # EWMA weight for measurements
+    COOLDOWN_FRAMES = 30  # Frames between adjustments, lets measurements settle
+    GESTURE_IDLE_FRAMES = 30  # Processed frames without people before pausing gestures
+    DECISION_LOG_SIZE = 200  # Decisions kept per camera
+
+
+QOS_ADJUSTMENTS = REGISTRY.register(Counter(
+    "surveillance_qos_adjustments_total",
+    "QoS governor setting changes, by setting and direction",
+    ["setting", "direction"],
+))
+
+
+class QosSettings:
+    """Runtime settings the governor controls for one camera"""
+    def __init__(self, frame_skip, imgsz, motion_filter=False, gesture=True):
+        self.frame_skip = frame_skip
+        self.imgsz = imgsz
+        self.motion_filter = motion_filter
+        self.gesture = gesture
+
+    def to_dict(self):
+        return {
+            'frame_skip': self.frame_skip,
+            'imgsz': self.imgsz,
+            'motion_filter': self.motion_filter,
+            'gesture': self.gesture,
+        }
+
+
+class QosGovernor:
+    """
+    Adapts one camera's settings to a latency / CPU budget.
+
+    Args:
+        camera_id: Camera the governor belongs to
+        latency_budget_ms: Mean per-frame processing budget (default QosConfig)
+        cpu_budget: CPU cores this camera may use, 0 to ignore (default QosConfig)
+        clock: Clock stamping decisions (default: wall clock)
+    """
+    def __init__(self, camera_id, latency_budget_ms=None, cpu_budget=None, clock=None):
+        self.camera_id = camera_id
+        self.clock = clock or system_clock
+        self.latency_budget_ms = latency_budget_ms or QosConfig.LATENCY_BUDGET_MS
+        self.cpu_budget = QosConfig.CPU_BUDGET if cpu_budget is None else cpu_budget
+
+        # Bounds come from the static configuration: never better quality
+        # than configured, never worse than the QoS limits.
+        self.imgsz_steps = sorted({s for s in QosConfig.IMGSZ_STEPS if s < DetectionConfig.IMGSZ}
+                                  | {DetectionConfig.IMGSZ})
+        self.min_frame_skip = max(1, DetectionConfig.FRAME_SKIP)
+        self.max_frame_skip = max(self.min_frame_skip, QosConfig.MAX_FRAME_SKIP)
+        # The motion filter may already be on by default; then only the
+        # governor's own enabling is ever undone
+        self.default_motion_filter = DetectionConfig.MOTION_FILTER
+        self.settings = QosSettings(self.min_frame_skip, self.imgsz_steps[-1], self.default_motion_filter)
+
+        self.latency_ms = None  # EWMA processing time of frames the detector ran on
+        self.cpu = None  # EWMA cores used
+        self.frames = 0
+        self.last_change_frame = 0
+        self.frames_without_people = 0
+        self._last_observed = None
+        self.decisions = deque(maxlen=QosConfig.DECISION_LOG_SIZE)
+        self._lock = threading.Lock()
+
+    def set_budget(self, latency_budget_ms=None, cpu_budget=None):
+        with self._lock:
+            if latency_budget_ms is not None:
+                self.latency_budget_ms = float(latency_budget_ms)
+            if cpu_budget is not None:
+                self.cpu_budget = float(cpu_budget)
+
+    def _smooth(self, current, value):
+        if current is None:
+            return value
+        return QosConfig.SMOOTHING * value + (1 - QosConfig.SMOOTHING) * current
+
+    def observe(self, timings, person_count, skipped=False, detected=None):
+        """
+        Feed one frame's measurements; may change self.settings.
+
+        skipped: The frame was skipped by frame skip
+        detected: The detector ran on the frame (default: not skipped).
+            Only those frames feed the latency estimate. Skipped and
+            motion-filtered frames cost almost nothing, so counting them
+            would let a higher frame skip pull the estimate under budget,
+            relax the skip, and oscillate.
+        """
+        if detected is None:
+            detected = not skipped
+        now = time.monotonic()
+        with self._lock:
+            self.frames += 1
+            if detected:
+                self.latency_ms = self._smooth(self.latency_ms, timings.get('total_ms', 0.0))
+            if self._last_observed is not None:
+                interval_ms = max((now - self._last_observed) * 1000.0, 1e-3)
+                self.cpu = self._smooth(self.cpu, timings.get('cpu_ms', 0.0) / interval_ms)
+            self._last_observed = now
+
+            if not skipped:
+                self._update_gesture(person_count)
+
+            if self.frames - self.last_change_frame < QosConfig.COOLDOWN_FRAMES:
+                return
+            if self._over_budget():
+                self._step_down()
+            elif self._under_budget():
+                self._step_up()
+
+    def _over_budget(self):
+        if self.latency_ms is not None and self.latency_ms > self.latency_budget_ms:
+            return True
+        return bool(self.cpu_budget) and self.cpu is not None and self.cpu > self.cpu_budget
+
+    def _under_budget(self):
+        if self.latency_ms is None or self.latency_ms >= self.latency_budget_ms * QosConfig.HEADROOM:
+            return False
+        if self.cpu_budget and (self.cpu is None or self.cpu >= self.cpu_budget * QosConfig.HEADROOM):
+            return False
+        return True
+
+    def _step_down(self):
+        settings = self.settings
+        if not settings.motion_filter:
+            self._change('motion_filter', True, 'over budget')
+        elif settings.imgsz > self.imgsz_steps[0]:
+            smaller = self.imgsz_steps[self.imgsz_steps.index(settings.imgsz) - 1]
+            self._change('imgsz', smaller, 'over budget')
+        elif settings.frame_skip < self.max_frame_skip:
+            self._change('frame_skip', settings.frame_skip + 1, 'over budget')
+
+    def _step_up(self):
+        settings = self.settings
+        if settings.frame_skip > self.min_frame_skip:
+            self._change('frame_skip', settings.frame_skip - 1, 'under budget')
+        elif settings.imgsz < self.imgsz_steps[-1]:
+            larger = self.imgsz_steps[self.imgsz_steps.index(settings.imgsz) + 1]
+            self._change('imgsz', larger, 'under budget')
+        elif settings.motion_filter and not self.default_motion_filter:
+            self._change('motion_filter', False, 'under budget')
+
+    def _update_gesture(self, person_count):
+        if person_count:
+            self.frames_without_people = 0
+            if not self.settings.gesture:
+                self._change('gesture', True, 'people in view', cooldown=False)
+            return
+        self.frames_without_people += 1
+        if self.settings.gesture and self.frames_without_people >= QosConfig.GESTURE_IDLE_FRAMES:
+            self._change('gesture', False, 'no people in view', cooldown=False)
+
+    def _change(self, setting, value, reason, cooldown=True):
+        old = getattr(self.settings, setting)
+        setattr(self.settings, setting, value)
+        if cooldown:
+            self.last_change_frame = self.frames
+
+        # Quality goes down when filters switch on or imgsz/gesture drop
+        if setting == 'frame_skip':
+            direction = 'down' if value > old else 'up'
+        elif setting == 'motion_filter':
+            direction = 'down' if value else 'up'
+        else:
+            direction = 'down' if value < old else 'up'
+        QOS_ADJUSTMENTS.inc(setting, direction)
+
+        self.decisions.append({
+            'timestamp': self.clock.now().isoformat(),
+            'camera_id': self.camera_id,
+            'frame': self.frames,
+            'setting': setting,
+            'from': old,
+            'to': value,
+            'direction': direction,
+            'reason': reason,
+            'latency_ms': round(self.latency_ms or 0.0, 2),
+            'cpu': round(self.cpu, 3) if self.cpu is not None else None,
+            'latency_budget_ms': self.latency_budget_ms,
+            'cpu_budget': self.cpu_budget,
+        })
+
+    def snapshot(self, decisions=True):
+        """Current settings, budget and measurements (and the decision log)"""
+        with self._lock:
+            data = {
+                'camera_id': self.camera_id,
+                'settings': self.settings.to_dict(),
+                'latency_budget_ms': self.latency_budget_ms,
+                'cpu_budget': self.cpu_budget,
+                'latency_ms': round(self.latency_ms, 2) if self.latency_ms is not None else None,
+                'cpu': round(self.cpu, 3) if self.cpu is not None else None,
+                'frames': self.frames,
+                'bounds': {
+                    'frame_skip': [self.min_frame_skip, self.max_frame_skip],
+                    'imgsz': self.imgsz_steps,
+                },
+            }
+            if decisions:
+                data['decisions'] = list(self.decisions)
+            return data
@@ -0,0 +1,226 @@
+"""
+INT8 quantization of the ONNX detector.
+
+Calibrates activation ranges on a local folder of camera frames and writes
+a statically quantized (QDQ, per-channel weights) copy of the fp32 ONNX
+model next to it. Select it at runtime with YOLO_PRECISION=int8.
+
+    python quantize.py --calibration <frames_dir> [--limit 200] [--report]
+
+--report runs fp32 and int8 over the calibration frames and prints box
+agreement (IoU matching against fp32), per-frame latency and memory, so
+the accuracy cost can be weighed against the speedup before deploying.
+"""
+
+import gc
+import os
+from pathlib import Path
+import time
+
+import numpy as np
+
+from detector_backends import (
+    OnnxBackend, agreement_report, load_frames, resolve_int8_path, resolve_onnx_path,
+)
+
+
+class QuantizeConfig:
+    """Configuration for static INT8 quantization"""
+    CALIBRATION_FRAMES = 200  # Frames used to calibrate activation ranges
+    CALIBRATION_METHOD = "minmax"  # 'minmax', 'entropy' or 'percentile'
+    PER_CHANNEL = True  # Per-channel weight scales (better accuracy for convs)
+    WARMUP_FRAMES = 3  # Untimed runs before benchmarking
+
+
+def _calibration_reader(frames, backend):
+    """
+    CalibrationDataReader feeding frames through backend.preprocess, so the
+    calibrated ranges see the same letterboxing (stride-32 minimal padding
+    for dynamic exports) as inference does.
+    """
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._frames = iter(frames)
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            if frame is None:
+                return None
+            blob, _, _ = backend.preprocess(frame, backend.imgsz)
+            return {backend.input_name: blob}
+
+        def rewind(self):
+            self._frames = iter(frames)
+
+    return FrameReader()
+
+
+def quantize_model(fp32_path, int8_path, frames, imgsz=640):
+    """
+    Statically quantize an fp32 ONNX detector to INT8.
+
+    Args:
+        fp32_path: Exported fp32 ONNX model
+        int8_path: Where to write the quantized model
+        frames: Calibration frames (BGR numpy arrays)
+        imgsz: Inference input size used for calibration
+    """
+    from onnxruntime.quantization import (
+        CalibrationMethod, QuantFormat, QuantType, quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if not frames:
+        raise ValueError("No calibration frames")
+
+    # The fp32 backend provides the input name and the runtime preprocessing
+    fp32 = OnnxBackend(fp32_path, imgsz=imgsz)
+
+    # Shape inference + graph folding gives the quantizer complete tensor info
+    prepared_path = Path(int8_path).with_suffix(".prep.onnx")
+    try:
+        quant_pre_process(str(fp32_path), str(prepared_path))
+        source_path = prepared_path
+    except Exception as e:
+        print(f"Pre-processing skipped ({e}), quantizing the model as exported")
+        source_path = fp32_path
+
+    methods = {
+        "minmax": CalibrationMethod.MinMax,
+        "entropy": CalibrationMethod.Entropy,
+        "percentile": CalibrationMethod.Percentile,
+    }
+    try:
+        quantize_static(
+            str(source_path),
+            str(int8_path),
+            _calibration_reader(frames, fp32),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=QuantizeConfig.PER_CHANNEL,
+            calibrate_method=methods[QuantizeConfig.CALIBRATION_METHOD],
+        )
+    finally:
+        if prepared_path.exists():
+            prepared_path.unlink()
+    return str(int8_path)
+
+
+# -------------------------
+# ACCURACY / LATENCY REPORT
+# -------------------------
+def _rss_mb():
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def benchmark_backend(backend, frames, warmup=None):
+    """
+    Run a backend over frames through the normal extraction path.
+
+    Returns:
+        (detections per frame, latency stats dict)
+    """
+    from detection import DetectionConfig, extract_detections
+
+    kwargs = dict(
+        conf=DetectionConfig.CONF_THRESHOLD,
+        iou=DetectionConfig.IOU_THRESHOLD,
+        imgsz=DetectionConfig.IMGSZ,
+        classes=DetectionConfig.TARGET_CLASSES or None,
+        verbose=False,
+    )
+    warmup = QuantizeConfig.WARMUP_FRAMES if warmup is None else warmup
+    for frame in frames[:warmup]:
+        backend(frame, **kwargs)
+
+    runs = []
+    latencies = []
+    for frame in frames:
+        started = time.perf_counter()
+        results = backend(frame, **kwargs)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        runs.append(extract_detections(results))
+
+    latencies = np.asarray(latencies)
+    stats = {
+        'mean_ms': round(float(latencies.mean()), 2) if len(latencies) else 0.0,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2) if len(latencies) else 0.0,
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2) if len(latencies) else 0.0,
+    }
+    return runs, stats
+
+
+def _load_measured(model_path, imgsz):
+    """Load an ONNX backend and record the memory it adds to the process"""
+    gc.collect()
+    before = _rss_mb()
+    backend = OnnxBackend(model_path, imgsz=imgsz)
+    return backend, {
+        'model_mb': round(os.path.getsize(model_path) / (1024 * 1024), 2),
+        'session_mb': round(_rss_mb() - before, 2),
+    }
+
+
+def quantization_report(frames, fp32_path, int8_path, imgsz=640, iou_threshold=0.5):
+    """
+    Compare the INT8 model against fp32 on the same frames.
+
+    Agreement is a mAP proxy: int8 boxes are matched to fp32 boxes of the
+    same class at IoU >= iou_threshold, so recall/precision of 1.0 means
+    the quantized model reproduces the fp32 detections.
+    """
+    fp32, fp32_memory = _load_measured(fp32_path, imgsz)
+    fp32_runs, fp32_latency = benchmark_backend(fp32, frames)
+    del fp32
+
+    int8, int8_memory = _load_measured(int8_path, imgsz)
+    int8_runs, int8_latency = benchmark_backend(int8, frames)
+    del int8
+
+    speedup = fp32_latency['mean_ms'] / int8_latency['mean_ms'] if int8_latency['mean_ms'] else 0.0
+    return {
+        'agreement': agreement_report(fp32_runs, int8_runs, iou_threshold),
+        'fp32': {**fp32_latency, **fp32_memory},
+        'int8': {**int8_latency, **int8_memory},
+        'speedup': round(speedup, 2),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from detection import DetectionConfig, _resolve_model_path
+
+    parser = argparse.ArgumentParser(description="Quantize the ONNX detector to INT8")
+    parser.add_argument("--calibration", required=True, metavar="FRAMES_DIR")
+    parser.add_argument("--limit", type=int, default=QuantizeConfig.CALIBRATION_FRAMES)
+    parser.add_argument("--output", default=None, help="INT8 model path (default: <model>.int8.onnx)")
+    parser.add_argument("--report", action="store_true", help="Compare against fp32 after quantizing")
+    parser.add_argument("--report-only", action="store_true", help="Skip quantization, only report")
+    args = parser.parse_args()
+
+    frames = load_frames(args.calibration, args.limit)
+    if not frames:
+        raise SystemExit(f"No images found in {args.calibration}")
+
+    fp32_path = resolve_onnx_path(_resolve_model_path(), DetectionConfig.IMGSZ)
+    int8_path = args.output or resolve_int8_path(fp32_path)
+
+    if not args.report_only:
+        print(f"Calibrating on {len(frames)} frames from {args.calibration}...")
+        quantize_model(fp32_path, int8_path, frames, DetectionConfig.IMGSZ)
+        print(f"Wrote {int8_path}")
+
+    if args.report or args.report_only:
+        report = quantization_report(frames, fp32_path, int8_path, DetectionConfig.IMGSZ)
+        print(json.dumps(report, indent=2))
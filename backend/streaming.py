@@ -0,0 +1,221 @@
+"""
+Push channels for dashboard clients.
+
+EventBroadcaster fans server-sent events (stats deltas, alerts) out to any
+number of subscribers. Each event is serialized once and the same bytes are
+queued for every subscriber; slow subscribers have a bounded queue and are
+asked to resync from a fresh snapshot instead of growing memory.
+"""
+
+from collections import deque
+import itertools
+import json
+import threading
+
+
+class StreamConfig:
+    """Configuration for push streams"""
+    SUBSCRIBER_QUEUE_SIZE = 256  # Pending events per subscriber before resync
+    MAX_SUBSCRIBERS = 500  # Concurrent stream clients
+    KEEPALIVE_SECONDS = 15  # Comment line sent when idle, keeps proxies from closing
+
+
+def format_sse(event, data, event_id=None):
+    """Serialize one server-sent event to bytes"""
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {payload}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscription:
+    """A single stream client's bounded event queue"""
+    def __init__(self, max_queue):
+        self._queue = deque()
+        self._max_queue = max_queue
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.needs_resync = False
+        self.closed = False
+
+    def push(self, message):
+        with self._cond:
+            if len(self._queue) >= self._max_queue:
+                # Client is too slow: drop the backlog and let it resync from
+                # a snapshot rather than queueing without bound.
+                self.dropped += len(self._queue)
+                self._queue.clear()
+                self.needs_resync = True
+            self._queue.append(message)
+            self._cond.notify()
+
+    def next(self, timeout=None):
+        """Next queued message, or None if the timeout expires"""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if self._queue:
+                return self._queue.popleft()
+            return None
+
+    def take_resync(self):
+        with self._cond:
+            resync = self.needs_resync
+            self.needs_resync = False
+            return resync
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class TooManySubscribers(Exception):
+    """Raised when MAX_SUBSCRIBERS streams are already open"""
+
+
+class EventBroadcaster:
+    """Serialize-once fan-out of server-sent events"""
+    def __init__(self, max_queue=None, max_subscribers=None):
+        self.max_queue = max_queue or StreamConfig.SUBSCRIBER_QUEUE_SIZE
+        self.max_subscribers = max_subscribers or StreamConfig.MAX_SUBSCRIBERS
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers()
+            subscription = Subscription(self.max_queue)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Serialize an event once and queue it for every subscriber"""
+        with self._lock:
+            if not self._subscribers:
+                return
+            message = format_sse(event, data, next(self._ids))
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            subscription.push(message)
+
+
+def stats_delta(previous, current, ignore=("timestamp", "stage_ms"), always=("camera_id", "timestamp")):
+    """
+    Keys of `current` whose values differ from `previous`, or None.
+
+    Keys in `ignore` change on every frame and never make a delta on their
+    own; keys in `always` are added to every non-empty delta.
+    """
+    changed = {
+        key: value for key, value in current.items()
+        if key not in ignore and previous.get(key) != value
+    }
+    if not changed:
+        return None
+    for key in always:
+        if key in current:
+            changed[key] = current[key]
+    return changed
+
+
+MJPEG_BOUNDARY = "frame"
+
+
+class EncodedFrame:
+    """A JPEG-encoded frame, shared as-is by every viewer"""
+    def __init__(self, seq, jpeg):
+        self.seq = seq
+        self.jpeg = jpeg
+        self._part = None
+
+    @property
+    def mjpeg_part(self):
+        """multipart/x-mixed-replace part for this frame, built once"""
+        if self._part is None:
+            header = (
+                f"--{MJPEG_BOUNDARY}\r\n"
+                f"Content-Type: image/jpeg\r\n"
+                f"Content-Length: {len(self.jpeg)}\r\n\r\n"
+            ).encode()
+            self._part = header + self.jpeg + b"\r\n"
+        return self._part
+
+
+class FrameHub:
+    """
+    Latest annotated frame per camera, encoded once and shared by all viewers.
+
+    Viewers wait for a sequence number newer than the last one they sent;
+    a viewer that falls behind simply gets the newest frame and skips the
+    ones in between.
+    """
+    def __init__(self):
+        self._frames = {}
+        self._viewers = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count(1)
+
+    def publish(self, camera_id, jpeg):
+        with self._cond:
+            self._frames[camera_id] = EncodedFrame(next(self._seq), jpeg)
+            self._cond.notify_all()
+
+    def latest(self, camera_id):
+        with self._cond:
+            return self._frames.get(camera_id)
+
+    def wait_for_frame(self, camera_id, after_seq=0, timeout=None):
+        """Newest frame with seq > after_seq, or None if the timeout expires"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._newer(camera_id, after_seq),
+                timeout=timeout,
+            )
+            frame = self._frames.get(camera_id)
+            if frame is not None and frame.seq > after_seq:
+                return frame
+            return None
+
+    def _newer(self, camera_id, after_seq):
+        frame = self._frames.get(camera_id)
+        return frame is not None and frame.seq > after_seq
+
+    def add_viewer(self, camera_id):
+        with self._cond:
+            self._viewers[camera_id] = self._viewers.get(camera_id, 0) + 1
+
+    def remove_viewer(self, camera_id):
+        with self._cond:
+            count = self._viewers.get(camera_id, 0) - 1
+            if count > 0:
+                self._viewers[camera_id] = count
+            else:
+                self._viewers.pop(camera_id, None)
+
+    def viewer_count(self, camera_id=None):
+        with self._cond:
+            if camera_id is None:
+                return sum(self._viewers.values())
+            return self._viewers.get(camera_id, 0)
+
+    def discard(self, camera_id):
+        """Forget a camera's last frame (its pipeline was evicted)"""
+        with self._cond:
+            self._frames.pop(camera_id, None)
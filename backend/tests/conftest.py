@@ -0,0 +1,13 @@
+"""
+Test setup: backend modules import each other by top-level name, as when
+run from the backend directory.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# No alert sounds, and no alerts.db written next to the tests
+os.environ.setdefault("ALERT_SOUND", "false")
+os.environ.setdefault("ALERT_STORE", "false")
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from admission import AdmissionConfig, AdmissionController, FrameDropped
+
+
+class HookedCondition(threading.Condition):
+    """Condition that runs a callback (with the lock held) after notify_all"""
+    def __init__(self):
+        super().__init__()
+        self.after_notify = None
+
+    def notify_all(self):
+        super().notify_all()
+        hook, self.after_notify = self.after_notify, None
+        if hook is not None:
+            hook()
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(AdmissionConfig, "ENABLED", True)
+    monkeypatch.setattr(AdmissionConfig, "PENDING_TIMEOUT", 2.0)
+    return AdmissionController()
+
+
+def _run_frame(controller, name, order):
+    try:
+        with controller.admit("cam"):
+            order.append(name)
+    except FrameDropped as e:
+        order.append(f"{name} {e.reason}")
+
+
+def _wait_for_pending(slot, ticket=None):
+    while slot.pending is None or slot.pending is ticket:
+        threading.Event().wait(0.005)
+    return slot.pending
+
+
+def test_newer_frame_supersedes_pending(controller):
+    slot = controller._slot("cam")
+    order = []
+    with controller.admit("cam"):
+        n1 = threading.Thread(target=_run_frame, args=(controller, "n+1", order))
+        n1.start()
+        ticket = _wait_for_pending(slot)
+        n2 = threading.Thread(target=_run_frame, args=(controller, "n+2", order))
+        n2.start()
+        n1.join(3)
+        _wait_for_pending(slot, ticket)
+        order.append("n")
+    n2.join(3)
+    assert order == ["n+1 superseded", "n", "n+2"]
+
+
+def test_frame_taking_freed_slot_supersedes_waiting_pending(controller):
+    """
+    Frame N is in flight, N+1 pending. N finishes and N+2 claims the free
+    slot before N+1 has woken up: N+1 must be dropped, not run after N+2.
+    """
+    slot = controller._slot("cam")
+    slot.cond = HookedCondition()
+    order = []
+
+    with controller.admit("cam"):
+        thread = threading.Thread(target=_run_frame, args=(controller, "n+1", order))
+        thread.start()
+        _wait_for_pending(slot)
+
+        newest = controller.admit("cam")
+
+        def claim_freed_slot():
+            # Runs inside N's release, while N+1 is still asleep
+            newest.__enter__()
+            order.append("n+2")
+
+        slot.cond.after_notify = claim_freed_slot
+
+    thread.join(3)
+    assert not thread.is_alive()
+    newest.__exit__(None, None, None)
+    assert order == ["n+2", "n+1 superseded"]
+    assert slot.pending is None and not slot.in_flight
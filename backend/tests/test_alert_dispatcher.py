@@ -0,0 +1,40 @@
+import threading
+
+from alert import AlertDispatcher, AlertEvent
+
+
+def test_stats_snapshot_is_consistent_under_load():
+    dispatcher = AlertDispatcher(max_size=16, sound=False)
+    stop = threading.Event()
+    torn = []
+
+    def submit(worker):
+        for i in range(400):
+            # Some duplicates (merged), more distinct keys than the queue holds (dropped)
+            event = AlertEvent("LOITERING", 1 + i % 5, "test", {'track_id': (worker * 1000 + i) % 40})
+            dispatcher.submit(event)
+
+    def sample():
+        while not stop.is_set():
+            stats = dispatcher.get_stats()
+            accounted = (stats['delivered'] + stats['merged'] + stats['dropped']
+                         + stats['queue_depth'] + stats['delivering'])
+            if accounted != stats['submitted']:
+                torn.append(stats)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    submitters = [threading.Thread(target=submit, args=(w,)) for w in range(4)]
+    for thread in submitters:
+        thread.start()
+    for thread in submitters:
+        thread.join()
+    assert dispatcher.flush(timeout=10)
+    stop.set()
+    sampler.join()
+
+    assert torn == []
+    stats = dispatcher.get_stats()
+    assert stats['submitted'] == 1600
+    assert stats['queue_depth'] == 0 and stats['delivering'] == 0
+    assert stats['delivered'] + stats['merged'] + stats['dropped'] == 1600
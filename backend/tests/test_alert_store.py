@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import alert
+from alert import AlertEvent
+from alert_store import AlertStore, AlertStoreConfig
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AlertStore(tmp_path / "alerts.db")
+    start = datetime(2026, 1, 23, 10, 0, 0)
+    for i in range(5):
+        event = AlertEvent("LOITERING", 3, f"alert {i}", {'track_id': i}, timestamp=start + timedelta(seconds=i))
+        event.camera_id = "cam_001"
+        store.submit(event)
+    assert store.flush(timeout=5)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("limit", [-2, -1])
+def test_query_clamps_non_positive_limit(store, limit):
+    rows, next_cursor = store.query(limit=limit)
+    assert [row['description'] for row in rows] == ["alert 4"]
+    assert next_cursor is not None
+
+
+def test_query_caps_limit(store, monkeypatch):
+    monkeypatch.setattr(AlertStoreConfig, "MAX_PAGE_SIZE", 2)
+    rows, next_cursor = store.query(limit=100)
+    assert len(rows) == 2 and next_cursor is not None
+    rows, next_cursor = store.query(limit=100, cursor=next_cursor)
+    assert [row['description'] for row in rows] == ["alert 2", "alert 1"]
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    import api
+    monkeypatch.setattr(alert, "alert_store", store)
+    return api.app.test_client()
+
+
+@pytest.mark.parametrize("limit", ["-2", "-1", "0", "abc"])
+def test_history_rejects_invalid_limit(client, limit):
+    response = client.get(f"/api/alerts?limit={limit}")
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_history_pages_with_valid_limit(client):
+    response = client.get("/api/alerts?limit=2")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [a["description"] for a in data["alerts"]] == ["alert 4", "alert 3"]
+    assert data["next_cursor"]
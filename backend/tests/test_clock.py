@@ -0,0 +1,111 @@
+import base64
+import io
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytest
+
+from alert import AlertConfig, AlertState, process_events
+from clock import FrameClock, to_datetime
+from detection import DetectionConfig, DetectionState, Detections, carry_detections
+
+CAPTURE_TIME = datetime(2026, 1, 23, 10, 0, 0)
+
+
+def frame_clock(timestamp=CAPTURE_TIME):
+    clock = FrameClock()
+    clock.set(timestamp)
+    return clock
+
+
+def test_to_datetime_accepts_epoch_and_iso():
+    epoch = CAPTURE_TIME.timestamp()
+    assert to_datetime(epoch) == CAPTURE_TIME
+    assert to_datetime(str(epoch)) == CAPTURE_TIME
+    assert to_datetime("2026-01-23T10:00:00") == CAPTURE_TIME
+    assert to_datetime(CAPTURE_TIME.astimezone().isoformat()) == CAPTURE_TIME
+    with pytest.raises(ValueError):
+        to_datetime("yesterday")
+
+
+def test_alert_events_use_camera_clock(monkeypatch):
+    monkeypatch.setattr(AlertConfig, "CROWD_THRESHOLD", 1)
+    monkeypatch.setattr(AlertConfig, "FALL_ASPECT_RATIO_THRESHOLD", 1.5)
+    state = AlertState("cam_test", clock=frame_clock())
+    detections = Detections(
+        [[0, 0, 40, 100], [100, 0, 140, 100], [200, 0, 400, 50]], [0.9] * 3, [0] * 3,
+        timestamp=CAPTURE_TIME,
+    )
+    events = process_events(
+        {'detections': detections, 'frame_shape': (480, 640, 3)},
+        {'stable_gesture': 'SOS'},
+        state,
+    )
+    assert {e.alert_type for e in events} >= {"CROWD_DETECTED", "FALL_DETECTED", "SOS_GESTURE"}
+    assert all(e.timestamp == CAPTURE_TIME for e in events)
+
+
+def test_carried_detections_use_camera_clock(monkeypatch):
+    monkeypatch.setattr(DetectionConfig, "PROPAGATE_BOXES", False)
+    state = DetectionState(clock=frame_clock())
+    frame = np.zeros((48, 64, 3), np.uint8)
+    assert carry_detections(frame, state, builtin_tracking=True).timestamp == CAPTURE_TIME
+
+    state.last_detections = Detections([[0, 0, 10, 10]], [0.9], [0])
+    carried = carry_detections(frame, state, builtin_tracking=False, motion=False)
+    assert carried.timestamp == CAPTURE_TIME and carried.propagated.all()
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    import api
+    calls = []
+
+    def run_frame(frame, camera_id, annotate=True, timestamp=None):
+        calls.append(timestamp)
+        stats = {"camera_id": camera_id, "gesture_detected": None}
+        return stats, None, {"detection": {"detections": Detections()}}
+
+    monkeypatch.setattr(api, "run_frame", run_frame)
+    return api.app.test_client(), calls
+
+
+def jpeg_bytes():
+    return cv2.imencode(".jpg", np.zeros((32, 32, 3), np.uint8))[1].tobytes()
+
+
+def test_process_frame_passes_capture_timestamp(api_calls):
+    client, calls = api_calls
+    epoch = CAPTURE_TIME.timestamp()
+
+    response = client.post(
+        "/api/process_frame?response=detections", data=jpeg_bytes(),
+        headers={"Content-Type": "image/jpeg", "X-Capture-Timestamp": str(epoch)},
+    )
+    assert response.status_code == 200
+    response = client.post(
+        "/api/process_frame?response=detections",
+        data={"image": (io.BytesIO(jpeg_bytes()), "frame.jpg"), "timestamp": "2026-01-23T10:00:00"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    response = client.post("/api/process_frame?response=detections", json={
+        "image": base64.b64encode(jpeg_bytes()).decode(), "timestamp": epoch,
+    })
+    assert response.status_code == 200
+    response = client.post("/api/process_frame?response=detections", data=jpeg_bytes(),
+                           headers={"Content-Type": "image/jpeg"})
+    assert response.status_code == 200
+    assert calls == [CAPTURE_TIME] * 3 + [None]
+
+
+def test_process_frame_rejects_invalid_timestamp(api_calls):
+    client, calls = api_calls
+    response = client.post(
+        "/api/process_frame", data=jpeg_bytes(),
+        headers={"Content-Type": "image/jpeg", "X-Capture-Timestamp": "yesterday"},
+    )
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid timestamp"
+    assert calls == []
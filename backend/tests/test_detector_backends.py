@@ -0,0 +1,205 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from detector_backends import (
+    OnnxBackend, compare_backends, letterbox, load_detector, non_max_suppression,
+)
+
+
+NUM_CLASSES = 80
+
+
+def raw_output(boxes_xyxy, class_ids, scores, anchors=64):
+    """Synthetic YOLOv8 head output (4 + classes, anchors), boxes in cx, cy, w, h"""
+    output = np.zeros((4 + NUM_CLASSES, anchors), np.float32)
+    for i, ((x1, y1, x2, y2), class_id, score) in enumerate(zip(boxes_xyxy, class_ids, scores)):
+        output[:4, i] = [(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1]
+        output[4 + class_id, i] = score
+    return output
+
+
+def bare_backend(session=None, fixed_size=None, dynamic_batch=True):
+    """OnnxBackend around a stand-in session, without onnxruntime"""
+    backend = OnnxBackend.__new__(OnnxBackend)
+    backend.session = session
+    backend.input_name = "images"
+    backend.fixed_size = fixed_size
+    backend.dynamic_batch = dynamic_batch
+    backend.imgsz = fixed_size or 640
+    return backend
+
+
+class CenterBoxSession:
+    """
+    Stand-in for an ONNX Runtime session of a dynamic export: the anchor
+    count depends on the input size (as with YOLOv8's three strides) and
+    one person box of 64x32 input pixels sits at the center of each image.
+    """
+    def __init__(self):
+        self.shapes = []
+
+    def run(self, _, feeds):
+        batch = feeds["images"]
+        self.shapes.append(batch.shape)
+        n, _, h, w = batch.shape
+        anchors = sum((h // s) * (w // s) for s in (8, 16, 32))
+        output = np.zeros((n, 4 + NUM_CLASSES, anchors), np.float32)
+        output[:, :4, 0] = [w / 2, h / 2, 32, 64]
+        output[:, 4, 0] = 0.9
+        return [output]
+
+
+# -------------------------
+# LETTERBOX
+# -------------------------
+def test_letterbox_static_pads_to_square():
+    frame = np.full((480, 640, 3), 255, np.uint8)
+    padded, gain, (left, top) = letterbox(frame, 640)
+    assert padded.shape == (640, 640, 3)
+    assert gain == 1.0
+    assert (left, top) == (0, 80)
+    assert (padded[:80] == 114).all() and (padded[80:560] == 255).all() and (padded[560:] == 114).all()
+
+
+def test_letterbox_stride_pads_to_multiple():
+    frame = np.zeros((375, 500, 3), np.uint8)
+    padded, gain, (left, top) = letterbox(frame, 640, stride=32)
+    assert padded.shape[0] % 32 == 0 and padded.shape[1] % 32 == 0
+    assert padded.shape[:2] == (480, 640)
+    assert gain == pytest.approx(640 / 500)
+    assert left == 0 and top == (480 - round(375 * gain)) // 2
+
+
+def test_letterbox_stride_keeps_aligned_frame():
+    frame = np.zeros((480, 640, 3), np.uint8)
+    padded, gain, pad = letterbox(frame, 640, stride=32)
+    assert padded.shape[:2] == (480, 640)
+    assert gain == 1.0 and pad == (0, 0)
+
+
+# -------------------------
+# NMS
+# -------------------------
+def test_nms_suppresses_overlapping_boxes_of_one_class():
+    boxes = np.array([[0, 0, 100, 100], [5, 5, 105, 105], [200, 200, 300, 300]], np.float32)
+    scores = np.array([0.8, 0.9, 0.7], np.float32)
+    keep = non_max_suppression(boxes, scores, np.array([0, 0, 0]), 0.5)
+    assert sorted(keep.tolist()) == [1, 2]
+
+
+def test_nms_keeps_overlapping_boxes_of_different_classes():
+    boxes = np.array([[0, 0, 100, 100], [5, 5, 105, 105]], np.float32)
+    keep = non_max_suppression(boxes, np.array([0.8, 0.9], np.float32), np.array([0, 2]), 0.5)
+    assert sorted(keep.tolist()) == [0, 1]
+
+
+def test_nms_empty_and_max_det():
+    assert len(non_max_suppression(np.zeros((0, 4), np.float32), np.zeros(0), np.zeros(0), 0.5)) == 0
+    boxes = np.array([[i * 50, 0, i * 50 + 40, 40] for i in range(10)], np.float32)
+    keep = non_max_suppression(boxes, np.linspace(0.5, 0.9, 10).astype(np.float32), np.zeros(10), 0.5, max_det=3)
+    assert len(keep) == 3
+
+
+# -------------------------
+# POSTPROCESS
+# -------------------------
+def test_postprocess_undoes_letterbox():
+    frame = np.zeros((375, 500, 3), np.uint8)
+    _, gain, pad = letterbox(frame, 640, stride=32)
+    expected = np.array([[50, 60, 150, 300], [300, 100, 450, 200]], np.float32)
+    letterboxed = expected * gain + np.array([pad[0], pad[1], pad[0], pad[1]])
+    output = raw_output(letterboxed, [0, 2], [0.9, 0.6])
+
+    result = bare_backend().postprocess(output, gain, pad, frame.shape, conf=0.25, iou=0.45)
+    order = np.argsort(-result.boxes.conf.numpy())
+    np.testing.assert_allclose(result.boxes.xyxy.numpy()[order], expected, atol=1.0)
+    assert result.boxes.cls.numpy()[order].tolist() == [0, 2]
+    assert result.boxes.data.numpy().shape == (2, 6)
+
+
+def test_postprocess_clips_to_frame():
+    frame = np.zeros((480, 640, 3), np.uint8)
+    output = raw_output([[-20, -10, 100, 100], [600, 400, 700, 520]], [0, 0], [0.9, 0.9])
+    result = bare_backend().postprocess(output, 1.0, (0, 0), frame.shape, conf=0.25, iou=0.45)
+    boxes = result.boxes.xyxy.numpy()
+    assert boxes[:, [0, 2]].min() >= 0 and boxes[:, [0, 2]].max() <= 640
+    assert boxes[:, [1, 3]].min() >= 0 and boxes[:, [1, 3]].max() <= 480
+
+
+def test_postprocess_confidence_and_class_filter():
+    output = raw_output([[0, 0, 50, 50], [100, 100, 150, 150], [200, 200, 260, 260]], [0, 2, 16], [0.9, 0.8, 0.1])
+    shape = (480, 640, 3)
+    result = bare_backend().postprocess(output, 1.0, (0, 0), shape, conf=0.25, iou=0.45)
+    assert sorted(result.boxes.cls.numpy().tolist()) == [0, 2]
+    result = bare_backend().postprocess(output, 1.0, (0, 0), shape, conf=0.25, iou=0.45, classes=[2])
+    assert result.boxes.cls.numpy().tolist() == [2]
+
+
+# -------------------------
+# BATCHING BY SHAPE
+# -------------------------
+@pytest.mark.parametrize("dynamic_batch", [True, False])
+def test_mixed_frame_sizes_are_postprocessed_per_frame(dynamic_batch):
+    session = CenterBoxSession()
+    backend = bare_backend(session, dynamic_batch=dynamic_batch)
+    frames = [np.zeros(shape, np.uint8) for shape in
+              [(480, 640, 3), (200, 300, 3), (480, 640, 3), (100, 50, 3)]]
+
+    results = backend(frames, imgsz=640)
+
+    assert len(results) == len(frames)
+    for frame, result in zip(frames, results):
+        assert result.orig_shape == frame.shape
+        (x1, y1, x2, y2), = result.boxes.xyxy.numpy()
+        h, w = frame.shape[:2]
+        # The box sits at the center of every frame, whatever its letterbox
+        assert ((x1 + x2) / 2, (y1 + y2) / 2) == pytest.approx((w / 2, h / 2), abs=1.0)
+    if dynamic_batch:
+        # The two 640x480 frames share one run; the others run alone
+        assert sorted(shape[0] for shape in session.shapes) == [1, 1, 2]
+    else:
+        assert all(shape[0] == 1 for shape in session.shapes)
+
+
+# -------------------------
+# PARITY WITH TORCH
+# -------------------------
+def test_onnx_matches_torch(tmp_path, monkeypatch):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("ultralytics")
+    import cv2
+    from ultralytics import YOLO
+    from ultralytics.utils import ASSETS
+    from detection import _resolve_model_path
+
+    monkeypatch.delenv("YOLO_ONNX_PATH", raising=False)
+    try:
+        checkpoint = YOLO(_resolve_model_path()).ckpt_path
+    except Exception as e:
+        pytest.skip(f"YOLO weights unavailable: {e}")
+    # Export next to a copy, so the test never writes into the repo
+    model_path = tmp_path / "model.pt"
+    shutil.copy(checkpoint, model_path)
+
+    frames = [cv2.imread(str(path)) for path in sorted(ASSETS.glob("*.jpg"))]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        pytest.skip("No ultralytics sample images")
+    # Crops of other sizes exercise the minimal-padding letterbox
+    frames += [frame[: frame.shape[0] // 2, : frame.shape[1] * 2 // 3] for frame in frames]
+
+    torch_backend = load_detector("torch", str(model_path))
+    onnx_backend = load_detector("onnx", str(model_path), 640)
+    report = compare_backends(frames, torch_backend, onnx_backend)
+    assert report['reference_detections'] > 0
+    assert report['recall'] >= 0.95
+    assert report['precision'] >= 0.95
+    assert report['mean_iou'] >= 0.9
+
+    # A mixed-size list gives the same detections as one call per frame
+    batched = onnx_backend(frames, conf=0.25, iou=0.45, imgsz=640)
+    for frame, result in zip(frames, batched):
+        single = onnx_backend(frame, conf=0.25, iou=0.45, imgsz=640)[0]
+        np.testing.assert_allclose(result.boxes.data.numpy(), single.boxes.data.numpy(), atol=1e-3)
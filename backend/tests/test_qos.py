@@ -0,0 +1,61 @@
+import pytest
+
+from qos import QosConfig, QosGovernor
+
+
+@pytest.fixture(autouse=True)
+def fast_cooldown(monkeypatch):
+    monkeypatch.setattr(QosConfig, "COOLDOWN_FRAMES", 10)
+
+
+def run(governor, frames, inference_ms, skipped_ms=1.0):
+    """
+    Simulate a camera: every frame_skip-th frame runs the detector at
+    inference_ms(settings), the rest cost skipped_ms.
+
+    Returns the decision log entries made during the run.
+    """
+    before = len(governor.decisions)
+    for i in range(frames):
+        settings = governor.settings
+        skipped = (i % settings.frame_skip) != 0
+        total_ms = skipped_ms if skipped else inference_ms(settings)
+        governor.observe({'total_ms': total_ms, 'cpu_ms': 0.0}, person_count=1, skipped=skipped)
+    return list(governor.decisions)[before:]
+
+
+def test_settles_with_constant_inference_cost():
+    """
+    170 ms per detection against a 150 ms budget: averaging in the cheap
+    skipped frames would put frame skip 2 under the headroom (85 < 90 ms),
+    relax it, go over budget again and oscillate forever.
+    """
+    governor = QosGovernor("cam", latency_budget_ms=150, cpu_budget=0)
+    run(governor, 500, lambda settings: 170.0)
+    settled = governor.settings.to_dict()
+
+    later = run(governor, 2000, lambda settings: 170.0)
+    assert later == []
+    assert governor.settings.to_dict() == settled
+    assert not any(d['direction'] == 'up' for d in governor.decisions)
+
+
+def test_settles_at_input_size_within_budget():
+    """Detection cost scaling with the input size settles at the largest size that fits"""
+    governor = QosGovernor("cam", latency_budget_ms=150, cpu_budget=0)
+    cost = lambda settings: 250.0 * (settings.imgsz / 640) ** 2
+    run(governor, 1000, cost)
+    settled = governor.settings.to_dict()
+
+    assert run(governor, 2000, cost) == []
+    assert governor.settings.to_dict() == settled
+    assert 0.6 * 150 <= cost(governor.settings) <= 150
+
+
+def test_skipped_frames_do_not_move_latency_estimate():
+    governor = QosGovernor("cam", latency_budget_ms=150, cpu_budget=0)
+    governor.observe({'total_ms': 100.0}, person_count=1)
+    for _ in range(50):
+        governor.observe({'total_ms': 0.5}, person_count=1, skipped=True)
+        governor.observe({'total_ms': 0.5}, person_count=1, detected=False)  # Motion-filtered
+    assert governor.latency_ms == pytest.approx(100.0)
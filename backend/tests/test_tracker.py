@@ -0,0 +1,19 @@
+import numpy as np
+
+from tracker import iou_matrix
+
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10]], np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], np.float32)
+    np.testing.assert_allclose(iou_matrix(a, b), [[1.0, 1 / 3, 0.0]], atol=1e-6)
+    assert iou_matrix(a, np.zeros((0, 4), np.float32)).shape == (1, 0)
+
+
+def test_iou_matrix_degenerate_boxes():
+    a = np.array([[0, 0, 10, 10], [5, 5, 5, 5]], np.float32)
+    inverted = np.array([[10, 10, 0, 0]], np.float32)
+    ious = iou_matrix(a, np.concatenate([a, inverted]))
+    assert np.isfinite(ious).all()
+    assert ious[1, 1] == 0.0  # Zero-area box overlaps nothing, not even itself
+    assert (ious[:, 2] == 0.0).all()
@@ -0,0 +1,160 @@
+"""
+Bounded per-track state.
+
+Tracker ids churn constantly on a busy camera, so per-track dictionaries
+(trails, positions, first-seen and cooldown times) must forget tracks that
+are gone. TrackStore is a dict-like store that records when each key was
+last seen, evicts keys not seen for TTL_SECONDS and caps the number of
+entries (least recently seen go first), counting both kinds of eviction.
+
+Entries are kept in last-seen order, so expiring old keys only ever looks
+at the front of the store and costs O(evicted), not O(entries).
+"""
+
+from collections import OrderedDict
+import os
+import threading
+import time
+
+from metrics import REGISTRY, Counter
+
+
+class TrackStoreConfig:
+    """Limits for per-track state"""
+    TTL_SECONDS = float(os.getenv("TRACK_TTL_SECONDS", "60"))  # Forget tracks not seen for this long
+    MAX_ENTRIES = int(os.getenv("TRACK_MAX_ENTRIES", "5000"))  # Hard cap per store
+
+
+TRACK_EVICTIONS = REGISTRY.register(Counter(
+    "surveillance_track_evictions_total",
+    "Per-track state entries evicted, by store and reason (ttl or capacity)",
+    ["store", "reason"],
+))
+
+
+class TrackStore:
+    """
+    Dict-like per-track state with last-seen times, TTL and a size cap.
+
+    Args:
+        name: Store name, used for eviction metrics
+        factory: Creates the value for a missing key on store[key]
+            (like defaultdict); None raises KeyError instead
+        ttl: Seconds a key survives without being seen (default TrackStoreConfig)
+        max_entries: Hard cap on entries (default TrackStoreConfig)
+        clock: Monotonic time source in seconds
+
+    Reading or writing a key through store[key], store[key] = value or
+    setdefault() marks it seen. get() and `in` only look.
+    """
+    def __init__(self, name, factory=None, ttl=None, max_entries=None, clock=time.monotonic):
+        self.name = name
+        self.factory = factory
+        self.ttl = TrackStoreConfig.TTL_SECONDS if ttl is None else ttl
+        self.max_entries = max_entries or TrackStoreConfig.MAX_ENTRIES
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> [value, last_seen], oldest first
+        self._lock = threading.RLock()
+        self.evicted_ttl = 0
+        self.evicted_capacity = 0
+
+    def _touch(self, key, value):
+        self._entries[key] = [value, self.clock()]
+        self._entries.move_to_end(key)
+        self._evict()
+        return value
+
+    def _evict(self):
+        entries = self._entries
+        if self.ttl:
+            cutoff = self.clock() - self.ttl
+            expired = 0
+            while entries:
+                key = next(iter(entries))
+                if entries[key][1] >= cutoff:
+                    break
+                del entries[key]
+                expired += 1
+            if expired:
+                self.evicted_ttl += expired
+                TRACK_EVICTIONS.inc(self.name, "ttl", amount=expired)
+        overflow = len(entries) - self.max_entries
+        if overflow > 0:
+            for _ in range(overflow):
+                entries.popitem(last=False)
+            self.evicted_capacity += overflow
+            TRACK_EVICTIONS.inc(self.name, "capacity", amount=overflow)
+
+    def __getitem__(self, key):
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(key)
+            if entry is not None:
+                return self._touch(key, entry[0])
+            if self.factory is None:
+                raise KeyError(key)
+            return self._touch(key, self.factory())
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._touch(key, value)
+
+    def setdefault(self, key, default=None):
+        """Value for key (stored as `default` if missing); marks the key seen"""
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(key)
+            return self._touch(key, default if entry is None else entry[0])
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(key)
+            return default if entry is None else entry[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            self._evict()
+            return key in self._entries
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._entries[key]
+
+    def __len__(self):
+        """Number of live (not yet expired) keys"""
+        with self._lock:
+            self._evict()
+            return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        with self._lock:
+            self._evict()
+            return list(self._entries)
+
+    def items(self):
+        with self._lock:
+            self._evict()
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def last_seen(self, key):
+        """Clock time the key was last seen, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        return {
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'evicted_ttl': self.evicted_ttl,
+            'evicted_capacity': self.evicted_capacity,
+        }
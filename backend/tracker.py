@@ -0,0 +1,264 @@
+"""
+Lightweight CPU multi-object tracker.
+
+SORT/ByteTrack-style tracking in plain numpy: a constant-velocity Kalman
+filter per track (predicted for all tracks at once), IoU association
+between predicted track boxes and detections (high-confidence detections
+first, then the rest), and track birth/death by hit and miss counts.
+
+Each camera owns its own tracker (DetectionState.tracker), so cameras never
+share track ids or state, unlike yolo.track(persist=True). Predicting is a
+few small matrix products, cheap enough to run on frames where detection
+was skipped to keep boxes and ids moving.
+"""
+
+import numpy as np
+
+
+class TrackerConfig:
+    """Configuration for the built-in tracker"""
+    IOU_THRESHOLD = 0.3  # Minimum IoU between a predicted track and a detection
+    HIGH_CONFIDENCE = 0.6  # Detections above this are associated first
+    MIN_HITS = 3  # Detections before a track is confirmed and gets reported
+    MAX_AGE = 30  # Frames a confirmed track survives without a detection
+    STD_POSITION = 1.0 / 20  # Position noise, relative to box height
+    STD_VELOCITY = 1.0 / 160  # Velocity noise, relative to box height
+
+
+def iou_matrix(a, b):
+    """
+    Pairwise IoU between (N, 4) and (M, 4) xyxy boxes (shared with the
+    detector parity check). Degenerate boxes have zero area.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(axis=2)
+    area_a = np.clip(a[:, 2:] - a[:, :2], 0, None).prod(axis=1)
+    area_b = np.clip(b[:, 2:] - b[:, :2], 0, None).prod(axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def greedy_assignment(scores, threshold):
+    """
+    Match rows to columns by descending score, each used at most once.
+
+    Returns:
+        (row indices, column indices) of the matches
+    """
+    if scores.size == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    order = np.argsort(-scores, axis=None)
+    rows, cols = np.unravel_index(order, scores.shape)
+    keep = scores[rows, cols] >= threshold
+    rows, cols = rows[keep], cols[keep]
+
+    used_rows, used_cols = set(), set()
+    matched_rows, matched_cols = [], []
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matched_rows.append(r)
+        matched_cols.append(c)
+    return np.asarray(matched_rows, np.int64), np.asarray(matched_cols, np.int64)
+
+
+def _xyxy_to_cxcywh(boxes):
+    boxes = np.asarray(boxes, np.float64)
+    wh = boxes[:, 2:] - boxes[:, :2]
+    return np.concatenate([boxes[:, :2] + wh / 2, wh], axis=1)
+
+
+def _cxcywh_to_xyxy(state):
+    half = state[:, 2:4] / 2
+    return np.concatenate([state[:, :2] - half, state[:, :2] + half], axis=1)
+
+
+# Constant-velocity model over [cx, cy, w, h, vcx, vcy, vw, vh]
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+_H = np.eye(4, 8)
+
+
+class MultiObjectTracker:
+    """
+    Per-camera Kalman + IoU tracker.
+
+    Track arrays are stored column-wise (one row per track) so the predict
+    and update steps run for every track in a single batched operation.
+    """
+    def __init__(self):
+        self.mean = np.zeros((0, 8))  # Kalman state per track
+        self.covariance = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, np.int64)
+        self.class_ids = np.zeros(0, np.int32)
+        self.scores = np.zeros(0, np.float32)
+        self.hits = np.zeros(0, np.int32)
+        self.misses = np.zeros(0, np.int32)  # Frames since the last matched detection
+        self._next_id = 1
+        self.frame_count = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def confirmed(self):
+        return self.hits >= TrackerConfig.MIN_HITS
+
+    @property
+    def has_tentative(self):
+        """Whether any track still needs detections before it is confirmed"""
+        return bool(len(self)) and not self.confirmed.all()
+
+    def _noise(self, heights, std_position, std_velocity):
+        heights = np.maximum(heights, 1.0)
+        std = np.concatenate([
+            np.repeat((std_position * heights)[:, None], 4, axis=1),
+            np.repeat((std_velocity * heights)[:, None], 4, axis=1),
+        ], axis=1)
+        return std ** 2
+
+    def predict(self):
+        """Advance every track one frame"""
+        self.frame_count += 1
+        if not len(self):
+            return
+        q = self._noise(self.mean[:, 3], TrackerConfig.STD_POSITION, TrackerConfig.STD_VELOCITY)
+        self.mean = self.mean @ _F.T
+        self.mean[:, 2:4] = np.maximum(self.mean[:, 2:4], 1.0)
+        self.covariance = _F @ self.covariance @ _F.T
+        self.covariance[:, np.arange(8), np.arange(8)] += q
+
+    def _correct(self, index, measurements):
+        """Kalman update of tracks `index` with (M, 4) cx, cy, w, h measurements"""
+        mean = self.mean[index]
+        covariance = self.covariance[index]
+        r = (TrackerConfig.STD_POSITION * np.maximum(mean[:, 3], 1.0)) ** 2
+        innovation_cov = _H @ covariance @ _H.T + r[:, None, None] * np.eye(4)
+        gain = covariance @ _H.T @ np.linalg.inv(innovation_cov)
+        innovation = measurements - mean[:, :4]
+        self.mean[index] = mean + np.einsum('nij,nj->ni', gain, innovation)
+        self.covariance[index] = covariance - gain @ _H @ covariance
+
+    def _spawn(self, measurements, class_ids, scores):
+        count = len(measurements)
+        if not count:
+            return
+        mean = np.concatenate([measurements, np.zeros((count, 4))], axis=1)
+        heights = measurements[:, 3]
+        variance = self._noise(heights, 2 * TrackerConfig.STD_POSITION, 10 * TrackerConfig.STD_VELOCITY)
+        covariance = np.zeros((count, 8, 8))
+        covariance[:, np.arange(8), np.arange(8)] = variance
+
+        ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        self._next_id += count
+        self.mean = np.concatenate([self.mean, mean])
+        self.covariance = np.concatenate([self.covariance, covariance])
+        self.ids = np.concatenate([self.ids, ids])
+        self.class_ids = np.concatenate([self.class_ids, np.asarray(class_ids, np.int32)])
+        self.scores = np.concatenate([self.scores, np.asarray(scores, np.float32)])
+        self.hits = np.concatenate([self.hits, np.ones(count, np.int32)])
+        self.misses = np.concatenate([self.misses, np.zeros(count, np.int32)])
+
+    def _keep(self, mask):
+        self.mean = self.mean[mask]
+        self.covariance = self.covariance[mask]
+        self.ids = self.ids[mask]
+        self.class_ids = self.class_ids[mask]
+        self.scores = self.scores[mask]
+        self.hits = self.hits[mask]
+        self.misses = self.misses[mask]
+
+    def _associate(self, track_index, boxes, class_ids, det_index):
+        """IoU-match a subset of tracks to a subset of detections (same class only)"""
+        if not len(track_index) or not len(det_index):
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        predicted = _cxcywh_to_xyxy(self.mean[track_index])
+        ious = iou_matrix(predicted, boxes[det_index])
+        ious = np.where(self.class_ids[track_index][:, None] == class_ids[det_index][None, :], ious, 0.0)
+        rows, cols = greedy_assignment(ious, TrackerConfig.IOU_THRESHOLD)
+        return track_index[rows], det_index[cols]
+
+    def update(self, boxes, scores, class_ids, regions=None):
+        """
+        Predict, associate this frame's detections and update tracks.
+
+        Args:
+            boxes: (N, 4) xyxy detection boxes
+            scores: (N,) detection confidences
+            class_ids: (N,) detection classes
+            regions: Optional xyxy areas the detector looked at (ROI mode).
+                Tracks whose predicted center lies outside every region were
+                not observed, so they coast instead of counting a miss.
+
+        Returns:
+            (track ids per detection, -1 while unconfirmed;
+             indices of coasting tracks to report alongside the detections)
+        """
+        boxes = np.asarray(boxes, np.float64).reshape(-1, 4)
+        scores = np.asarray(scores, np.float32)
+        class_ids = np.asarray(class_ids, np.int32)
+        self.predict()
+
+        # ByteTrack-style: confident detections claim tracks first, weaker
+        # ones may only continue tracks that are left over.
+        all_tracks = np.arange(len(self))
+        high = np.flatnonzero(scores >= TrackerConfig.HIGH_CONFIDENCE)
+        low = np.flatnonzero(scores < TrackerConfig.HIGH_CONFIDENCE)
+        matched_tracks, matched_dets = self._associate(all_tracks, boxes, class_ids, high)
+        remaining = np.setdiff1d(all_tracks, matched_tracks)
+        low_tracks, low_dets = self._associate(remaining, boxes, class_ids, low)
+        matched_tracks = np.concatenate([matched_tracks, low_tracks])
+        matched_dets = np.concatenate([matched_dets, low_dets])
+
+        measurements = _xyxy_to_cxcywh(boxes)
+        if len(matched_tracks):
+            self._correct(matched_tracks, measurements[matched_dets])
+            self.scores[matched_tracks] = scores[matched_dets]
+            self.class_ids[matched_tracks] = class_ids[matched_dets]
+            self.hits[matched_tracks] += 1
+            self.misses[matched_tracks] = 0
+
+        unmatched = np.ones(len(self), dtype=bool)
+        unmatched[matched_tracks] = False
+        coasting = np.zeros(len(self), dtype=bool)
+        if regions is not None and unmatched.any():
+            centers = self.mean[:, :2]
+            inside = np.zeros(len(self), dtype=bool)
+            for x1, y1, x2, y2 in regions:
+                inside |= ((centers[:, 0] >= x1) & (centers[:, 0] < x2)
+                           & (centers[:, 1] >= y1) & (centers[:, 1] < y2))
+            coasting = unmatched & ~inside & self.confirmed
+        self.misses[unmatched & ~coasting] += 1
+
+        # Drop unconfirmed tracks on their first miss and confirmed ones
+        # after MAX_AGE misses
+        alive = (self.misses == 0) | (self.confirmed & (self.misses <= TrackerConfig.MAX_AGE))
+        track_ids = np.full(len(boxes), -1, np.int64)
+        confirmed_ids = np.where(self.confirmed, self.ids, -1)
+        track_ids[matched_dets] = confirmed_ids[matched_tracks]
+
+        unmatched_dets = np.setdiff1d(np.arange(len(boxes)), matched_dets)
+        coasting_ids = self.ids[coasting & alive & (self.misses == 0)]
+        self._keep(alive)
+        self._spawn(measurements[unmatched_dets], class_ids[unmatched_dets], scores[unmatched_dets])
+        return track_ids, np.flatnonzero(np.isin(self.ids, coasting_ids))
+
+    def predict_tracks(self):
+        """
+        Advance tracks on a frame the detector did not look at (skipped or
+        motion-filtered). Nothing was observed, so no track counts a miss.
+
+        Returns indices of confirmed tracks seen on the last detection
+        frame, whose predicted boxes are available via boxes().
+        """
+        self.predict()
+        return np.flatnonzero(self.confirmed & (self.misses == 0))
+
+    def boxes(self, index=None):
+        """Predicted/filtered xyxy boxes of tracks"""
+        mean = self.mean if index is None else self.mean[index]
+        return _cxcywh_to_xyxy(mean)
@@ -0,0 +1,132 @@
+"""
+Precompiled zone lookup.
+
+Zones (polygons) are rasterized once into a label map at frame resolution
+where bit i of a pixel is set when the pixel lies inside zone i. Testing
+any number of points against every zone is then a single vectorized index
+into that map instead of a cv2.pointPolygonTest per point, zone and frame.
+Each frame size gets its own map (cameras at different resolutions share
+the zones without re-rasterizing), and maps are rebuilt automatically
+when the zones change.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+MAX_ZONES = 64  # Bits in the widest label dtype
+MAX_SHAPES = 16  # Frame sizes whose label maps are kept per zone list
+
+
+def _label_dtype(count):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if count <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"At most {MAX_ZONES} zones are supported, got {count}")
+
+
+def _freeze(polygons):
+    """Hashable snapshot of a zone list, to notice when it changes"""
+    return tuple(tuple((int(x), int(y)) for x, y in polygon) for polygon in polygons)
+
+
+class ZoneMap:
+    """
+    Bitmask label map for a list of polygons.
+
+    Args:
+        polygons: List of polygons, each a list of (x, y) points
+    """
+    def __init__(self, polygons):
+        self.key = _freeze(polygons)
+        self.polygons = [np.array(polygon, dtype=np.int32) for polygon in self.key]
+        self.dtype = _label_dtype(len(self.polygons))
+        # frame shape -> label map. Replaced, never mutated, so readers
+        # can use it without the lock.
+        self._labels = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def _extent(self):
+        """Smallest map covering every polygon (points beyond it are in no zone)"""
+        if not self.polygons:
+            return (1, 1)
+        corner = np.max([polygon.max(axis=0) for polygon in self.polygons], axis=0)
+        return (int(corner[1]) + 1, int(corner[0]) + 1)
+
+    def labels(self, frame_shape=None):
+        """Label map for a frame size, rasterized on first use of that size"""
+        shape = tuple(frame_shape[:2]) if frame_shape is not None else self._extent()
+        labels = self._labels.get(shape)
+        if labels is not None:
+            return labels
+        with self._lock:
+            labels = self._labels.get(shape)
+            if labels is None:
+                labels = self._rasterize(shape)
+                cached = dict(self._labels)
+                if len(cached) >= MAX_SHAPES:
+                    cached.pop(next(iter(cached)))  # Oldest size
+                cached[shape] = labels
+                self._labels = cached
+            return labels
+
+    def _rasterize(self, shape):
+        labels = np.zeros(shape, dtype=self.dtype)
+        scratch = np.zeros(shape, dtype=np.uint8)
+        for bit, polygon in enumerate(self.polygons):
+            scratch[:] = 0
+            cv2.fillPoly(scratch, [polygon], 1)
+            labels |= scratch.astype(self.dtype) << self.dtype(bit)
+        return labels
+
+    def lookup(self, points, frame_shape=None):
+        """
+        Zone bitmask for each (x, y) point; 0 for points in no zone or
+        outside the frame.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        labels = self.labels(frame_shape)
+        if not len(points):
+            return np.zeros(0, dtype=self.dtype)
+        xs = np.floor(points[:, 0]).astype(np.int64)
+        ys = np.floor(points[:, 1]).astype(np.int64)
+        height, width = labels.shape
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        bits = np.zeros(len(points), dtype=self.dtype)
+        bits[inside] = labels[ys[inside], xs[inside]]
+        return bits
+
+    def contains_any(self, points, frame_shape=None):
+        """Boolean per point: inside at least one zone"""
+        return self.lookup(points, frame_shape) != 0
+
+    def zone_indices(self, bits):
+        """Indices of the zones set in one bitmask value"""
+        bits = int(bits)
+        return [i for i in range(len(self.polygons)) if bits >> i & 1]
+
+
+_maps = {}
+_maps_lock = threading.Lock()
+
+
+def get_zone_map(name, polygons):
+    """
+    Compiled ZoneMap for a named zone list (e.g. 'detection', 'restricted'),
+    recompiled only when the polygons change.
+    """
+    key = _freeze(polygons)
+    zone_map = _maps.get(name)
+    if zone_map is not None and zone_map.key == key:
+        return zone_map
+    with _maps_lock:
+        zone_map = _maps.get(name)
+        if zone_map is None or zone_map.key != key:
+            zone_map = ZoneMap(polygons)
+            _maps[name] = zone_map
+        return zone_map
@@ -1,10 +1,14 @@
 import { useEffect, useRef, useState } from "react";
 import { apiUrl } from "../config/api";
 
+const CAMERA_ID = "cam_001";
+
 export default function VideoStream() {
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
   const intervalRef = useRef(null);
+  const frameUrlRef = useRef(null);
+  const inFlightRef = useRef(false);
 
   const [frame, setFrame] = useState(null);
   const [status, setStatus] = useState("Initializing camera...");
@@ -46,6 +50,9 @@ export default function VideoStream() {
       const canvas = canvasRef.current;
       if (!video || !canvas) return;
       if (video.videoWidth === 0) return;
+      // Don't queue frames behind one the backend is still processing
+      if (inFlightRef.current) return;
+      inFlightRef.current = true;
 
       canvas.width = 640;
       canvas.height = 480;
@@ -53,25 +60,44 @@ export default function VideoStream() {
       const ctx = canvas.getContext("2d");
       ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-      const image = canvas.toDataURL("image/jpeg", 0.7);
+      // Send raw JPEG bytes and receive the annotated frame as image/jpeg;
+      // avoids the ~33% base64 overhead in both directions.
+      const blob = await new Promise((resolve) =>
+        canvas.toBlob(resolve, "image/jpeg", 0.7),
+      );
+      if (!blob) {
+        inFlightRef.current = false;
+        return;
+      }
 
       try {
         const res = await fetch(apiUrl("/api/process_frame"), {
           method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ image }),
+          headers: {
+            "Content-Type": "image/jpeg",
+            Accept: "image/jpeg",
+            "X-Camera-Id": CAMERA_ID,
+          },
+          body: blob,
         });
 
+        // 429: frame dropped by backend load shedding; keep the last frame
+        if (res.status === 429) return;
         if (!res.ok) throw new Error("Backend error");
 
-        const data = await res.json();
-        if (data?.annotated_image) {
-          setFrame(data.annotated_image);
+        const annotated = await res.blob();
+        if (annotated.size > 0) {
+          const url = URL.createObjectURL(annotated);
+          if (frameUrlRef.current) URL.revokeObjectURL(frameUrlRef.current);
+          frameUrlRef.current = url;
+          setFrame(url);
           setError("");
         }
       } catch (e) {
         console.error(e);
         setError("Backend not responding");
+      } finally {
+        inFlightRef.current = false;
       }
     };
 
@@ -80,6 +106,7 @@ export default function VideoStream() {
     return () => {
       if (intervalRef.current) clearInterval(intervalRef.current);
       if (stream) stream.getTracks().forEach((t) => t.stop());
+      if (frameUrlRef.current) URL.revokeObjectURL(frameUrlRef.current);
     };
   }, []);
 